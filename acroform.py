@@ -0,0 +1,107 @@
+import json
+import re
+from typing import BinaryIO, Dict, Optional, Union
+
+from field_definitions import FIELD_DEFINITIONS, FieldDefinition, first_group_number, normalize_number
+from pdf_backends import prepare_source, pdf_reader_class
+
+PDFSource = Union[str, bytes, BinaryIO]
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize_name(name: str) -> str:
+    """Název pole bez ohledu na velikost písmen a bílé znaky"""
+    return _WHITESPACE.sub(" ", name).strip().lower()
+
+
+def read_form_fields(source: PDFSource) -> Dict[str, str]:
+    """Přečte vyplněné hodnoty polí AcroForm; u plochého PDF vrátí prázdný slovník"""
+    reader = pdf_reader_class()(prepare_source(source))
+    root = reader.trailer["/Root"]
+    if "/AcroForm" not in root:
+        return {}
+
+    values = {}
+    for name, form_field in (reader.get_fields() or {}).items():
+        value = form_field.get("/V")
+        if value is None:
+            continue
+        if isinstance(value, list):
+            value = ", ".join(str(item) for item in value)
+        value = str(value)
+        # Zaškrtávací pole a přepínače mají hodnotu jako PDF jméno (/Yes, /Off)
+        if form_field.get("/FT") == "/Btn":
+            value = value.lstrip("/")
+            if value == "Off":
+                value = ""
+        values[name] = value.strip()
+    return values
+
+
+def load_mapping(path: str) -> Dict[str, str]:
+    """Načte mapování {název pole AcroForm: klíč osobních údajů nebo název pole z field_definitions}"""
+    with open(path, "r", encoding="utf-8") as f:
+        mapping = json.load(f)
+    if not isinstance(mapping, dict):
+        raise ValueError(f"Mapování polí AcroForm v {path} musí být JSON objekt")
+    return mapping
+
+
+class AcroFormMapper:
+    """Převádí hodnoty polí AcroForm na stejné klíče, jaké vrací extrakce z textu.
+
+    Cílem mapování může být klíč osobních údajů (prijmeni, ico, ...) nebo název pole
+    z field_definitions (např. "Rodné číslo/Datum narození"). Hodnota se zpracuje vzorem
+    a funkcí příslušné definice, takže se čísla normalizují a dvojice hodnot rozdělí stejně
+    jako v textu. Pole se stejným názvem jako klíč nebo definice se mapují automaticky.
+    """
+
+    def __init__(self, mapping: Optional[Dict[str, str]] = None, definitions: Optional[Dict[str, FieldDefinition]] = None):
+        self.definitions = definitions or FIELD_DEFINITIONS
+        # Definice podle názvu a podle jediného klíče, který vrací
+        self._by_name = {_normalize_name(name): name for name in self.definitions}
+        self._by_key: Dict[str, Optional[str]] = {}
+        for name, definition in self.definitions.items():
+            for key in definition.keys:
+                self._by_key[key] = name if len(definition.keys) == 1 else None
+        self.mapping = {_normalize_name(name): target for name, target in (mapping or {}).items()}
+
+    def _target(self, field_name: str) -> Optional[str]:
+        normalized = _normalize_name(field_name)
+        if normalized in self.mapping:
+            return self.mapping[normalized]
+        if normalized in self._by_name:
+            return self._by_name[normalized]
+        if field_name in self._by_key:
+            return field_name
+        return None
+
+    def _apply_definition(self, name: str, value: str) -> Dict[str, str]:
+        """Zpracuje hodnotu stejně, jako kdyby v textu stála za návěštím pole"""
+        definition = self.definitions[name]
+        text = f"{definition.label} {value}"
+        match = definition.regex.match(text)
+        if match and (match.end() == len(text) or len(definition.keys) > 1):
+            return dict(zip(definition.keys, definition.processor(match)))
+        if len(definition.keys) == 1:
+            # Hodnota v poli může mít jiný formát než v textu (např. "45 000,50") - vezme se celá
+            if definition.processor is first_group_number:
+                return {definition.keys[0]: normalize_number(_WHITESPACE.sub("", value))}
+            return {definition.keys[0]: value}
+        return {}
+
+    def map(self, form_values: Dict[str, str]) -> Dict[str, str]:
+        """Vrátí osobní údaje z hodnot formuláře (jen vyplněná a namapovaná pole)"""
+        personal_data: Dict[str, str] = {}
+        for field_name, value in form_values.items():
+            target = self._target(field_name)
+            if not target or not value:
+                continue
+            if target in self.definitions:
+                personal_data.update(self._apply_definition(target, value))
+            elif self._by_key.get(target):
+                personal_data.update(self._apply_definition(self._by_key[target], value))
+            else:
+                personal_data[target] = value
+        return {key: value for key, value in personal_data.items() if value}
@@ -1,16 +1,26 @@
 import streamlit as st
+import io
 import json
 import os
-import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 import uuid
 from datetime import datetime
-from typing import Optional, Dict, Any
-import pandas as pd
+from typing import Optional, Dict, Any, List
+from dotenv import load_dotenv
+
+# Načti environment proměnné
+load_dotenv()
 
 # Import nového extraktoru
-from main_extract_new import PDFExtractor
-from main_fill import fill_document
+from main_extract_new import ExtractedData, ExtractionCancelled, ExtractionOptions, PDFExtractor
+from pdf_backends import count_pages
+from result_cache import DiskLRUCache, ExtractionResultCache, MemoryLRUCache, disk_cache_from_env
+from main_fill import render_document
+from bulk_fill import iter_records, render_zip
+from metrics import configure_logging
 
 # =============================================================================
 # KONFIGURACE A POMOCNÉ FUNKCE
@@ -36,7 +46,7 @@ class AppConfig:
     }
     
     # Složky
-    DIRECTORIES = ["output", "data", "templates"]
+    DIRECTORIES = ["templates"]
     
     # Stavové zprávy
     MESSAGES = {
@@ -46,6 +56,24 @@ class AppConfig:
         "info": "ℹ️",
         "loading": "🔄"
     }
+    
+    # Počet souběžně extrahovaných souborů (sdílený pro všechny relace)
+    EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", 4))
+    
+    # Kolik znaků extrahovaného textu zobrazit (a držet v cache výsledků)
+    TEXT_PREVIEW_CHARS = 20000
+    
+    # Kolik výsledků extrakce držet v paměti relace (nejdéle nepoužité se vyřadí)
+    SESSION_RESULT_ENTRIES = int(os.getenv("SESSION_RESULT_ENTRIES", 32))
+    
+    # Stavy extrakce na pozadí
+    JOB_STATUS = {
+        "queued": "⏳ Čeká ve frontě",
+        "running": "🔄 Extrahuji",
+        "done": "✅ Hotovo",
+        "error": "❌ Chyba",
+        "cancelled": "⏹️ Zrušeno"
+    }
 
 class FileManager:
     """Správa souborů a složek"""
@@ -89,50 +117,138 @@ class FileManager:
         """Vrací MIME typ pro daný formát"""
         return AppConfig.SUPPORTED_FORMATS[format_type]["mime_type"]
 
+@st.cache_resource
+def get_result_disk_cache() -> Optional[DiskLRUCache]:
+    """Disková cache výsledků extrakce sdílená všemi relacemi"""
+    return disk_cache_from_env()
+
+@st.cache_resource
+def setup_logging() -> bool:
+    """Nastaví logování extrakce jen jednou pro celý server (LOG_FORMAT, LOG_LEVEL)"""
+    configure_logging()
+    return True
+
+@st.cache_resource
+def get_extraction_executor() -> ThreadPoolExecutor:
+    """Pool vláken pro extrakci na pozadí - omezuje souběh extrakcí napříč relacemi"""
+    return ThreadPoolExecutor(max_workers=AppConfig.EXTRACTION_WORKERS, thread_name_prefix="extrakce")
+
+@dataclass
+class ExtractionJob:
+    """Extrakce jednoho nahraného souboru běžící na pozadí.
+
+    Stav mění pracovní vlákno, skript ho jen čte - proto se nedrží přímo v session_state
+    (ta je dostupná jen z vlákna skriptu), ale v tomto objektu.
+    """
+    name: str
+    size: int
+    status: str = "queued"
+    # Poslední zpracovaná stránka a celkový počet stránek (0 = neznámý)
+    page: int = 0
+    pages: int = 0
+    data: Optional[Dict[str, Any]] = None
+    error: str = ""
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    future: Optional[Future] = field(default=None, repr=False)
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "error", "cancelled")
+    
+    def cancel(self):
+        """Zruší extrakci - čekající se nespustí, běžící skončí po dočtení aktuální stránky"""
+        self.cancel_event.set()
+        if self.future is not None and self.future.cancel():
+            self.status = "cancelled"
+
 class DataProcessor:
     """Zpracování a validace dat"""
     
     @staticmethod
-    def process_uploaded_file(uploaded_file) -> Optional[Dict[str, Any]]:
-        """Zpracuje nahraný soubor a vrátí extrahovaná data"""
-        if not uploaded_file:
-            return None
+    def to_view_data(extracted_data: ExtractedData) -> Dict[str, Any]:
+        """Převede výsledek extrakce na data pro zobrazení"""
+        return {
+            "personal_info": extracted_data.personal_info,
+            "company_info": extracted_data.company_info,
+            "raw_text": extracted_data.raw_text,
+            "table_data": extracted_data.table_data,
+            "validation": extracted_data.validation,
+            "table_df": extracted_data.to_dataframe()
+        }
+    
+    @staticmethod
+    def run_extraction(job: ExtractionJob, pdf_bytes: bytes, cache: ExtractionResultCache):
+        """Extrahuje jeden soubor v pracovním vlákně a průběžně zapisuje stav do job"""
+        if job.cancel_event.is_set():
+            job.status = "cancelled"
+            return
+        job.status = "running"
+        try:
+            job.pages = count_pages(pdf_bytes)
+        except Exception:
+            job.pages = 0
+        
+        def progress(page_no: int):
+            if job.cancel_event.is_set():
+                raise ExtractionCancelled()
+            job.page = page_no
+        
+        # Omezená paměť - text velkých příloh se nedrží celý v paměti ani v cache relace
+        options = ExtractionOptions(
+            progress=progress,
+            bounded_memory=True,
+            text_preview_chars=AppConfig.TEXT_PREVIEW_CHARS,
+            # Server Streamlitu je vícevláknový - OCR běží ve vlákně extrakce, ne ve forkovaném poolu
+            ocr_workers=0
+        )
         
         try:
-            # Uložení nahraného souboru
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                pdf_path = tmp_file.name
-            
-            # Extrakce dat
-            extractor = PDFExtractor(pdf_path)
-            extracted_data = extractor.extract_all_data()
-            
-            # Vyčištění dočasného souboru
-            os.unlink(pdf_path)
-            
-            return {
-                "personal_info": extracted_data.personal_info,
-                "company_info": extracted_data.company_info,
-                "raw_text": extracted_data.raw_text,
-                "table_data": extracted_data.table_data,
-                "table_df": extractor.get_dataframe()
-            }
-            
+            # Výsledek podle obsahu PDF - opakované běhy skriptu ani nové nahrání stejného souboru neextrahují znovu
+            extracted_data = cache.get_or_extract(
+                pdf_bytes,
+                lambda data: PDFExtractor(data, options=options).extract_all_data(),
+                options
+            )
+            if not extracted_data.raw_text:
+                job.error = "Nepodařilo se extrahovat data"
+                job.status = "error"
+                return
+            job.data = DataProcessor.to_view_data(extracted_data)
+            job.page = job.pages
+            job.status = "done"
+        except ExtractionCancelled:
+            job.status = "cancelled"
         except Exception as e:
-            st.error(f"{AppConfig.MESSAGES['error']} Chyba při zpracování: {str(e)}")
-            return None
+            job.error = f"Chyba při zpracování: {str(e)}"
+            job.status = "error"
     
     @staticmethod
-    def save_data_to_json(data: Dict[str, Any], filename: str = "data.json"):
-        """Uloží data do JSON souboru"""
-        try:
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            return True
-        except Exception as e:
-            st.error(f"{AppConfig.MESSAGES['error']} Chyba při ukládání: {str(e)}")
-            return False
+    def sync_jobs(uploaded_files: list) -> List[ExtractionJob]:
+        """Spustí extrakci nově nahraných souborů a zruší extrakci odebraných.
+
+        Vrací úlohy v pořadí nahraných souborů. Skript na extrakci nečeká.
+        """
+        jobs: Dict[str, ExtractionJob] = st.session_state.setdefault("extraction_jobs", {})
+        current_ids = [uploaded_file.file_id for uploaded_file in uploaded_files]
+        
+        for file_id in list(jobs):
+            if file_id not in current_ids:
+                jobs.pop(file_id).cancel()
+        
+        # Cache se vytváří ve vlákně skriptu - pracovní vlákna nemají přístup k session_state
+        cache = ExtractionResultCache(
+            disk=get_result_disk_cache(),
+            memory=st.session_state.setdefault("extraction_results", MemoryLRUCache(AppConfig.SESSION_RESULT_ENTRIES))
+        )
+        executor = get_extraction_executor()
+        for uploaded_file in uploaded_files:
+            if uploaded_file.file_id in jobs:
+                continue
+            job = ExtractionJob(name=uploaded_file.name, size=uploaded_file.size)
+            job.future = executor.submit(DataProcessor.run_extraction, job, uploaded_file.getvalue(), cache)
+            jobs[uploaded_file.file_id] = job
+        
+        return [jobs[file_id] for file_id in current_ids]
 
 class UIComponents:
     """UI komponenty pro aplikaci"""
@@ -178,20 +294,21 @@ class UIComponents:
             }
     
     @staticmethod
-    def render_file_upload():
-        """Vykreslí sekci pro nahrání souboru"""
+    def render_file_upload() -> list:
+        """Vykreslí sekci pro nahrání souborů"""
         col1, col2 = st.columns([2, 1])
         
         with col1:
             st.header("📤 Nahrání souboru")
             
-            uploaded_file = st.file_uploader(
-                "Nahrajte formulář",
+            uploaded_files = st.file_uploader(
+                "Nahrajte formuláře",
                 type=['pdf', 'docx', 'doc'],
-                help="Podporované formáty: PDF (doporučeno), DOCX, DOC"
+                accept_multiple_files=True,
+                help="Podporované formáty: PDF (doporučeno), DOCX, DOC. Více souborů se zpracuje souběžně."
             )
             
-            if not uploaded_file:
+            if not uploaded_files:
                 st.info("""
                 **📋 Podporované formáty:**
                 - **PDF** (doporučeno) - nejlepší kvalita extrakce
@@ -201,18 +318,64 @@ class UIComponents:
         
         with col2:
             st.header("📊 Status")
-            if uploaded_file:
+            if len(uploaded_files) == 1:
+                uploaded_file = uploaded_files[0]
                 st.success(f"{AppConfig.MESSAGES['success']} Soubor nahraný")
                 st.info(f"Název: {uploaded_file.name}")
                 st.info(f"Typ: {uploaded_file.type}")
                 st.info(f"Velikost: {uploaded_file.size / 1024:.1f} KB")
-                
-                if uploaded_file.type != "application/pdf":
-                    st.warning(f"{AppConfig.MESSAGES['warning']} Pro nejlepší výsledky použijte PDF formát")
+            elif uploaded_files:
+                st.success(f"{AppConfig.MESSAGES['success']} Nahráno souborů: {len(uploaded_files)}")
+                st.info(f"Celková velikost: {sum(f.size for f in uploaded_files) / 1024:.1f} KB")
             else:
                 st.warning("⏳ Čekám na nahrání souboru")
+            
+            if any(f.type != "application/pdf" for f in uploaded_files):
+                st.warning(f"{AppConfig.MESSAGES['warning']} Pro nejlepší výsledky použijte PDF formát")
+        
+        return uploaded_files
+    
+    @staticmethod
+    def render_extraction_progress(jobs: List[ExtractionJob]):
+        """Vykreslí průběh extrakce; dokud něco běží, překresluje se samostatně každou sekundu"""
+        # Počet dokončených úloh při posledním běhu celého skriptu - při změně se skript spustí
+        # znovu, aby se nové výsledky zobrazily hned po dokončení
+        st.session_state["extraction_finished"] = sum(job.finished for job in jobs)
+        running = not all(job.finished for job in jobs)
+        st.fragment(UIComponents._render_job_list, run_every=1.0 if running else None)(jobs)
+    
+    @staticmethod
+    def _render_job_list(jobs: List[ExtractionJob]):
+        """Stav jednotlivých souborů s průběhem po stránkách a tlačítky pro zrušení"""
+        finished = sum(job.finished for job in jobs)
+        if finished != st.session_state.get("extraction_finished"):
+            st.rerun()
+        
+        st.header("⚙️ Průběh extrakce")
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.progress(finished / len(jobs), text=f"Zpracováno {finished} z {len(jobs)} souborů")
+        with col2:
+            if finished < len(jobs):
+                if st.button("⏹️ Zrušit vše", key="cancel_all"):
+                    for job in jobs:
+                        job.cancel()
         
-        return uploaded_file
+        for index, job in enumerate(jobs):
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                status = AppConfig.JOB_STATUS[job.status]
+                if job.status == "running":
+                    pages = f" - stránka {job.page}/{job.pages}" if job.pages else ""
+                    fraction = min(job.page / job.pages, 1.0) if job.pages else 0.0
+                    st.progress(fraction, text=f"{status}: {job.name}{pages}")
+                elif job.status == "error":
+                    st.error(f"{status}: {job.name} - {job.error}")
+                else:
+                    st.write(f"{status}: {job.name}")
+            with col2:
+                if not job.finished:
+                    st.button("⏹️ Zrušit", key=f"cancel_{index}_{job.name}", on_click=job.cancel)
     
     @staticmethod
     def render_extraction_results(data: Dict[str, Any]):
@@ -227,6 +390,17 @@ class UIComponents:
         else:
             st.info("Tabulka nebyla v dokumentu rozpoznána nebo je prázdná.")
         
+        # Kontrola údajů
+        invalid = {key: result for key, result in data["validation"].items() if result["status"] == "invalid"}
+        for key, result in invalid.items():
+            st.warning(f"{AppConfig.MESSAGES['warning']} {key}: {result['message']}")
+        if data["validation"]:
+            with st.expander("🔎 Kontrola údajů", expanded=bool(invalid)):
+                st.table([
+                    {"Pole": key, "Stav": result["status"], "Důvěra": f"{result['confidence']:.0%}", "Poznámka": result["message"]}
+                    for key, result in data["validation"].items()
+                ])
+        
         # Stáhnutí JSON
         st.markdown("---")
         st.subheader("📥 Stáhnout extrahovaná data")
@@ -239,7 +413,10 @@ class UIComponents:
         
         # Debug informace
         with st.expander("📝 Zobrazit extrahovaný text z PDF", expanded=False):
-            st.code(data["raw_text"], language="text")
+            # U velkých dokumentů je v raw_text jen náhled ze začátku textu
+            st.code(data["raw_text"][:AppConfig.TEXT_PREVIEW_CHARS], language="text")
+            if len(data["raw_text"]) >= AppConfig.TEXT_PREVIEW_CHARS:
+                st.caption(f"Zobrazeno prvních {AppConfig.TEXT_PREVIEW_CHARS} znaků textu")
         
         if data["company_info"]:
             with st.expander("🏢 Informace o firmě z ARES API", expanded=False):
@@ -268,54 +445,79 @@ class UIComponents:
         """Vygeneruje dokument"""
         with st.spinner("Generuji dokument..."):
             try:
-                # Uložení dat
-                data_filename = f"data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-                data_path = Path("data") / data_filename
+                # Generování dokumentu v paměti - bez zápisu na disk, bezpečné pro souběžné uživatele
+                document = render_document(settings["selected_template"], data["personal_info"])
                 
-                if not DataProcessor.save_data_to_json(data["personal_info"], str(data_path)):
-                    return
-                
-                # Generování výstupního souboru
                 output_filename = FileManager.generate_unique_filename(
                     "vyplneny_dokument", 
                     settings["output_format"]
                 )
-                output_path = Path("output") / output_filename
-                
-                # Generování dokumentu
-                generated_path = fill_document(settings["selected_template"], str(output_path))
                 
                 st.success(f"{AppConfig.MESSAGES['success']} Dokument vygenerován!")
                 st.info(f"Výstupní soubor: {output_filename}")
                 
                 # Stáhnutí
-                if os.path.exists(generated_path):
-                    with open(generated_path, "rb") as file:
-                        st.download_button(
-                            label="📥 Stáhnout dokument",
-                            data=file.read(),
-                            file_name=output_filename,
-                            mime=FileManager.get_mime_type(settings["output_format"])
-                        )
-                else:
-                    st.error(f"{AppConfig.MESSAGES['error']} Soubor nebyl vytvořen")
+                st.download_button(
+                    label="📥 Stáhnout dokument",
+                    data=document,
+                    file_name=output_filename,
+                    mime=FileManager.get_mime_type(settings["output_format"])
+                )
                     
             except Exception as e:
                 st.error(f"{AppConfig.MESSAGES['error']} Chyba při generování: {str(e)}")
 
+    @staticmethod
+    def render_bulk_generation(settings: Dict[str, Any]):
+        """Vykreslí sekci pro hromadné generování dokumentů ze záznamů JSONL"""
+        st.markdown("---")
+        st.header("📦 Hromadné generování")
+        
+        records_file = st.file_uploader(
+            "Nahrajte záznamy (JSONL)",
+            type=['jsonl'],
+            help="Např. výstup batch_extract.py - jeden záznam na řádek",
+            key="bulk_records"
+        )
+        
+        if not records_file:
+            return
+        
+        if not settings["selected_template"]:
+            st.error(f"{AppConfig.MESSAGES['error']} Nebyla vybrána šablona")
+            return
+        
+        if st.button("📦 Vygeneruj všechny dokumenty", type="primary"):
+            with st.spinner("Generuji dokumenty..."):
+                try:
+                    lines = records_file.getvalue().decode("utf-8").splitlines()
+                    # Jeden proces - pool procesů (fork) se ve vícevláknovém serveru Streamlit nespouští
+                    archive = io.BytesIO()
+                    count = render_zip(iter_records(lines), settings["selected_template"], archive, workers=1)
+                    
+                    st.success(f"{AppConfig.MESSAGES['success']} Vygenerováno {count} dokumentů")
+                    st.download_button(
+                        label="📥 Stáhnout archiv ZIP",
+                        data=archive.getvalue(),
+                        file_name=f"dokumenty_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                        mime="application/zip"
+                    )
+                except Exception as e:
+                    st.error(f"{AppConfig.MESSAGES['error']} Chyba při hromadném generování: {str(e)}")
+
 # =============================================================================
 # HLAVNÍ APLIKACE
 # =============================================================================
 
 def main():
     """Hlavní funkce aplikace"""
-    
-    # Konfigurace stránky
+    # Konfigurace stránky - musí být prvním voláním Streamlitu
     st.set_page_config(
         page_title="PDF Data Extractor",
         page_icon="📄",
         layout="wide"
     )
+    setup_logging()
     
     # Hlavní nadpis
     st.title("📄 PDF Data Extractor")
@@ -328,28 +530,36 @@ def main():
     settings = UIComponents.render_sidebar()
     
     # Vykreslení nahrání souboru
-    uploaded_file = UIComponents.render_file_upload()
+    uploaded_files = UIComponents.render_file_upload()
     
-    # Zpracování nahraného souboru
-    if uploaded_file:
+    # Zpracování nahraných souborů na pozadí - skript na extrakci nečeká
+    jobs = DataProcessor.sync_jobs(uploaded_files)
+    if jobs:
         st.markdown("---")
+        UIComponents.render_extraction_progress(jobs)
         
-        with st.spinner(f"{AppConfig.MESSAGES['loading']} Extrahuji data z PDF..."):
-            data = DataProcessor.process_uploaded_file(uploaded_file)
+        # Výsledky se zobrazují postupně, jak jednotlivé soubory doběhnou
+        done_jobs = [job for job in jobs if job.status == "done"]
+        if done_jobs:
+            st.markdown("---")
+            index = 0
+            if len(done_jobs) > 1:
+                index = st.selectbox(
+                    "Zobrazit výsledek souboru",
+                    range(len(done_jobs)),
+                    format_func=lambda i: done_jobs[i].name
+                )
+            job = done_jobs[index]
+            st.success(f"{AppConfig.MESSAGES['success']} Data úspěšně extrahována: {job.name}")
             
-            if data:
-                st.success(f"{AppConfig.MESSAGES['success']} Data úspěšně extrahována!")
-                
-                # Uložení dat pro main_fill.py
-                DataProcessor.save_data_to_json(data["personal_info"], "data.json")
-                
-                # Vykreslení výsledků
-                UIComponents.render_extraction_results(data)
-                
-                # Generování dokumentu
-                UIComponents.render_document_generation(settings, data)
-            else:
-                st.error(f"{AppConfig.MESSAGES['error']} Nepodařilo se extrahovat data")
+            # Vykreslení výsledků
+            UIComponents.render_extraction_results(job.data)
+            
+            # Generování dokumentu
+            UIComponents.render_document_generation(settings, job.data)
+    
+    # Hromadné generování
+    UIComponents.render_bulk_generation(settings)
     
     # Footer
     st.markdown("---")
@@ -0,0 +1,120 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Druhy uložených odpovědí
+RESULT_OK = "ok"
+RESULT_NOT_FOUND = "not_found"
+RESULT_ERROR = "error"
+
+DEFAULT_CACHE_PATH = "data/ares_cache.sqlite"
+
+
+class AresCache:
+    """Perzistentní SQLite cache odpovědí ARES sdílená mezi procesy"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        ttl: float = 7 * 24 * 3600,
+        not_found_ttl: float = 3600,
+        error_ttl: float = 60,
+    ):
+        self.path = path
+        self.ttls = {
+            RESULT_OK: ttl,
+            RESULT_NOT_FOUND: not_found_ttl,
+            RESULT_ERROR: error_ttl,
+        }
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS ares_cache (
+                    ico TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )"""
+            )
+
+    @classmethod
+    def from_env(cls) -> Optional["AresCache"]:
+        """Vytvoří cache podle proměnných prostředí (ARES_CACHE_PATH, ARES_CACHE_TTL, ...)"""
+        path = os.getenv("ARES_CACHE_PATH", DEFAULT_CACHE_PATH)
+        if not path or path.lower() in ("0", "off", "none"):
+            return None
+        return cls(
+            path,
+            ttl=float(os.getenv("ARES_CACHE_TTL", 7 * 24 * 3600)),
+            not_found_ttl=float(os.getenv("ARES_CACHE_NOT_FOUND_TTL", 3600)),
+            error_ttl=float(os.getenv("ARES_CACHE_ERROR_TTL", 60)),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Vrátí připojení pro aktuální vlákno"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, ico: str) -> Optional[Dict[str, str]]:
+        """Vrátí platný záznam z cache nebo None"""
+        entry = self.get_entry(ico)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, ico: str) -> Optional[Tuple[Dict[str, str], str]]:
+        """Vrátí platný záznam z cache spolu s druhem odpovědi nebo None"""
+        try:
+            row = self._connect().execute(
+                "SELECT data, kind, expires_at FROM ares_cache WHERE ico = ?", (ico,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Chyba při čtení ARES cache: {e}")
+            row = None
+
+        with self._lock:
+            if row is None or row[2] < time.time():
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0]), row[1]
+
+    def put(self, ico: str, company_info: Dict[str, str], kind: str = RESULT_OK):
+        """Uloží odpověď do cache s TTL podle druhu odpovědi"""
+        ttl = self.ttls.get(kind, 0)
+        if ttl <= 0:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ares_cache (ico, kind, data, expires_at) VALUES (?, ?, ?, ?)",
+                    (ico, kind, json.dumps(company_info, ensure_ascii=False), time.time() + ttl),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Chyba při zápisu do ARES cache: {e}")
+
+    def purge_expired(self) -> int:
+        """Smaže záznamy s prošlou platností a vrátí jejich počet"""
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM ares_cache WHERE expires_at < ?", (time.time(),))
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Vrátí počítadla zásahů a výpadků cache"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
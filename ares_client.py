@@ -0,0 +1,335 @@
+import logging
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
+
+from ares_cache import AresCache, RESULT_OK, RESULT_NOT_FOUND, RESULT_ERROR
+from ares_index import AresIndex
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://ares.gov.cz/ekonomicke-subjekty-v-be/rest"
+
+# HTTP stavy, po kterých má smysl dotaz zopakovat
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def empty_company_info(ico: str, status: str = "") -> Dict[str, str]:
+    """Vrátí prázdný záznam o firmě s daným stavem"""
+    return {
+        "ico": ico,
+        "firma_nazev": "",
+        "firma_sidlo": "",
+        "status": status,
+        "typ_subjektu": "",
+        "obor_podnikani": ""
+    }
+
+
+def is_error_info(company_info: Optional[Dict[str, str]]) -> bool:
+    """Je záznam o firmě výsledkem chyby dotazu (Chyba připojení, Chyba HTTP …)?
+
+    Takový záznam je jen dočasný a nemá se ukládat mimo cache ARES s krátkou platností.
+    """
+    return bool(company_info) and company_info.get("status", "").startswith("Chyba")
+
+
+def format_address(sidlo: Dict) -> str:
+    """Formátuje adresu sídla firmy"""
+    if not sidlo:
+        return ""
+
+    ulice = str(sidlo.get('ulice', ''))
+    cislo = str(sidlo.get('cisloDomovni', ''))
+    cast_obce = str(sidlo.get('castObce', ''))
+    obec = str(sidlo.get('obec', ''))
+    psc = str(sidlo.get('psc', ''))
+    textova_adresa = str(sidlo.get('textovaAdresa', ''))
+
+    if not ulice and textova_adresa:
+        # Použij textovou adresu a naformátuj PSČ
+        return re.sub(r"(\b\d{3})(\d{2}\b)", r"\1 \2", textova_adresa)
+
+    adresa_parts = []
+    if ulice:
+        adresa_parts.append(ulice)
+        if cislo:
+            adresa_parts.append(cislo)
+    elif cislo:
+        adresa_parts.append(cislo)
+
+    if psc:
+        if len(psc) == 5:
+            psc_fmt = f"{psc[:3]} {psc[3:]}"
+        else:
+            psc_fmt = psc
+        adresa_parts.append(psc_fmt)
+
+    if cast_obce:
+        adresa_parts.append(cast_obce)
+
+    if obec:
+        adresa_parts.append(obec)
+
+    return ", ".join(adresa_parts)
+
+
+def get_business_field(data: Dict) -> str:
+    """Extrahuje obor podnikání z ARES dat"""
+    if 'predmetPodnikani' in data and data['predmetPodnikani']:
+        obor = data['predmetPodnikani'][0] if isinstance(data['predmetPodnikani'], list) else data['predmetPodnikani']
+        return obor
+    return ""
+
+
+def company_info_from_ares(ico: str, data: Dict) -> Dict[str, str]:
+    """Převede odpověď ARES na záznam o firmě"""
+    return {
+        "ico": ico,
+        "firma_nazev": data.get('obchodniJmeno', ''),
+        "firma_sidlo": format_address(data.get('sidlo', {})),
+        "status": data.get('stav', ''),
+        "typ_subjektu": data.get('pravniForma', ''),
+        "obor_podnikani": get_business_field(data)
+    }
+
+
+class RateLimiter:
+    """Omezovač počtu dotazů za sekundu (token bucket).
+
+    Běžně platí pro jeden proces (všechna vlákna klienta). S shared=True je stav kbelíku
+    ve sdílené paměti - omezovač se vytvoří v hlavním procesu a předá pracovním procesům
+    poolu (initargs), takže limit platí pro všechny procesy dohromady.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None, shared: bool = False):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1, int(rate))
+        # [počet tokenů, čas poslední aktualizace]; time.monotonic() je společný všem procesům
+        if shared:
+            import multiprocessing
+
+            self._state = multiprocessing.Array("d", [float(self.capacity), time.monotonic()])
+            self._lock = self._state.get_lock()
+        else:
+            self._state = [float(self.capacity), time.monotonic()]
+            self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, shared: bool = False) -> "RateLimiter":
+        """Vytvoří omezovač podle proměnné prostředí ARES_RATE_LIMIT"""
+        return cls(float(os.getenv("ARES_RATE_LIMIT", 10)), shared=shared)
+
+    def acquire(self):
+        """Počká, dokud není k dispozici volný token"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens = min(self.capacity, self._state[0] + (now - self._state[1]) * self.rate)
+                self._state[1] = now
+                if tokens >= 1:
+                    self._state[0] = tokens - 1
+                    return
+                self._state[0] = tokens
+                wait = (1 - tokens) / self.rate
+            time.sleep(wait)
+
+
+class AresClient:
+    """Klient ARES API se sdíleným spojením, opakováním dotazů a slučováním souběžných dotazů.
+
+    Firmy se hledají nejdřív v lokálním rejstříku z otevřených dat (index), pak v cache
+    a teprve nakonec na síti. V režimu offline se na síť nechodí vůbec.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        cache: Optional[AresCache] = None,
+        timeout: float = 10,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30,
+        rate_limit: float = 10,
+        pool_size: int = 10,
+        max_workers: int = 8,
+        index: Optional[AresIndex] = None,
+        offline: bool = False,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.index = index
+        self.offline = offline
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.rate_limiter = RateLimiter(rate_limit)
+        self.pool_size = pool_size
+        self.max_workers = max_workers
+
+        self._session: Optional["requests.Session"] = None
+        self._session_lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "AresClient":
+        """Vytvoří klienta podle proměnných prostředí (ARES_BASE_URL, ARES_RATE_LIMIT, ...)"""
+        return cls(
+            base_url=os.getenv("ARES_BASE_URL", DEFAULT_BASE_URL),
+            cache=AresCache.from_env(),
+            timeout=float(os.getenv("ARES_TIMEOUT", 10)),
+            max_retries=int(os.getenv("ARES_MAX_RETRIES", 3)),
+            rate_limit=float(os.getenv("ARES_RATE_LIMIT", 10)),
+            index=AresIndex.from_env(),
+            offline=os.getenv("ARES_OFFLINE", "").lower() in ("1", "true", "yes"),
+        )
+
+    @property
+    def session(self) -> "requests.Session":
+        """HTTP session s keep-alive poolem spojení"""
+        if self._session is None:
+            # requests se načítá až s prvním dotazem - extrakce bez ARES ho nepotřebuje
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update({
+                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+                        'Accept': 'application/json'
+                    })
+                    self._session = session
+        return self._session
+
+    def close(self):
+        """Uzavře HTTP session"""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def get_company_info(self, ico: str) -> Dict[str, str]:
+        """Dohledá informace o firmě podle IČO"""
+        company_info, _ = self.lookup(ico)
+        return company_info
+
+    def lookup(self, ico: str) -> Tuple[Dict[str, str], str]:
+        """Dohledá firmu a vrátí záznam spolu s druhem odpovědi (ok / not_found / error)"""
+        if self.index is not None:
+            company_info = self.index.get(ico)
+            if company_info is not None:
+                return company_info, RESULT_OK
+        if self.cache is not None:
+            cached = self.cache.get_entry(ico)
+            if cached is not None:
+                return cached
+        if self.offline:
+            return empty_company_info(ico, "Nenalezeno"), RESULT_NOT_FOUND
+
+        # Souběžné dotazy na stejné IČO sloučíme do jednoho
+        with self._inflight_lock:
+            future = self._inflight.get(ico)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[ico] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._fetch(ico)
+            if self.cache is not None:
+                self.cache.put(ico, result[0], result[1])
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(ico, None)
+
+    def lookup_many(self, icos: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        """Dohledá více IČO souběžně"""
+        unique_icos = list(dict.fromkeys(icos))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = executor.map(self.get_company_info, unique_icos)
+            return dict(zip(unique_icos, results))
+
+    def _backoff_delay(self, attempt: int, response: Optional["requests.Response"] = None) -> float:
+        """Spočítá čekání před dalším pokusem (exponenciálně s náhodným rozptylem)"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(self.max_backoff, float(retry_after))
+        delay = self.backoff_factor * (2 ** attempt)
+        return min(self.max_backoff, delay * random.uniform(0.5, 1.5))
+
+    def _fetch(self, ico: str) -> Tuple[Dict[str, str], str]:
+        """Provede dotaz na ARES včetně opakování při 429/5xx a chybách spojení"""
+        import requests
+
+        url = f"{self.base_url}/ekonomicke-subjekty/{ico}"
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            self.rate_limiter.acquire()
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except requests.RequestException as e:
+                if last_attempt:
+                    logger.error(f"❌ Chyba při dohledávání firmy: {e}")
+                    return empty_company_info(ico, "Chyba připojení"), RESULT_ERROR
+                time.sleep(self._backoff_delay(attempt))
+                continue
+
+            if response.status_code == 200:
+                try:
+                    return company_info_from_ares(ico, response.json()), RESULT_OK
+                except ValueError as e:
+                    logger.error(f"❌ Neplatná odpověď ARES: {e}")
+                    return empty_company_info(ico, "Chyba připojení"), RESULT_ERROR
+
+            if response.status_code == 404:
+                logger.error(f"❌ Firma s IČO {ico} nebyla nalezena v ARES")
+                return empty_company_info(ico, "Nenalezeno"), RESULT_NOT_FOUND
+
+            if response.status_code in RETRY_STATUSES and not last_attempt:
+                delay = self._backoff_delay(attempt, response)
+                logger.warning(f"⚠️ ARES vrátil HTTP {response.status_code}, opakuji za {delay:.1f} s")
+                time.sleep(delay)
+                continue
+
+            logger.error(f"❌ Chyba při dotazu na ARES: HTTP {response.status_code}")
+            return empty_company_info(ico, f"Chyba HTTP {response.status_code}"), RESULT_ERROR
+
+        return empty_company_info(ico, "Chyba připojení"), RESULT_ERROR
+
+
+_default_client: Optional[AresClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> AresClient:
+    """Vrátí sdíleného klienta ARES pro aktuální proces"""
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = AresClient.from_env()
+    return _default_client
@@ -0,0 +1,302 @@
+import argparse
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lokální rejstřík firem z otevřených dat ARES (hromadné stažení).
+#
+#   python ares_index.py import res_data.csv.gz        CSV (i .gz/.zip), JSON pole nebo JSON Lines
+#   python ares_index.py lookup 27074358
+#
+# Klient ARES hledá nejdřív v tomto rejstříku, pak v cache a teprve nakonec na síti.
+
+DEFAULT_INDEX_PATH = "data/ares_index.sqlite"
+
+# Sloupce rejstříku = klíče záznamu o firmě (kromě IČO)
+INDEX_COLUMNS = ("firma_nazev", "firma_sidlo", "status", "typ_subjektu", "obor_podnikani")
+
+# Názvy sloupců v CSV, ze kterých se berou hodnoty (porovnává se bez ohledu na velikost písmen)
+CSV_COLUMN_NAMES = {
+    "ico": ("ico", "ičo", "ic"),
+    "firma_nazev": ("obchodnijmeno", "firma", "nazev", "název"),
+    "firma_sidlo": ("textovaadresa", "textadr", "sidlo", "sídlo", "adresa"),
+    "status": ("stav", "stavsubjektu", "status"),
+    "typ_subjektu": ("pravniforma", "forma", "pravni_forma"),
+    "obor_podnikani": ("predmetpodnikani", "nace", "obor"),
+}
+
+IMPORT_BATCH_SIZE = 10000
+
+
+def normalize_ico(value: str) -> str:
+    """IČO jako osm číslic (zdroje ho někdy uvádějí bez úvodních nul)"""
+    digits = "".join(ch for ch in str(value) if ch.isdigit())
+    return digits.zfill(8) if digits else ""
+
+
+class AresIndex:
+    """Rejstřík firem v SQLite jen pro čtení - dotaz podle IČO trvá desítky mikrosekund"""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        if not Path(path).exists():
+            raise FileNotFoundError(f"Rejstřík ARES {path} neexistuje (vytvořte ho: python ares_index.py import ...)")
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @classmethod
+    def from_env(cls) -> Optional["AresIndex"]:
+        """Otevře rejstřík podle ARES_INDEX_PATH, pokud existuje"""
+        path = os.getenv("ARES_INDEX_PATH", DEFAULT_INDEX_PATH)
+        if not path or path.lower() in ("0", "off", "none") or not Path(path).exists():
+            return None
+        return cls(path)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Vrátí připojení pro aktuální vlákno"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    def get(self, ico: str) -> Optional[Dict[str, str]]:
+        """Vrátí záznam o firmě ve stejném tvaru jako klient ARES, nebo None"""
+        try:
+            row = self._connect().execute(
+                f"SELECT {', '.join(INDEX_COLUMNS)} FROM companies WHERE ico = ?", (normalize_ico(ico),)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Chyba při čtení rejstříku ARES: {e}")
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        company_info = {"ico": ico}
+        company_info.update(zip(INDEX_COLUMNS, row))
+        return company_info
+
+    def metadata(self) -> Dict[str, str]:
+        """Údaje o importu (zdroj, čas, počet záznamů)"""
+        return dict(self._connect().execute("SELECT key, value FROM meta"))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+def _open_text(path: str, encoding: Optional[str] = None) -> IO[str]:
+    """Otevře textový soubor, případně zkomprimovaný (.gz) nebo první soubor v archivu .zip"""
+    if path.endswith(".gz"):
+        raw = gzip.open(path, "rb")
+    elif path.endswith(".zip"):
+        archive = zipfile.ZipFile(path)
+        raw = archive.open(archive.namelist()[0])
+    else:
+        raw = open(path, "rb")
+    if encoding is None:
+        # Česká otevřená data bývají v UTF-8 nebo ve Windows-1250
+        head = raw.peek(64 * 1024)[:64 * 1024]
+        try:
+            head.decode("utf-8")
+            encoding = "utf-8-sig"
+        except UnicodeDecodeError as e:
+            # Konec ukázky může useknout vícebajtový znak
+            encoding = "utf-8-sig" if e.start >= len(head) - 3 else "cp1250"
+    return io.TextIOWrapper(raw, encoding=encoding, newline="")
+
+
+def iter_csv_records(f: IO[str], column_map: Optional[Dict[str, str]] = None) -> Iterator[Tuple[str, ...]]:
+    """Řádky rejstříku (ico, *INDEX_COLUMNS) z CSV s automaticky rozpoznaným oddělovačem"""
+    sample = f.read(64 * 1024)
+    f.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(f, dialect)
+    header = [name.strip().lower() for name in next(reader)]
+
+    indexes = {}
+    for key, names in CSV_COLUMN_NAMES.items():
+        wanted = (column_map[key].lower(),) if column_map and key in column_map else names
+        indexes[key] = next((header.index(name) for name in wanted if name in header), None)
+    if indexes["ico"] is None:
+        raise ValueError(f"CSV neobsahuje sloupec s IČO (hlavička: {', '.join(header)})")
+
+    for row in reader:
+        if len(row) <= indexes["ico"]:
+            continue
+        ico = normalize_ico(row[indexes["ico"]])
+        if not ico:
+            continue
+        yield (ico,) + tuple(
+            row[indexes[key]].strip() if indexes[key] is not None and indexes[key] < len(row) else ""
+            for key in INDEX_COLUMNS
+        )
+
+
+def _iter_json_objects(f: IO[str]) -> Iterator[Dict]:
+    """Objekty z JSON pole (čte se postupně), JSON Lines nebo objektu se seznamem subjektů"""
+    decoder = json.JSONDecoder()
+    buffer = f.read(1024 * 1024).lstrip()
+    if buffer.startswith("["):
+        position = 1
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if buffer.startswith("]", position):
+                return
+            try:
+                obj, position = decoder.raw_decode(buffer, position)
+            except ValueError:
+                chunk = f.read(1024 * 1024)
+                if not chunk:
+                    raise
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            yield obj
+
+    # Dočte rozdělený poslední řádek, aby se JSON Lines daly číst dál po řádcích
+    buffer += f.readline()
+    first_line, _, rest = buffer.partition("\n")
+    try:
+        yield json.loads(first_line)
+    except ValueError:
+        # Jeden objekt přes více řádků - např. odpověď vyhledávání {"ekonomickeSubjekty": [...]}
+        data = json.loads(buffer + f.read())
+        yield from data.get("ekonomickeSubjekty") or data.get("subjekty") or [data]
+        return
+    for line in io.StringIO(rest):
+        if line.strip():
+            yield json.loads(line)
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_json_records(f: IO[str]) -> Iterator[Tuple[str, ...]]:
+    """Řádky rejstříku ze záznamů ve tvaru odpovědi ARES API (obchodniJmeno, sidlo, ...)"""
+    # Import až zde - ares_client importuje tento modul
+    from ares_client import company_info_from_ares
+
+    for obj in _iter_json_objects(f):
+        ico = normalize_ico(obj.get("ico", ""))
+        if not ico:
+            continue
+        company_info = company_info_from_ares(ico, obj)
+        yield (ico,) + tuple(str(company_info.get(key) or "") for key in INDEX_COLUMNS)
+
+
+def build_index(
+    sources: List[str],
+    path: str = DEFAULT_INDEX_PATH,
+    file_format: Optional[str] = None,
+    column_map: Optional[Dict[str, str]] = None,
+    encoding: Optional[str] = None,
+) -> int:
+    """Naimportuje zdroje do nového rejstříku a vrátí počet firem.
+
+    Rejstřík se staví do dočasného souboru a nakonec atomicky nahradí původní,
+    takže běžící procesy během importu dál čtou starou verzi.
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    Path(tmp_path).unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(
+            f"""CREATE TABLE companies (
+                ico TEXT PRIMARY KEY,
+                {', '.join(f'{column} TEXT NOT NULL' for column in INDEX_COLUMNS)}
+            ) WITHOUT ROWID"""
+        )
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        insert = f"INSERT OR REPLACE INTO companies VALUES ({', '.join('?' * (len(INDEX_COLUMNS) + 1))})"
+
+        for source in sources:
+            kind = file_format or ("json" if ".json" in source.lower() else "csv")
+            with _open_text(source, encoding) as f:
+                records = iter_json_records(f) if kind == "json" else iter_csv_records(f, column_map)
+                batch = []
+                for record in records:
+                    batch.append(record)
+                    if len(batch) >= IMPORT_BATCH_SIZE:
+                        conn.executemany(insert, batch)
+                        batch = []
+                conn.executemany(insert, batch)
+            logger.info(f"✅ Naimportováno: {source}")
+
+        count = conn.execute("SELECT COUNT(*) FROM companies").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?)",
+            [("sources", ", ".join(sources)), ("imported_at", str(time.time())), ("count", str(count))],
+        )
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Lokální rejstřík firem z otevřených dat ARES")
+    parser.add_argument("--index", default=os.getenv("ARES_INDEX_PATH", DEFAULT_INDEX_PATH), help="SQLite soubor rejstříku")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="Vytvořit rejstřík z hromadných dat (CSV nebo JSON)")
+    import_parser.add_argument("sources", nargs="+", help="Soubory .csv/.json/.jsonl, i komprimované .gz/.zip")
+    import_parser.add_argument("--format", choices=("csv", "json"), default=None, help="Formát (výchozí podle přípony)")
+    import_parser.add_argument("--encoding", default=None, help="Kódování (výchozí: UTF-8, jinak Windows-1250)")
+    import_parser.add_argument(
+        "--column", action="append", default=[], metavar="KLÍČ=SLOUPEC",
+        help="Sloupec CSV pro klíč, např. firma_nazev=OBCHODNI_FIRMA (lze opakovat)",
+    )
+
+    lookup_parser = commands.add_parser("lookup", help="Vyhledat firmy podle IČO")
+    lookup_parser.add_argument("icos", nargs="+")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        column_map = dict(item.split("=", 1) for item in args.column)
+        started = time.perf_counter()
+        count = build_index(args.sources, args.index, args.format, column_map, args.encoding)
+        size = Path(args.index).stat().st_size
+        print(f"✅ Naimportováno {count} firem za {time.perf_counter() - started:.1f} s")
+        print(f"💾 Rejstřík {args.index}: {size / (1024 * 1024):.1f} MB")
+        return 0
+
+    index = AresIndex(args.index)
+    for ico in args.icos:
+        company_info = index.get(ico)
+        if company_info is None:
+            print(f"❌ {ico}: nenalezeno")
+        else:
+            print(json.dumps(company_info, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+# Lokální náhrada ARES API pro testování klienta a benchmarky.
+# Odpovídá na GET /ekonomicke-subjekty/<ico>; IČO končící na "0" vrací 404.
+
+ICO_PATH = re.compile(r"/ekonomicke-subjekty/([0-9]{8})$")
+
+
+def fake_subject(ico: str) -> Dict:
+    """Vygeneruje deterministickou odpověď ARES pro dané IČO"""
+    return {
+        "ico": ico,
+        "obchodniJmeno": f"Testovací firma {ico} s.r.o.",
+        "sidlo": {
+            "ulice": "Václavské náměstí",
+            "cisloDomovni": int(ico[-3:]) + 1,
+            "psc": 11000,
+            "obec": "Praha",
+            "castObce": "Nové Město",
+        },
+        "stav": "AKTIVNI",
+        "pravniForma": "112",
+        "predmetPodnikani": ["Výroba, obchod a služby neuvedené v přílohách 1 až 3 živnostenského zákona"],
+    }
+
+
+class AresStubServer(ThreadingHTTPServer):
+    """HTTP server s nastavitelnou latencí a chybovostí"""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.0, error_rate: float = 0.0, data: Optional[Dict[str, Dict]] = None):
+        super().__init__(address, AresStubHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.data = data or {}
+        self.request_count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class AresStubHandler(BaseHTTPRequestHandler):
+    """Obsluha dotazů na lokální ARES"""
+
+    server: AresStubServer
+
+    def do_GET(self):
+        with self.server._lock:
+            self.server.request_count += 1
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        match = ICO_PATH.search(self.path)
+        if not match:
+            self._send(400, {"kod": "CHYBA_VSTUPU"})
+            return
+
+        if self.server.error_rate and random.random() < self.server.error_rate:
+            self._send(random.choice((429, 503)), {"kod": "PREKROCEN_LIMIT"}, {"Retry-After": "0"})
+            return
+
+        ico = match.group(1)
+        if ico in self.server.data:
+            self._send(200, self.server.data[ico])
+        elif ico.endswith("0"):
+            self._send(404, {"kod": "NENALEZENO"})
+        else:
+            self._send(200, fake_subject(ico))
+
+    def _send(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port: int = 0, latency: float = 0.0, error_rate: float = 0.0) -> AresStubServer:
+    """Spustí stub server na pozadí a vrátí ho (port 0 = libovolný volný port)"""
+    server = AresStubServer(("127.0.0.1", port), latency=latency, error_rate=error_rate)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lokální náhrada ARES API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Umělá latence odpovědi v sekundách")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Podíl odpovědí 429/503 (0-1)")
+    args = parser.parse_args()
+
+    server = AresStubServer(("127.0.0.1", args.port), latency=args.latency, error_rate=args.error_rate)
+    print(f"🚀 ARES stub běží na {server.base_url} (ARES_BASE_URL={server.base_url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
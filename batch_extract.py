@@ -0,0 +1,257 @@
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import replace
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from ares_cache import AresCache
+from ares_client import AresClient, RateLimiter
+from main_extract_new import ExtractedData, ExtractionOptions, PDFExtractor
+from acroform import load_mapping
+from layout_extractor import FormLayout
+from metrics import DocumentMetrics, MetricsRegistry, configure_logging
+from ocr import DEFAULT_LANG, limit_tesseract_threads
+from result_cache import DiskLRUCache, ExtractionResultCache
+
+# Klient ARES sdílený v rámci pracovního procesu
+_ares_client: Optional[AresClient] = None
+_options: Optional[ExtractionOptions] = None
+_result_cache: Optional[ExtractionResultCache] = None
+_quiet = False
+
+
+def collect_pdf_files(inputs: Iterable[str], pattern: str = "*.pdf", recursive: bool = False) -> List[str]:
+    """Sestaví seznam PDF souborů ze zadaných cest (soubory, složky nebo seznamy souborů)"""
+    files = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            matches = path.rglob(pattern) if recursive else path.glob(pattern)
+            files.extend(str(p) for p in sorted(matches) if p.is_file())
+        elif path.suffix.lower() in (".txt", ".lst"):
+            # Textový seznam souborů - jedna cesta na řádek
+            with open(path, "r", encoding="utf-8") as f:
+                files.extend(line.strip() for line in f if line.strip())
+        else:
+            files.append(str(path))
+    return files
+
+
+def _init_worker(
+    quiet: bool,
+    ares_cache_path: Optional[str] = None,
+    options: Optional[ExtractionOptions] = None,
+    result_cache_dir: Optional[str] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+):
+    """Inicializace pracovního procesu"""
+    global _ares_client, _options, _result_cache, _quiet
+    _options = options
+    _quiet = quiet
+    _result_cache = ExtractionResultCache(DiskLRUCache(result_cache_dir)) if result_cache_dir else None
+    _ares_client = AresClient.from_env()
+    _ares_client.cache = AresCache(ares_cache_path) if ares_cache_path else None
+    if rate_limiter is not None:
+        _ares_client.rate_limiter = rate_limiter
+    if quiet:
+        # Průběžné zprávy potlačíme, varování a chyby zůstanou
+        logging.getLogger().setLevel(logging.WARNING)
+
+
+def _extract(source, metrics: Optional[DocumentMetrics] = None) -> ExtractedData:
+    """Spustí extrakci jednoho dokumentu s nastavením pracovního procesu"""
+    extractor = PDFExtractor(source, ares_client=_ares_client, options=_options, metrics=metrics)
+    if not _quiet:
+        return extractor.extract_all_data()
+    # Výpisy extrakce na stdout se potlačí jen po dobu zpracování dokumentu
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        return extractor.extract_all_data()
+
+
+def extract_one(pdf_file: str) -> Dict[str, Any]:
+    """Zpracuje jeden PDF soubor a vrátí záznam pro JSONL výstup"""
+    started = time.perf_counter()
+    metrics = DocumentMetrics(source=pdf_file)
+    try:
+        if _result_cache is not None:
+            with open(pdf_file, "rb") as f:
+                pdf_bytes = f.read()
+            extracted_data = _result_cache.get_or_extract(pdf_bytes, lambda data: _extract(data, metrics), _options)
+            if not metrics.status:
+                metrics.status = "cached"
+        else:
+            extracted_data = _extract(pdf_file, metrics)
+        if not extracted_data.raw_text:
+            raise ValueError(metrics.error or "Nepodařilo se extrahovat text z PDF")
+        return {
+            "file": pdf_file,
+            "ok": True,
+            "form": extracted_data.form,
+            "personal_info": extracted_data.personal_info,
+            "company_info": extracted_data.company_info,
+            "table_data": extracted_data.table_data,
+            "validation": extracted_data.validation,
+            "duration_s": round(time.perf_counter() - started, 3),
+            "metrics": metrics.to_dict(),
+        }
+    except Exception as e:
+        if metrics.status != "rejected":
+            metrics.status = "error"
+        metrics.error = metrics.error or f"{type(e).__name__}: {e}"
+        return {
+            "file": pdf_file,
+            "ok": False,
+            "error": f"{type(e).__name__}: {e}",
+            "duration_s": round(time.perf_counter() - started, 3),
+            "metrics": metrics.to_dict(),
+        }
+
+
+def run_batch(
+    pdf_files: List[str],
+    workers: Optional[int] = None,
+    quiet: bool = True,
+    ares_cache_path: Optional[str] = None,
+    options: Optional[ExtractionOptions] = None,
+    result_cache_dir: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Zpracuje soubory v poolu procesů a průběžně vrací záznamy v pořadí dokončení"""
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        _init_worker(False, ares_cache_path, options, result_cache_dir)
+        for pdf_file in pdf_files:
+            yield extract_one(pdf_file)
+        return
+
+    # Procesy poolu nesmí spouštět další procesy - OCR běží přímo v nich, po jednom vlákně Tesseractu
+    options = replace(options or ExtractionOptions(), ocr_workers=0)
+    limit_tesseract_threads()
+    # ARES_RATE_LIMIT platí pro celou dávku, ne pro každý proces zvlášť
+    rate_limiter = RateLimiter.from_env(shared=True)
+    initargs = (quiet, ares_cache_path, options, result_cache_dir, rate_limiter)
+    with Pool(processes=workers, initializer=_init_worker, initargs=initargs) as pool:
+        for record in pool.imap_unordered(extract_one, pdf_files, chunksize=1):
+            yield record
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Hromadná extrakce dat z PDF do JSONL"""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Hromadná extrakce dat z PDF formulářů do JSONL")
+    parser.add_argument("inputs", nargs="+", help="PDF soubory, složky nebo .txt seznamy souborů")
+    parser.add_argument("-o", "--output", default="data.jsonl", help="Výstupní JSONL soubor (výchozí: data.jsonl)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Počet pracovních procesů (výchozí: počet CPU)")
+    parser.add_argument("--pattern", default="*.pdf", help="Maska souborů při procházení složek (výchozí: *.pdf)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Procházet složky rekurzivně")
+    parser.add_argument(
+        "--ares-cache",
+        default=os.getenv("ARES_CACHE_PATH", "data/ares_cache.sqlite"),
+        help="SQLite cache pro ARES (výchozí: $ARES_CACHE_PATH nebo data/ares_cache.sqlite, prázdné = vypnuto)",
+    )
+    parser.add_argument("--result-cache", default=None, help="Složka cache výsledků podle obsahu PDF (výchozí: vypnuto)")
+    parser.add_argument("--lazy", action="store_true", help="Zpracovávat stránky postupně a skončit po nalezení všech polí")
+    parser.add_argument("--max-pages", type=int, default=None, help="Maximální počet zpracovaných stránek dokumentu")
+    parser.add_argument("--bounded-memory", action="store_true", help="Omezená paměť: text velkých dokumentů se drží v dočasném souboru")
+    parser.add_argument("--max-text-mb", type=float, default=None, help="Maximální velikost extrahovaného textu dokumentu v MB")
+    parser.add_argument("--page-hints", default=None, help="JSON soubor {název pole: [čísla stránek]} pro postupnou extrakci")
+    parser.add_argument("--layout", default=None, help="Rozložení formuláře z layout_extractor.py - čte jen oblasti polí")
+    parser.add_argument("--identify-form", action="store_true", help="Rozpoznat verzi formuláře a neznámé dokumenty odmítnout")
+    parser.add_argument(
+        "--backend",
+        default="auto",
+        help="Backend pro extrakci textu: auto, pdfium, pypdf, pdfplumber nebo seznam oddělený čárkou (výchozí: auto)",
+    )
+    parser.add_argument("--acroform-mapping", default=None, help="JSON {název pole AcroForm: klíč osobních údajů}")
+    parser.add_argument("--no-acroform", action="store_true", help="Nečíst hodnoty z polí interaktivních PDF")
+    parser.add_argument("--no-ocr", action="store_true", help="Nerozpoznávat stránky bez textové vrstvy přes OCR")
+    parser.add_argument("--ocr-lang", default=DEFAULT_LANG, help=f"Jazyk Tesseractu pro OCR (výchozí: {DEFAULT_LANG})")
+    parser.add_argument("--columnar-out", default=None, help="Průběžně zapisovat výsledky i do tabulky .parquet/.arrow")
+    parser.add_argument("--metrics-out", default=None, help="Soubor pro souhrnné metriky v textovém formátu Prometheu")
+    parser.add_argument("--log-json", action="store_true", help="Strukturované JSON logy s korelačním ID dokumentu")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Nepotlačovat výpisy pracovních procesů")
+    args = parser.parse_args(argv)
+
+    configure_logging(json_format=args.log_json or None)
+
+    page_hints = None
+    if args.page_hints:
+        with open(args.page_hints, "r", encoding="utf-8") as f:
+            page_hints = json.load(f)
+    layout = FormLayout.load(args.layout) if args.layout else None
+    options = ExtractionOptions(
+        lazy=args.lazy,
+        max_pages=args.max_pages,
+        page_hints=page_hints,
+        bounded_memory=args.bounded_memory,
+        max_text_bytes=int(args.max_text_mb * 1024 * 1024) if args.max_text_mb else None,
+        layout=layout,
+        identify_form=args.identify_form,
+        backend=args.backend,
+        acroform=not args.no_acroform,
+        acroform_mapping=load_mapping(args.acroform_mapping) if args.acroform_mapping else None,
+        ocr=not args.no_ocr,
+        ocr_lang=args.ocr_lang,
+    )
+
+    pdf_files = collect_pdf_files(args.inputs, args.pattern, args.recursive)
+    if not pdf_files:
+        print("❌ Nebyly nalezeny žádné PDF soubory")
+        return 1
+
+    print(f"🔄 Zpracovávám {len(pdf_files)} souborů...")
+    started = time.perf_counter()
+    ok_count = 0
+    error_count = 0
+    registry = MetricsRegistry()
+    exporter = None
+    if args.columnar_out:
+        # pandas a pyarrow se načítají jen pro tabulkový export
+        from export_columnar import ColumnarExporter
+
+        exporter = ColumnarExporter(args.columnar_out)
+
+    with open(args.output, "w", encoding="utf-8") as out:
+        records = run_batch(
+            pdf_files,
+            args.workers,
+            quiet=not args.verbose,
+            ares_cache_path=args.ares_cache,
+            options=options,
+            result_cache_dir=args.result_cache,
+        )
+        for record in records:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            registry.record_document(DocumentMetrics.from_dict(record["metrics"]))
+            if record["ok"]:
+                ok_count += 1
+                if exporter is not None:
+                    exporter.add(record)
+            else:
+                error_count += 1
+                print(f"❌ {record['file']}: {record['error']}")
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Hotovo: {ok_count} úspěšně, {error_count} chyb za {elapsed:.1f} s")
+    print(f"💾 Výsledky uloženy do {args.output}")
+    if exporter is not None:
+        exporter.close()
+        print(f"💾 Tabulka uložena do {args.columnar_out}")
+    if args.metrics_out:
+        registry.write_prometheus(args.metrics_out)
+        print(f"📈 Metriky uloženy do {args.metrics_out}")
+    return 0 if error_count == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
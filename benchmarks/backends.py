@@ -0,0 +1,98 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from field_definitions import DEFAULT_MATCHER
+from pdf_backends import BACKENDS, available_backends
+
+# Porovnání backendů pro extrakci textu: rychlost a přesnost nalezených polí.
+# Spuštění: python -m benchmarks.backends [PDF ...] [--docs 5 --attachments 0 10]
+# Bez zadaných PDF se použijí syntetické žádosti s očekávanými hodnotami, u zadaných PDF
+# se přesnost měří proti výstupu pdfplumberu (referenční backend).
+
+
+def read_text(backend_name: str, pdf_path: str) -> Tuple[str, int]:
+    """Přečte celý text dokumentu a vrátí ho spolu s počtem stránek"""
+    backend = BACKENDS[backend_name]()
+    parts = []
+    pages = 0
+    for page_text in backend.iter_pages(pdf_path):
+        pages += 1
+        if page_text:
+            parts.append(page_text + "\n")
+    return "".join(parts), pages
+
+
+def field_accuracy(values: Dict[str, str], expected: Dict[str, str]) -> float:
+    """Podíl očekávaných hodnot, které backend vrátil přesně"""
+    if not expected:
+        return 1.0 if not values else 0.0
+    return sum(1 for key, value in expected.items() if values.get(key) == value) / len(expected)
+
+
+def synthetic_documents(work_dir: str, docs: int, attachments: List[int], font: Optional[str], seed: int):
+    """Vygeneruje syntetické žádosti a vrátí seznam (cesta, očekávané hodnoty)"""
+    from benchmarks.synthetic_pdf import expected_fields, generate_application_pdf, random_record
+
+    rng = random.Random(seed)
+    documents = []
+    for attachment_pages in attachments:
+        for doc in range(docs):
+            record = random_record(rng)
+            path = os.path.join(work_dir, f"zadost_{attachment_pages}p_{doc}.pdf")
+            generate_application_pdf(path, record, 1, attachment_pages, font, seed=doc)
+            documents.append((path, expected_fields(record)))
+    return documents
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Porovnání backendů pro extrakci textu z PDF")
+    parser.add_argument("pdfs", nargs="*", help="Vlastní PDF (výchozí: syntetické žádosti)")
+    parser.add_argument("--backend", action="append", help="Porovnat jen vybrané backendy (lze opakovat)")
+    parser.add_argument("--docs", type=int, default=5, help="Počet syntetických dokumentů na velikost příloh")
+    parser.add_argument("--attachments", type=int, nargs="+", default=[0, 10], help="Počty stránek příloh")
+    parser.add_argument("--repeat", type=int, default=1, help="Počet opakování čtení každého dokumentu")
+    parser.add_argument("--font", default=None, help="TTF font s českou diakritikou pro syntetické PDF")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    backends = args.backend or available_backends()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        if args.pdfs:
+            documents = []
+            for path in args.pdfs:
+                reference, _ = read_text("pdfplumber", path)
+                documents.append((path, DEFAULT_MATCHER.extract(reference)))
+        else:
+            documents = synthetic_documents(work_dir, args.docs, args.attachments, args.font, args.seed)
+
+        print(f"📊 {len(documents)} dokumentů, backendy: {', '.join(backends)}")
+        for backend_name in backends:
+            durations = []
+            total_pages = 0
+            accuracy = []
+            for path, expected in documents:
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    text, pages = read_text(backend_name, path)
+                    durations.append(time.perf_counter() - started)
+                total_pages += pages
+                accuracy.append(field_accuracy(DEFAULT_MATCHER.extract(text), expected))
+
+            elapsed = sum(durations) / args.repeat
+            print(
+                f"   {backend_name:>10}: {total_pages / elapsed:8.1f} stránek/s | "
+                f"medián {statistics.median(durations) * 1000:8.1f} ms/dokument | "
+                f"přesnost polí {statistics.fmean(accuracy):.1%}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import argparse
+import re
+import time
+from typing import Callable, Dict
+
+from field_definitions import DEFAULT_MATCHER, FIELD_DEFINITIONS
+
+# Mikrobenchmark: původní per-pole re.search nad celým textem vs. FieldMatcher
+# Spuštění: python -m benchmarks.field_matcher --attachment-kb 500
+
+FORM_TEXT = """I. Osobní údaje žadatele
+Příjmení/Jméno Novák Jan
+Rodné číslo/Datum narození 9001011236 1.1.1990
+Místo narození: město/stát Brno CZ
+Pohlaví/Státní občanství muž česká
+Telefon/E-mail 777 123 456 jan.novak@example.cz
+IČO zaměstnavatele nebo OSVČ 27074358
+Čistý příjem 45.000,50
+Měsíční životní náklady (Kč) 12.500
+Datum nástupu do zaměstnání nebo zahájení podnikání 01.02.2015
+Nejvyšší dosažené vzdělání 4 vysokoškolské
+Povolání/Ekonomický sektor Programátor, IT
+"""
+
+ATTACHMENT_LINE = "Příloha č. 3 - výpis z účtu 12.345,00 Kč ze dne 01.01.2024 poznámka k platbě\n"
+
+
+def legacy_extract(text: str) -> Dict[str, str]:
+    """Původní postup: samostatný re.search pro každé pole přes celý text"""
+    values = {}
+    for definition in FIELD_DEFINITIONS.values():
+        match = re.search(definition.pattern, text)
+        if match:
+            values.update(zip(definition.keys, definition.processor(match)))
+    return values
+
+
+def build_text(attachment_kb: int, missing_fields: bool) -> str:
+    """Sestaví text formuláře s přílohou dané velikosti"""
+    form_text = FORM_TEXT
+    if missing_fields:
+        # Chybějící pole nutí původní postup projít celý text
+        form_text = "\n".join(line for line in FORM_TEXT.splitlines() if not line.startswith(("IČO", "Čistý")))
+    attachment = ATTACHMENT_LINE * max(1, attachment_kb * 1024 // len(ATTACHMENT_LINE.encode("utf-8")))
+    return form_text + attachment
+
+
+def measure(func: Callable[[str], Dict[str, str]], text: str, repeat: int) -> float:
+    """Vrátí průměrnou dobu jednoho volání v milisekundách"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(text)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mikrobenchmark extrakce polí")
+    parser.add_argument("--attachment-kb", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for missing_fields in (False, True):
+        for size in args.attachment_kb:
+            text = build_text(size, missing_fields)
+            assert legacy_extract(text) == DEFAULT_MATCHER.extract(text), "Výsledky se liší"
+            legacy_ms = measure(legacy_extract, text, args.repeat)
+            matcher_ms = measure(DEFAULT_MATCHER.extract, text, args.repeat)
+            label = "chybějící pole" if missing_fields else "všechna pole"
+            print(
+                f"{size:>6} kB ({label:>14}): původní {legacy_ms:8.3f} ms | "
+                f"FieldMatcher {matcher_ms:8.3f} ms | zrychlení {legacy_ms / matcher_ms:6.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
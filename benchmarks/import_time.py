@@ -0,0 +1,123 @@
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Set, Tuple
+
+# Kontrola doby importu hlavních modulů (studený start pracovních procesů a aplikace).
+# Každý modul se importuje v novém interpretu s python -X importtime; kontroluje se
+# medián kumulativní doby importu proti rozpočtu a to, že se nenačítají těžké knihovny,
+# které mají být až při použití.
+# Spuštění: python -m benchmarks.import_time [--repeat 5] [--scale 2]
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Knihovny, které se mají načítat až při použití (DataFrame, ARES, záložní backend, export)
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "requests", "urllib3", "pdfplumber", "pdfminer", "dotenv")
+
+# Modul: (rozpočet v ms, zakázané knihovny)
+BUDGETS: Dict[str, Tuple[float, Tuple[str, ...]]] = {
+    "main_extract_new": (150, HEAVY_MODULES),
+    "batch_extract": (200, HEAVY_MODULES),
+    "pdf_backends": (30, HEAVY_MODULES),
+    "ares_client": (80, HEAVY_MODULES),
+    "validation": (40, HEAVY_MODULES),
+    # Studený start aplikace - streamlit sám o sobě, ale bez pandas a knihoven pro PDF
+    "app_new": (1000, ("pandas", "numpy", "pyarrow", "pdfplumber", "pdfminer")),
+}
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def parse_importtime(output: str, module: str) -> Tuple[float, Set[str]]:
+    """Kumulativní doba importu modulu v ms a moduly načtené v rámci jeho importu.
+
+    Výpis -X importtime uvádí vnořené importy před nadřazeným modulem s větším odsazením,
+    takže import modulu tvoří souvislý blok řádků končící řádkem modulu.
+    """
+    entries = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if match:
+            entries.append((int(match.group(2)), len(match.group(3)), match.group(4)))
+
+    for index in range(len(entries) - 1, -1, -1):
+        cumulative_us, depth, name = entries[index]
+        if name == module:
+            break
+    else:
+        raise ValueError(f"Import modulu {module} není ve výpisu -X importtime")
+
+    loaded = set()
+    for _, child_depth, name in reversed(entries[:index]):
+        if child_depth <= depth:
+            break
+        loaded.add(name)
+    return cumulative_us / 1000, loaded
+
+
+def measure_import(module: str) -> Tuple[float, Set[str]]:
+    """Naimportuje modul v novém interpretu a vrátí dobu importu a načtené moduly"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.getenv("PYTHONPATH")])))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import modulu {module} selhal:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr, module)
+
+
+def forbidden_imports(loaded: Set[str], forbidden: Tuple[str, ...]) -> List[str]:
+    """Zakázané knihovny, které se načetly (podle nejvyššího balíčku)"""
+    return sorted({name.split(".")[0] for name in loaded} & set(forbidden))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Kontrola doby importu hlavních modulů")
+    parser.add_argument("modules", nargs="*", help="Měřené moduly (výchozí: všechny s rozpočtem; ostatní se jen změří)")
+    parser.add_argument("--repeat", type=int, default=5, help="Počet měření každého modulu (medián)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Násobek rozpočtů pro pomalejší stroje")
+    args = parser.parse_args(argv)
+
+    # Předkompilované .pyc, aby se neměřil první překlad zdrojových souborů
+    subprocess.run([sys.executable, "-m", "compileall", "-q", REPO_ROOT], check=False)
+
+    failures = []
+    for module in args.modules or BUDGETS:
+        budget_ms, forbidden = BUDGETS.get(module, (float("inf"), ()))
+        budget_ms *= args.scale
+        samples = []
+        loaded: Set[str] = set()
+        for _ in range(args.repeat):
+            elapsed_ms, loaded = measure_import(module)
+            samples.append(elapsed_ms)
+        median_ms = statistics.median(samples)
+        heavy = forbidden_imports(loaded, forbidden)
+
+        ok = median_ms <= budget_ms and not heavy
+        budget = f"rozpočet {budget_ms:.0f} ms" if module in BUDGETS else "bez rozpočtu"
+        print(
+            f"{'✅' if ok else '❌'} {module:<18} {median_ms:7.1f} ms ({budget}, "
+            f"min {min(samples):.1f} ms, {len(loaded)} modulů)"
+        )
+        if median_ms > budget_ms:
+            failures.append(f"{module}: {median_ms:.1f} ms > {budget_ms:.0f} ms")
+        if heavy:
+            failures.append(f"{module}: při importu se načítá {', '.join(heavy)}")
+
+    if failures:
+        print("\n❌ Překročen rozpočet importu:")
+        for failure in failures:
+            print(f"   {failure}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
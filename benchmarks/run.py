@@ -0,0 +1,194 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import pdfplumber
+
+from ares_client import AresClient
+from ares_stub import start_stub_server
+from benchmarks.synthetic_pdf import expected_fields, generate_application_pdf, random_record
+from main_extract_new import PDFExtractor
+from main_fill import fill_document
+
+# Benchmark jednotlivých fází zpracování nad syntetickými žádostmi.
+# Spuštění: python -m benchmarks.run --docs 5 --repeat 3 [--compare bench_results/predchozi.json]
+
+DEFAULT_TEMPLATE = "templates/pop_jmeno.docx"
+
+# Scénáře: (název, stránky formuláře, stránky příloh)
+SCENARIOS = [
+    ("form-1p", 1, 0),
+    ("form-2p", 2, 0),
+    ("form-1p+10p", 1, 10),
+    ("form-1p+50p", 1, 50),
+]
+
+STAGES = [
+    "pdf_open",
+    "extract_text_from_pdf",
+    "extract_personal_data",
+    "extract_table_data",
+    "ares_lookup",
+    "fill_document",
+]
+
+
+def timed(func: Callable[[], object]) -> float:
+    """Spustí funkci bez výpisů a vrátí dobu běhu v milisekundách"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        func()
+        return (time.perf_counter() - started) * 1000
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Souhrnné statistiky vzorků v milisekundách"""
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "median_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[p95_index], 3),
+        "min_ms": round(ordered[0], 3),
+    }
+
+
+def git_commit() -> Optional[str]:
+    """Aktuální commit, pokud je k dispozici"""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_document(pdf_path: str, expected: Dict[str, str], ares_client: AresClient,
+                   template: str, output_dir: str, samples: Dict[str, List[float]]) -> float:
+    """Změří všechny fáze pro jeden dokument a vrátí podíl správně extrahovaných polí"""
+    def open_pdf():
+        with pdfplumber.open(pdf_path) as pdf:
+            return len(pdf.pages)
+
+    extractor = PDFExtractor(pdf_path, ares_client=ares_client)
+    samples["pdf_open"].append(timed(open_pdf))
+
+    def extract_text():
+        extractor.text = extractor.extract_text_from_pdf()
+    samples["extract_text_from_pdf"].append(timed(extract_text))
+
+    personal_data: Dict[str, str] = {}
+
+    def extract_personal():
+        personal_data.update(extractor.extract_personal_data())
+    samples["extract_personal_data"].append(timed(extract_personal))
+    samples["extract_table_data"].append(timed(extractor.extract_table_data))
+
+    company_info: Dict[str, str] = {}
+
+    def ares_lookup():
+        company_info.update(extractor.get_company_info_via_ares(personal_data.get("ico", expected["ico"])))
+    samples["ares_lookup"].append(timed(ares_lookup))
+
+    data = {**personal_data, **company_info}
+    output_path = os.path.join(output_dir, "vyplnena.docx")
+    samples["fill_document"].append(timed(lambda: fill_document(template, output_path, data=data)))
+
+    correct = sum(1 for key, value in expected.items() if personal_data.get(key) == value)
+    return correct / len(expected)
+
+
+def compare(current: Dict, previous_path: str):
+    """Vypíše poměr mediánů proti předchozímu běhu"""
+    with open(previous_path, "r", encoding="utf-8") as f:
+        previous = json.load(f)
+    previous_results = {(r["scenario"], r["stage"]): r for r in previous.get("results", [])}
+
+    print(f"\n📈 Porovnání s {previous_path} ({previous.get('commit') or '?'}):")
+    for result in current["results"]:
+        old = previous_results.get((result["scenario"], result["stage"]))
+        if not old or not old.get("median_ms") or "median_ms" not in result:
+            continue
+        ratio = result["median_ms"] / old["median_ms"]
+        flag = "⚠️" if ratio > 1.1 else "  "
+        print(f"{flag} {result['scenario']:>12} {result['stage']:>22}: {old['median_ms']:9.3f} -> "
+              f"{result['median_ms']:9.3f} ms ({ratio:5.2f}x)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark fází extrakce a vyplňování")
+    parser.add_argument("--docs", type=int, default=5, help="Počet dokumentů na scénář")
+    parser.add_argument("--repeat", type=int, default=3, help="Počet opakování měření každého dokumentu")
+    parser.add_argument("--scenario", action="append", help="Spustit jen vybrané scénáře (lze opakovat)")
+    parser.add_argument("--template", default=DEFAULT_TEMPLATE, help="Šablona DOCX pro fázi fill_document")
+    parser.add_argument("--ares-latency", type=float, default=0.0, help="Umělá latence ARES stubu v sekundách")
+    parser.add_argument("--font", default=None, help="TTF font s českou diakritikou")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", default=None, help="Výstupní JSON (výchozí: bench_results/<čas>.json)")
+    parser.add_argument("--compare", default=None, help="Předchozí výsledek JSON pro porovnání")
+    args = parser.parse_args(argv)
+
+    scenarios = [s for s in SCENARIOS if not args.scenario or s[0] in args.scenario]
+    rng = random.Random(args.seed)
+
+    stub = start_stub_server(latency=args.ares_latency)
+    ares_client = AresClient(base_url=stub.base_url, cache=None, rate_limit=0)
+
+    run = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "pdfplumber": getattr(pdfplumber, "__version__", None),
+        "config": {"docs": args.docs, "repeat": args.repeat, "ares_latency": args.ares_latency, "seed": args.seed},
+        "results": [],
+    }
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, form_pages, attachment_pages in scenarios:
+            samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+            accuracy = []
+            for doc in range(args.docs):
+                record = random_record(rng)
+                pdf_path = os.path.join(work_dir, f"{name}_{doc}.pdf")
+                generate_application_pdf(pdf_path, record, form_pages, attachment_pages, args.font, seed=doc)
+                for _ in range(args.repeat):
+                    accuracy.append(bench_document(pdf_path, expected_fields(record), ares_client,
+                                                   args.template, work_dir, samples))
+
+            pages = form_pages + attachment_pages
+            print(f"📊 {name} ({pages} str., přesnost polí {statistics.fmean(accuracy):.0%})")
+            for stage in STAGES:
+                summary = summarize(samples[stage])
+                run["results"].append({"scenario": name, "pages": pages, "stage": stage, **summary})
+                print(f"   {stage:>22}: medián {summary['median_ms']:9.3f} ms | p95 {summary['p95_ms']:9.3f} ms")
+            run["results"].append({
+                "scenario": name, "pages": pages, "stage": "field_accuracy",
+                "n": len(accuracy), "mean": round(statistics.fmean(accuracy), 4),
+            })
+
+    stub.shutdown()
+
+    output = args.output or os.path.join("bench_results", f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(run, f, ensure_ascii=False, indent=2)
+    print(f"💾 Výsledky uloženy do {output}")
+
+    if args.compare:
+        compare(run, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+import io
+import os
+import random
+import unicodedata
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+# Generátor syntetických žádostí s návěštími, která očekává PDFExtractor.field_definitions.
+# Standardní fonty PDF neumí českou diakritiku, je proto potřeba TTF font (např. DejaVu Sans).
+
+FONT_NAME = "BenchFont"
+FONT_CANDIDATES = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+    "/usr/share/fonts/liberation-sans/LiberationSans-Regular.ttf",
+    "/Library/Fonts/Arial Unicode.ttf",
+    "/System/Library/Fonts/Supplemental/Arial.ttf",
+    "C:/Windows/Fonts/arial.ttf",
+]
+
+SURNAMES = ["Novák", "Svoboda", "Dvořák", "Černý", "Procházka", "Kučera", "Veselý", "Horák", "Němec", "Marek"]
+FIRST_NAMES = ["Jan", "Petr", "Jiří", "Tomáš", "Lukáš", "Jakub", "Martin", "Ondřej", "David", "Michal"]
+CITIES = ["Praha", "Brno", "Ostrava", "Plzen", "Olomouc", "Liberec", "Zlin", "Kladno"]
+PROFESSIONS = ["Programátor, IT", "Účetní, finance", "Zdravotní sestra, zdravotnictví", "Řidič, doprava"]
+EDUCATION = [("3", "středoškolské s maturitou"), ("4", "vysokoškolské bakalářské"), ("5", "vysokoškolské inženýrské")]
+
+ATTACHMENT_LINE = "Příloha {page} - řádek {line}: výpis z účtu, pohyb {amount} Kč ze dne {day:02d}.{month:02d}.2024"
+
+_registered_font: Optional[str] = None
+
+
+def register_font(font_path: Optional[str] = None) -> str:
+    """Zaregistruje TTF font s českou diakritikou a vrátí jeho název pro reportlab"""
+    global _registered_font
+    if _registered_font:
+        return _registered_font
+
+    candidates = [font_path or os.getenv("BENCH_FONT", "")] + FONT_CANDIDATES
+    for path in candidates:
+        if path and os.path.exists(path):
+            pdfmetrics.registerFont(TTFont(FONT_NAME, path))
+            _registered_font = FONT_NAME
+            return FONT_NAME
+    raise FileNotFoundError(
+        "Nebyl nalezen TTF font s českou diakritikou - zadejte cestu přes --font nebo BENCH_FONT"
+    )
+
+
+def ico_with_checksum(base: str) -> str:
+    """Doplní k sedmimístnému základu kontrolní číslici IČO (mod 11)"""
+    total = sum(int(digit) * weight for digit, weight in zip(base, range(8, 1, -1)))
+    check = (11 - total % 11) % 10
+    return base + str(check)
+
+
+def rodne_cislo_for(rng: random.Random) -> Tuple[str, str]:
+    """Vygeneruje desetimístné rodné číslo (dělitelné 11) a odpovídající datum narození"""
+    year = rng.randint(1960, 2003)
+    month = rng.randint(1, 12)
+    day = rng.randint(1, 28)
+    prefix = f"{year % 100:02d}{month:02d}{day:02d}{rng.randint(0, 999):03d}"
+    check = int(prefix) % 11 % 10
+    return prefix + str(check), f"{day}.{month}.{year}"
+
+
+def random_record(rng: random.Random) -> Dict[str, str]:
+    """Vygeneruje náhodného žadatele; hodnoty odpovídají tomu, co má extrakce vrátit"""
+    rodne_cislo, datum_narozeni = rodne_cislo_for(rng)
+    first_name = rng.choice(FIRST_NAMES)
+    surname = rng.choice(SURNAMES)
+    education_code, education = rng.choice(EDUCATION)
+    return {
+        "prijmeni": surname,
+        "jmeno": first_name,
+        "rodne_cislo": rodne_cislo,
+        "datum_narozeni": datum_narozeni,
+        "misto_narozeni_mesto": rng.choice(CITIES),
+        "misto_narozeni_stat": "CZ",
+        "pohlavi": "muž",
+        "statni_obcanstvi": "česká",
+        "telefon": f"{rng.randint(600, 799)}{rng.randint(0, 999999):06d}",
+        "email": f"{_ascii(first_name)}.{_ascii(surname)}@example.cz".lower(),
+        "ico": ico_with_checksum(f"{rng.randint(1000000, 9999999)}"),
+        "cisty_prijem": f"{rng.randint(15, 120)}000",
+        "mesicni_naklady": f"{rng.randint(5, 40)}000",
+        "datum_nastupu": f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{rng.randint(2000, 2023)}",
+        "nejvyssi_vzdelani": education,
+        "_vzdelani_kod": education_code,
+        "povolani": rng.choice(PROFESSIONS),
+    }
+
+
+def _ascii(value: str) -> str:
+    """Odstraní diakritiku"""
+    return unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode("ascii")
+
+
+def form_lines(record: Dict[str, str]) -> List[str]:
+    """Řádky formuláře - dvojice hodnot, které vzor odděluje jen mezerou, jsou na dvou řádcích"""
+    phone = record["telefon"]
+    return [
+        "I. Osobní údaje žadatele",
+        f"Příjmení/Jméno {record['prijmeni']} {record['jmeno']}",
+        f"Rodné číslo/Datum narození {record['rodne_cislo']} {record['datum_narozeni']}",
+        f"Místo narození: město/stát {record['misto_narozeni_mesto']}",
+        record["misto_narozeni_stat"],
+        f"Pohlaví/Státní občanství {record['pohlavi']}",
+        record["statni_obcanstvi"],
+        f"Telefon/E-mail {phone[:3]} {phone[3:6]} {phone[6:]} {record['email']}",
+        "",
+        "II. Údaje o zaměstnání a příjmech",
+        f"IČO zaměstnavatele nebo OSVČ {record['ico']}",
+        f"Datum nástupu do zaměstnání nebo zahájení podnikání {record['datum_nastupu']}",
+        f"Povolání/Ekonomický sektor {record['povolani']}",
+        f"Nejvyšší dosažené vzdělání {record['_vzdelani_kod']} {record['nejvyssi_vzdelani']}",
+        f"Čistý příjem {int(record['cisty_prijem']):,}".replace(",", "."),
+        f"Měsíční životní náklady (Kč) {int(record['mesicni_naklady']):,}".replace(",", "."),
+    ]
+
+
+def expected_fields(record: Dict[str, str]) -> Dict[str, str]:
+    """Očekávaný výstup extract_personal_data pro vygenerovaný záznam"""
+    return {key: value for key, value in record.items() if not key.startswith("_")}
+
+
+def generate_application_pdf(
+    output: Union[str, BinaryIO],
+    record: Dict[str, str],
+    form_pages: int = 1,
+    attachment_pages: int = 0,
+    font_path: Optional[str] = None,
+    seed: int = 0,
+):
+    """Vygeneruje žádost; pole se rozdělí na form_pages stránek a za ně se přidají přílohy"""
+    font = register_font(font_path)
+    rng = random.Random(seed)
+    pdf = canvas.Canvas(output, pagesize=A4)
+    width, height = A4
+
+    lines = form_lines(record)
+    per_page = -(-len(lines) // max(1, form_pages))
+    for start in range(0, len(lines), per_page):
+        pdf.setFont(font, 10)
+        y = height - 60
+        for line in lines[start:start + per_page]:
+            pdf.drawString(50, y, line)
+            y -= 16
+        pdf.showPage()
+
+    for page in range(1, attachment_pages + 1):
+        pdf.setFont(font, 9)
+        y = height - 50
+        line = 1
+        while y > 50:
+            pdf.drawString(40, y, ATTACHMENT_LINE.format(
+                page=page, line=line, amount=rng.randint(100, 99999),
+                day=rng.randint(1, 28), month=rng.randint(1, 12)
+            ))
+            y -= 13
+            line += 1
+        pdf.showPage()
+
+    pdf.save()
+
+
+def generate_application_bytes(record: Dict[str, str], **kwargs) -> bytes:
+    """Vygeneruje žádost a vrátí obsah PDF"""
+    buffer = io.BytesIO()
+    generate_application_pdf(buffer, record, **kwargs)
+    return buffer.getvalue()
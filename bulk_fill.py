@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from docx_template import CompiledTemplate, load_template
+from main_fill import build_mapping
+
+# Šablona zkompilovaná v rámci pracovního procesu
+_template: Optional[CompiledTemplate] = None
+
+
+def iter_records(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Načte záznamy z JSONL - podporuje výstup batch_extract.py i ploché záznamy jako data.json"""
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            print(f"⚠️ Řádek {line_no}: neplatný JSON ({e})")
+            continue
+        if record.get("ok") is False:
+            continue
+        yield record.get("personal_info", record)
+
+
+def _slug(value: str) -> str:
+    """Převede text na bezpečnou část názvu souboru (bez diakritiky)"""
+    ascii_value = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^A-Za-z0-9]+", "_", ascii_value).strip("_")
+
+
+def record_filename(index: int, data: Dict[str, Any]) -> str:
+    """Název dokumentu v archivu"""
+    parts = [f"{index:05d}"] + [_slug(str(data.get(key, ""))) for key in ("prijmeni", "jmeno")]
+    return "_".join(part for part in parts if part) + ".docx"
+
+
+def _init_worker(template_name: str):
+    """Inicializace pracovního procesu - šablona se zkompiluje jen jednou"""
+    global _template
+    _template = load_template(template_name)
+
+
+def _render(job: Tuple[int, Dict[str, Any]]) -> Tuple[str, bytes]:
+    """Vykreslí jeden záznam"""
+    index, data = job
+    return record_filename(index, data), _template.render(build_mapping(data))
+
+
+def render_zip(
+    records: Iterable[Dict[str, Any]],
+    template_name: str,
+    output: Union[str, IO[bytes]],
+    workers: Optional[int] = None,
+) -> int:
+    """Vykreslí záznamy do šablony a průběžně je zapisuje do ZIP archivu.
+
+    V paměti je najednou jen omezený počet rozpracovaných dokumentů (4 na pracovní proces),
+    výstup zachovává pořadí vstupu. Vrací počet vygenerovaných dokumentů.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    jobs = enumerate(records, 1)
+    count = 0
+
+    # DOCX je už komprimovaný - v archivu se jen ukládá
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_STORED) as archive:
+        if workers <= 1:
+            _init_worker(template_name)
+            for job in jobs:
+                name, data = _render(job)
+                archive.writestr(name, data)
+                count += 1
+            return count
+
+        window = workers * 4
+        pending: deque = deque()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(template_name,)) as executor:
+            for job in jobs:
+                pending.append(executor.submit(_render, job))
+                if len(pending) >= window:
+                    count += _write_result(archive, pending.popleft())
+            while pending:
+                count += _write_result(archive, pending.popleft())
+    return count
+
+
+def _write_result(archive: zipfile.ZipFile, future: Future) -> int:
+    """Zapíše hotový dokument do archivu"""
+    name, data = future.result()
+    archive.writestr(name, data)
+    return 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Hromadné vyplnění šablony pro všechny záznamy z JSONL"""
+    parser = argparse.ArgumentParser(description="Hromadné vyplnění šablony DOCX ze záznamů JSONL do ZIP archivu")
+    parser.add_argument("records", help="JSONL se záznamy (např. výstup batch_extract.py), '-' = standardní vstup")
+    parser.add_argument("template", help="Šablona DOCX se zástupnými texty ((klic))")
+    parser.add_argument("-o", "--output", default="dokumenty.zip", help="Výstupní ZIP archiv (výchozí: dokumenty.zip)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Počet pracovních procesů (výchozí: počet CPU)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    if args.records == "-":
+        count = render_zip(iter_records(sys.stdin), args.template, args.output, args.workers)
+    else:
+        with open(args.records, "r", encoding="utf-8") as f:
+            count = render_zip(iter_records(f), args.template, args.output, args.workers)
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Vygenerováno {count} dokumentů za {elapsed:.1f} s")
+    print(f"💾 Archiv uložen do {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
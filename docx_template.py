@@ -0,0 +1,177 @@
+import io
+import os
+import re
+import threading
+import zipfile
+from typing import BinaryIO, Dict, List, Mapping, Set, Tuple, Union
+from xml.sax.saxutils import escape
+
+from lxml import etree
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+XML_NS = "http://www.w3.org/XML/1998/namespace"
+W_P = f"{{{W_NS}}}p"
+W_T = f"{{{W_NS}}}t"
+
+# Zástupné texty ve tvaru ((klic))
+PLACEHOLDER = re.compile(r"\(\(([A-Za-z0-9_]+)\)\)")
+
+# Části dokumentu, ve kterých se zástupné texty nahrazují
+TEMPLATE_PARTS = re.compile(r"^word/(document|header\d*|footer\d*|footnotes|endnotes)\.xml$")
+
+# Značky ze soukromé oblasti Unicode - po kompilaci označují místa pro dosazení hodnot
+MARK_START = "\ue000"
+MARK_END = "\ue001"
+MARKER = re.compile(f"{MARK_START}([A-Za-z0-9_]+){MARK_END}")
+
+# Zalomení řádku a tabulátor v hodnotě se převádí stejně jako v python-docx (run.text)
+LINE_BREAK = '</w:t><w:br/><w:t xml:space="preserve">'
+TAB = '</w:t><w:tab/><w:t xml:space="preserve">'
+
+
+def _normalize_paragraph(text_nodes: List[etree._Element]) -> Set[str]:
+    """Sloučí zástupné texty rozdělené do více runů do jednoho w:t a nahradí je značkami.
+
+    Vrací množinu nalezených klíčů.
+    """
+    texts = [node.text or "" for node in text_nodes]
+    full_text = "".join(texts)
+    matches = list(PLACEHOLDER.finditer(full_text))
+    if not matches:
+        return set()
+
+    # Rozsah každého w:t v textu odstavce
+    spans = []
+    position = 0
+    for text in texts:
+        spans.append((position, position + len(text)))
+        position += len(text)
+
+    def locate(offset: int) -> Tuple[int, int]:
+        """Vrátí (index w:t, posun uvnitř) pro znak na dané pozici"""
+        for index, (start, end) in enumerate(spans):
+            if start <= offset < end:
+                return index, offset - start
+        raise ValueError(f"Pozice {offset} leží mimo text odstavce")
+
+    # Zpracování odzadu, aby se posuny dřívějších shod nezměnily
+    for match in reversed(matches):
+        first, first_offset = locate(match.start())
+        last, last_offset = locate(match.end() - 1)
+        marker = f"{MARK_START}{match.group(1)}{MARK_END}"
+        if first == last:
+            texts[first] = texts[first][:first_offset] + marker + texts[first][last_offset + 1:]
+        else:
+            texts[first] = texts[first][:first_offset] + marker
+            for index in range(first + 1, last):
+                texts[index] = ""
+            texts[last] = texts[last][last_offset + 1:]
+
+    for node, text in zip(text_nodes, texts):
+        if node.text != text:
+            node.text = text
+            node.set(f"{{{XML_NS}}}space", "preserve")
+    return {match.group(1) for match in matches}
+
+
+def _compile_part(xml: bytes) -> Tuple[List[str], Set[str]]:
+    """Zkompiluje XML část dokumentu na střídající se seznam [text, klíč, text, klíč, ..., text]"""
+    root = etree.fromstring(xml)
+
+    # w:t seskupené podle nejbližšího odstavce (odstavce v textových polích zvlášť)
+    paragraphs: Dict[etree._Element, List[etree._Element]] = {}
+    for node in root.iter(W_T):
+        paragraph = next(node.iterancestors(W_P), None)
+        if paragraph is not None:
+            paragraphs.setdefault(paragraph, []).append(node)
+
+    keys: Set[str] = set()
+    for text_nodes in paragraphs.values():
+        keys |= _normalize_paragraph(text_nodes)
+
+    if not keys:
+        return [xml.decode("utf-8")], keys
+
+    serialized = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True).decode("utf-8")
+    return MARKER.split(serialized), keys
+
+
+class CompiledTemplate:
+    """Předkompilovaná šablona DOCX.
+
+    Šablona se zpracuje jen jednou: zástupné texty ((klic)) se najdou i tehdy, když jsou
+    rozdělené do více runů, a XML se rozdělí na pevné úseky a místa pro dosazení hodnot.
+    Vykreslení záznamu pak jen spojí úseky s hodnotami a zabalí výsledek do ZIP.
+    """
+
+    def __init__(self, source: Union[str, bytes, BinaryIO]):
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+
+        self.parts: List[Tuple[zipfile.ZipInfo, Union[bytes, List[str]]]] = []
+        self.placeholders: Set[str] = set()
+
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                data = archive.read(info)
+                if TEMPLATE_PARTS.match(info.filename):
+                    segments, keys = _compile_part(data)
+                    if keys:
+                        self.parts.append((info, segments))
+                        self.placeholders |= keys
+                        continue
+                self.parts.append((info, data))
+
+    @staticmethod
+    def _render_part(segments: List[str], mapping: Mapping[str, object]) -> bytes:
+        """Dosadí hodnoty do zkompilované části"""
+        output = []
+        for index, segment in enumerate(segments):
+            if index % 2 == 0:
+                output.append(segment)
+            elif segment in mapping:
+                value = escape(str(mapping[segment]))
+                output.append(value.replace("\n", LINE_BREAK).replace("\t", TAB))
+            else:
+                # Klíč bez hodnoty zůstane v dokumentu beze změny
+                output.append(f"(({segment}))")
+        return "".join(output).encode("utf-8")
+
+    def render_to(self, output: Union[str, BinaryIO], mapping: Mapping[str, object]):
+        """Vykreslí dokument do souboru nebo binárního proudu"""
+        with zipfile.ZipFile(output, "w") as archive:
+            for info, content in self.parts:
+                data = content if isinstance(content, bytes) else self._render_part(content, mapping)
+                archive.writestr(info, data)
+
+    def render(self, mapping: Mapping[str, object]) -> bytes:
+        """Vykreslí dokument a vrátí obsah DOCX"""
+        buffer = io.BytesIO()
+        self.render_to(buffer, mapping)
+        return buffer.getvalue()
+
+    def save(self, output_filename: str, mapping: Mapping[str, object]) -> str:
+        """Vykreslí dokument do souboru a vrátí jeho cestu"""
+        self.render_to(output_filename, mapping)
+        return output_filename
+
+
+_template_cache: Dict[str, Tuple[Tuple[int, int], CompiledTemplate]] = {}
+_template_cache_lock = threading.Lock()
+
+
+def load_template(template_name: str) -> CompiledTemplate:
+    """Vrátí zkompilovanou šablonu; při změně souboru ji zkompiluje znovu"""
+    path = os.path.abspath(template_name)
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    with _template_cache_lock:
+        cached = _template_cache.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+    template = CompiledTemplate(path)
+    with _template_cache_lock:
+        _template_cache[path] = (signature, template)
+    return template
@@ -0,0 +1,254 @@
+import argparse
+import importlib.util
+import json
+import logging
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import pandas as pd
+
+from field_definitions import FIELD_DEFINITIONS, FieldDefinition
+from main_extract_new import ExtractedData
+from validation import VALID, validate_ico
+
+logger = logging.getLogger(__name__)
+
+# Export mnoha výsledků extrakce do jedné široké tabulky (jeden řádek na žadatele,
+# jeden sloupec na klíč) v Parquetu nebo Arrow IPC.
+#
+#   python export_columnar.py data.jsonl [dalsi.jsonl ...] -o extrakce.parquet
+#
+# pyarrow se importuje až při zápisu, pro ostatní části aplikace není potřeba.
+
+# Typ sloupce podle klíče - ostatní sloupce jsou texty
+COLUMN_KINDS = {
+    "cisty_prijem": "number",
+    "mesicni_naklady": "number",
+    "datum_narozeni": "date",
+    "datum_nastupu": "date",
+    "telefon": "phone",
+    "ico": "ico",
+}
+
+# Sloupce z informací o firmě (ARES) - klíč v company_info: název sloupce
+COMPANY_COLUMNS = {
+    "firma_nazev": "firma_nazev",
+    "firma_sidlo": "firma_sidlo",
+    "status": "firma_status",
+    "typ_subjektu": "typ_subjektu",
+    "obor_podnikani": "obor_podnikani",
+}
+
+METADATA_COLUMNS = ("file", "form")
+
+DEFAULT_BATCH_SIZE = 5000
+
+Record = Union[ExtractedData, Dict[str, Any]]
+
+
+def export_columns(definitions: Optional[Dict[str, FieldDefinition]] = None) -> List[str]:
+    """Pořadí sloupců: metadata, klíče osobních údajů podle definic polí, informace o firmě"""
+    keys = [key for definition in (definitions or FIELD_DEFINITIONS).values() for key in definition.keys]
+    return list(METADATA_COLUMNS) + keys + [column for column in COMPANY_COLUMNS.values() if column not in keys]
+
+
+def record_row(record: Record, file: str = "") -> Dict[str, Any]:
+    """Jeden řádek tabulky z ExtractedData nebo záznamu batch_extract.py"""
+    if isinstance(record, ExtractedData):
+        record = {"file": file, "form": record.form, "personal_info": record.personal_info, "company_info": record.company_info}
+    row = {"file": record.get("file", file), "form": record.get("form", "")}
+    row.update(record.get("personal_info") or {})
+    for key, column in COMPANY_COLUMNS.items():
+        value = (record.get("company_info") or {}).get(key)
+        if value:
+            row[column] = value
+    return row
+
+
+def _blank_to_na(series: pd.Series) -> pd.Series:
+    """Prázdné a jen bílé znaky obsahující hodnoty jako chybějící"""
+    series = series.astype("string").str.strip()
+    return series.mask(series == "")
+
+
+def normalize_numbers(series: pd.Series) -> pd.Series:
+    """Částky na float - mezery a tečky jako oddělovače tisíců, čárka jako desetinná čárka.
+
+    Hodnoty z extrakce už jsou normalizované (tečka jako desetinná), takže tečka se ruší,
+    jen když je v hodnotě zároveň čárka.
+    """
+    series = _blank_to_na(series).str.replace(r"\s", "", regex=True)
+    has_comma = series.str.contains(",", regex=False, na=False)
+    series = series.mask(has_comma, series.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    return pd.to_numeric(series, errors="coerce")
+
+
+def normalize_dates(series: pd.Series) -> pd.Series:
+    """Data ve tvaru D.M.RRRR (s mezerami i bez) na datum"""
+    series = _blank_to_na(series).str.replace(r"\s", "", regex=True)
+    return pd.to_datetime(series, format="%d.%m.%Y", errors="coerce")
+
+
+def normalize_phones(series: pd.Series) -> pd.Series:
+    """Telefon jen z číslic; devítimístná česká čísla s předvolbou +420"""
+    digits = _blank_to_na(series).str.replace(r"\D", "", regex=True)
+    digits = digits.str.replace(r"^(?:00)?420(?=\d{9}$)", "", regex=True)
+    digits = digits.mask(digits == "")
+    return digits.mask(digits.str.len() == 9, "+420" + digits)
+
+
+def normalize_ico(series: pd.Series) -> pd.Series:
+    """IČO jen z číslic, doplněné nulami zleva na 8 míst.
+
+    Hodnoty, které ani po doplnění nejsou platné IČO (délka, kontrolní číslice), jsou
+    chybějící - useknuté nebo poškozené IČO se nesmí změnit na jiné, zdánlivě platné.
+    """
+    digits = _blank_to_na(series).str.replace(r"\D", "", regex=True)
+    padded = digits.mask(digits == "").str.zfill(8)
+    valid = padded.map(lambda ico: validate_ico(ico).status == VALID, na_action="ignore")
+    return padded.where(valid.fillna(False).astype(bool))
+
+
+NORMALIZERS = {
+    "number": normalize_numbers,
+    "date": normalize_dates,
+    "phone": normalize_phones,
+    "ico": normalize_ico,
+    "string": _blank_to_na,
+}
+
+
+def records_to_frame(records: Iterable[Record], columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Široká tabulka s typovanými sloupci; normalizace běží nad celými sloupci najednou"""
+    columns = columns or export_columns()
+    frame = pd.DataFrame([record_row(record) for record in records], columns=columns)
+    for column in columns:
+        frame[column] = NORMALIZERS[COLUMN_KINDS.get(column, "string")](frame[column])
+    return frame
+
+
+def arrow_schema(columns: List[str]):
+    """Schéma Arrow odpovídající typům sloupců"""
+    import pyarrow as pa
+
+    types = {"number": pa.float64(), "date": pa.date32()}
+    return pa.schema([(column, types.get(COLUMN_KINDS.get(column), pa.string())) for column in columns])
+
+
+class ColumnarExporter:
+    """Průběžný zápis výsledků do Parquetu (.parquet) nebo Arrow IPC (.arrow, .feather).
+
+    Záznamy se sbírají po dávkách; každá dávka se normalizuje najednou a zapíše jako
+    další skupina řádků, takže paměť nezávisí na počtu záznamů a soubor lze číst
+    (po zavření) bez parsování JSON.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        definitions: Optional[Dict[str, FieldDefinition]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        file_format: Optional[str] = None,
+    ):
+        if importlib.util.find_spec("pyarrow") is None:
+            raise ImportError("Pro export do Parquet/Arrow je potřeba balíček pyarrow (pip install pyarrow)")
+
+        self.path = path
+        self.columns = export_columns(definitions)
+        self.schema = arrow_schema(self.columns)
+        self.batch_size = batch_size
+        self.file_format = file_format or ("arrow" if path.endswith((".arrow", ".feather", ".ipc")) else "parquet")
+        if self.file_format not in ("parquet", "arrow"):
+            raise ValueError(f"Neznámý formát exportu: {self.file_format} (parquet, arrow)")
+        self.rows = 0
+        self._pending: List[Record] = []
+        self._writer = None
+
+    def _open_writer(self):
+        if self.file_format == "parquet":
+            import pyarrow.parquet as pq
+
+            return pq.ParquetWriter(self.path, self.schema, compression="zstd")
+        import pyarrow as pa
+
+        return pa.ipc.new_file(self.path, self.schema)
+
+    def add(self, record: Record):
+        """Přidá jeden výsledek; při plné dávce ji zapíše"""
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, records: Iterable[Record]):
+        for record in records:
+            self.add(record)
+
+    def flush(self):
+        """Zapíše nashromážděné záznamy jako další skupinu řádků"""
+        if not self._pending:
+            return
+        import pyarrow as pa
+
+        frame = records_to_frame(self._pending, self.columns)
+        table = pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False)
+        if self._writer is None:
+            self._writer = self._open_writer()
+        self._writer.write_table(table)
+        self.rows += len(self._pending)
+        self._pending = []
+
+    def close(self):
+        """Zapíše zbytek a uzavře soubor (i prázdný, se schématem)"""
+        self.flush()
+        if self._writer is None:
+            self._writer = self._open_writer()
+        self._writer.close()
+
+    def __enter__(self) -> "ColumnarExporter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_result_files(paths: Iterable[str], include_errors: bool = False) -> Iterator[Dict[str, Any]]:
+    """Záznamy z výstupů batch_extract.py (JSONL) nebo main_extract_new.py (JSON)"""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".json"):
+                record = json.load(f)
+                record.setdefault("file", path)
+                yield record
+                continue
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    logger.warning(f"⚠️ {path}:{line_no}: neplatný JSON ({e})")
+                    continue
+                if record.get("ok", True) or include_errors:
+                    yield record
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export výsledků extrakce do jedné tabulky Parquet/Arrow")
+    parser.add_argument("inputs", nargs="+", help="Výstupy batch_extract.py (.jsonl) nebo main_extract_new.py (.json)")
+    parser.add_argument("-o", "--output", default="extrakce.parquet", help="Výstupní soubor (.parquet nebo .arrow)")
+    parser.add_argument("--format", choices=("parquet", "arrow"), default=None, help="Formát (výchozí podle přípony)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Počet řádků ve skupině řádků")
+    parser.add_argument("--include-errors", action="store_true", help="Zahrnout i neúspěšné záznamy")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    with ColumnarExporter(args.output, batch_size=args.batch_size, file_format=args.format) as exporter:
+        exporter.add_many(iter_result_files(args.inputs, args.include_errors))
+    print(f"✅ Exportováno {exporter.rows} záznamů za {time.perf_counter() - started:.1f} s")
+    print(f"💾 Tabulka uložena do {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
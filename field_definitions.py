@@ -0,0 +1,274 @@
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Match, Optional, Pattern, Tuple
+
+# Výchozí délka okna za návěštím, ve kterém se hledá hodnota pole
+DEFAULT_WINDOW = 300
+
+
+def normalize_number(number_str: str) -> str:
+    """Normalizuje číselné hodnoty (odstraní mezery, převede čárky na tečky)"""
+    return number_str.replace(".", "").replace(",", ".")
+
+
+def split_name(match: Match) -> Tuple[str, str]:
+    """Rozdělí celé jméno na příjmení a jméno"""
+    parts = match.group(1).strip().split()
+    if len(parts) >= 2:
+        return parts[0], " ".join(parts[1:])
+    elif len(parts) == 1:
+        return parts[0], ""
+    return "", ""
+
+
+def split_rc_date(match: Match) -> Tuple[str, str]:
+    """Rozdělí rodné číslo a datum narození"""
+    return match.group(1), match.group(2)
+
+
+def split_stripped_pair(match: Match) -> Tuple[str, str]:
+    """Rozdělí dvojici hodnot (město/stát, pohlaví/občanství) a ořízne mezery"""
+    return match.group(1).strip(), match.group(2).strip()
+
+
+def split_phone_email(match: Match) -> Tuple[str, str]:
+    """Rozdělí telefon a email"""
+    phone = match.group(1).replace(" ", "")
+    email = match.group(2)
+    return phone, email
+
+
+def first_group(match: Match) -> Tuple[str]:
+    """Vrátí první skupinu beze změny"""
+    return (match.group(1),)
+
+
+def first_group_stripped(match: Match) -> Tuple[str]:
+    """Vrátí první skupinu bez okrajových mezer"""
+    return (match.group(1).strip(),)
+
+
+def first_group_number(match: Match) -> Tuple[str]:
+    """Vrátí první skupinu jako normalizované číslo"""
+    return (normalize_number(match.group(1)),)
+
+
+@dataclass
+class FieldDefinition:
+    """Definice jednoho pole formuláře"""
+    label: str
+    keys: Tuple[str, ...]
+    pattern: str
+    processor: Callable[[Match], Tuple[str, ...]]
+    window: int = DEFAULT_WINDOW
+    regex: Pattern = field(init=False, repr=False)
+
+    def __post_init__(self):
+        if not self.pattern.startswith(re.escape(self.label)) and not self.pattern.startswith(self.label):
+            raise ValueError(f"Vzor pole '{self.label}' musí začínat jeho návěštím")
+        self.regex = re.compile(self.pattern)
+
+
+# Definice polí pro extrakci
+FIELD_DEFINITIONS: Dict[str, FieldDefinition] = {
+    "Příjmení/Jméno": FieldDefinition(
+        label="Příjmení/Jméno",
+        keys=("prijmeni", "jmeno"),
+        pattern=r"Příjmení/Jméno\s+([A-Za-zÁ-Žá-ž\- ]+)",
+        processor=split_name,
+    ),
+    "Rodné číslo/Datum narození": FieldDefinition(
+        label="Rodné číslo/Datum narození",
+        keys=("rodne_cislo", "datum_narozeni"),
+        pattern=r"Rodné číslo/Datum narození\s+([0-9]{9,10})\s+([0-9]{1,2}\.[0-9]{1,2}\.[0-9]{4})",
+        processor=split_rc_date,
+    ),
+    "Místo narození: město/stát": FieldDefinition(
+        label="Místo narození: město/stát",
+        keys=("misto_narozeni_mesto", "misto_narozeni_stat"),
+        pattern=r"Místo narození: město/stát\s+([A-Za-z0-9 .\-]+)\s+([A-Za-z ]+)",
+        processor=split_stripped_pair,
+    ),
+    "Pohlaví/Státní občanství": FieldDefinition(
+        label="Pohlaví/Státní občanství",
+        keys=("pohlavi", "statni_obcanstvi"),
+        pattern=r"Pohlaví/Státní občanství\s+([a-zA-Zěščřžýáíéúůó ]+)\s+([a-zA-ZěščřžýáíéúůóĚŠČŘŽÝÁÍÉÚŮÓ ]+)",
+        processor=split_stripped_pair,
+    ),
+    "Telefon/E-mail": FieldDefinition(
+        label="Telefon/E-mail",
+        keys=("telefon", "email"),
+        pattern=r"Telefon/E-mail\s+([0-9 ]+)\s+([a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)",
+        processor=split_phone_email,
+    ),
+    "IČO zaměstnavatele nebo OSVČ": FieldDefinition(
+        label="IČO zaměstnavatele nebo OSVČ",
+        keys=("ico",),
+        pattern=r"IČO zaměstnavatele nebo OSVČ\s+([0-9]{8})",
+        processor=first_group,
+    ),
+    "Čistý příjem": FieldDefinition(
+        label="Čistý příjem",
+        keys=("cisty_prijem",),
+        pattern=r"Čistý příjem\s+([0-9\.,]+)",
+        processor=first_group_number,
+    ),
+    "Měsíční životní náklady": FieldDefinition(
+        label="Měsíční životní náklady",
+        keys=("mesicni_naklady",),
+        pattern=r"Měsíční životní náklady.*?([0-9\.,]+)",
+        processor=first_group_number,
+    ),
+    "Datum nástupu": FieldDefinition(
+        label="Datum nástupu do zaměstnání nebo zahájení podnikání",
+        keys=("datum_nastupu",),
+        pattern=r"Datum nástupu do zaměstnání nebo zahájení podnikání\s+([0-9]{2}\.[0-9]{2}\.[0-9]{4})",
+        processor=first_group,
+    ),
+    "Nejvyšší dosažené vzdělání": FieldDefinition(
+        label="Nejvyšší dosažené vzdělání",
+        keys=("nejvyssi_vzdelani",),
+        pattern=r"Nejvyšší dosažené vzdělání\s+[0-9]+\s+([A-Za-zěščřžýáíéúůóĚŠČŘŽÝÁÍÉÚŮÓ ]+)",
+        processor=first_group_stripped,
+    ),
+    "Povolání/Ekonomický sektor": FieldDefinition(
+        label="Povolání/Ekonomický sektor",
+        keys=("povolani",),
+        pattern=r"Povolání/Ekonomický sektor\s+([A-Za-zěščřžýáíéúůóĚŠČŘŽÝÁÍÉÚŮÓ, ]+)",
+        processor=first_group_stripped,
+    ),
+}
+
+
+class FieldMatcher:
+    """Předkompilovaný vyhledávač polí.
+
+    Návěští se vyhledávají jako literály (str.find), vzor hodnoty se pak spouští
+    jen v omezeném okně za nalezeným návěštím - nikdy ne přes celý zbytek textu.
+    """
+
+    def __init__(self, definitions: Dict[str, FieldDefinition]):
+        self.definitions = definitions
+        self.max_window = max((d.window for d in definitions.values()), default=0)
+
+    def find(
+        self,
+        text: str,
+        start: int = 0,
+        names: Optional[Iterable[str]] = None,
+        complete: bool = True,
+    ) -> Dict[str, Match]:
+        """Najde první shodu každého pole od pozice start a vrátí je podle názvu pole.
+
+        Pokud text není kompletní (complete=False), vyhodnotí se jen návěští, jejichž celé
+        okno už v textu leží - u ostatních by další text mohl výsledek změnit, pole proto
+        zůstane nenalezené.
+        """
+        found: Dict[str, Match] = {}
+        text_len = len(text)
+        for name in (self.definitions if names is None else names):
+            definition = self.definitions[name]
+            position = text.find(definition.label, start)
+            while position != -1:
+                if not complete and position + definition.window > text_len:
+                    break
+                value_match = definition.regex.match(text, position, min(text_len, position + definition.window))
+                if value_match:
+                    found[name] = value_match
+                    break
+                position = text.find(definition.label, position + 1)
+        return found
+
+    def extract(self, text: str) -> Dict[str, str]:
+        """Extrahuje hodnoty všech polí z textu"""
+        return self.values(self.find(text))
+
+    def values(self, matches: Dict[str, Match]) -> Dict[str, str]:
+        """Převede nalezené shody na hodnoty podle klíčů v pořadí definic"""
+        values: Dict[str, str] = {}
+        for name, definition in self.definitions.items():
+            match = matches.get(name)
+            if match:
+                values.update(zip(definition.keys, definition.processor(match)))
+        return values
+
+
+class IncrementalFieldScanner:
+    """Postupné vyhledávání polí po stránkách s možností předčasného ukončení.
+
+    Z předchozí stránky si drží jen konec textu délky okna, takže shoda přes
+    hranici stránek se najde stejně jako při vyhledávání v celém textu.
+    """
+
+    def __init__(self, matcher: FieldMatcher, page_hints: Optional[Dict[str, Iterable[int]]] = None):
+        self.matcher = matcher
+        self.pending = list(matcher.definitions)
+        self.hints = {name: set(pages) for name, pages in (page_hints or {}).items() if name in matcher.definitions}
+        self.found: Dict[str, Match] = {}
+        self.last_page = 0
+        self._tail = ""
+
+    def _searchable(self, name: str, page_no: int) -> bool:
+        """Zda se má pole hledat na dané stránce"""
+        return name not in self.hints or page_no in self.hints[name]
+
+    def _has_future_pages(self, name: str, page_no: int) -> bool:
+        """Zda může pole ležet ještě na některé další stránce"""
+        return name not in self.hints or any(hint > page_no for hint in self.hints[name])
+
+    def needs_page(self, page_no: int) -> bool:
+        """Zda má smysl stránku vůbec otevírat"""
+        return any(self._searchable(name, page_no) for name in self.pending)
+
+    @property
+    def done(self) -> bool:
+        """Všechna pole jsou nalezena nebo už nemohou ležet na dalších stránkách"""
+        return not any(self._has_future_pages(name, self.last_page) for name in self.pending)
+
+    def feed(self, page_no: int, page_text: str):
+        """Zpracuje text další stránky (čísla stránek od 1)"""
+        if page_no != self.last_page + 1:
+            self._tail = ""
+        buffer = self._tail + page_text
+        self.last_page = page_no
+
+        names = [name for name in self.pending if self._searchable(name, page_no)]
+        final = [name for name in names if not self._has_future_pages(name, page_no)]
+        open_ended = [name for name in names if name not in final]
+        found = self.matcher.find(buffer, names=final)
+        found.update(self.matcher.find(buffer, names=open_ended, complete=False))
+
+        self._register(found)
+        self._tail = buffer[-self.matcher.max_window:] if self.matcher.max_window else ""
+
+    def finish(self):
+        """Dokončí vyhledávání - přijme i shody končící na konci posledního textu"""
+        if self._tail and self.pending:
+            names = [name for name in self.pending if self._searchable(name, self.last_page)]
+            self._register(self.matcher.find(self._tail, names=names))
+        self._tail = ""
+
+    def _register(self, found: Dict[str, Match]):
+        """Uloží nalezené shody a odebere pole z čekajících"""
+        self.found.update(found)
+        self.pending = [name for name in self.pending if name not in self.found]
+
+    def values(self) -> Dict[str, str]:
+        """Vrátí hodnoty nalezených polí"""
+        return self.matcher.values(self.found)
+
+
+def definitions_version(definitions: Dict[str, FieldDefinition]) -> str:
+    """Vrátí otisk definic polí - mění se při každé úpravě vzorů, klíčů nebo zpracování"""
+    digest = hashlib.sha256()
+    for name, definition in definitions.items():
+        parts = (name, definition.label, ",".join(definition.keys), definition.pattern,
+                 str(definition.window), definition.processor.__name__)
+        digest.update("\x1f".join(parts).encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()[:12]
+
+
+DEFAULT_MATCHER = FieldMatcher(FIELD_DEFINITIONS)
+FIELD_DEFINITIONS_VERSION = definitions_version(FIELD_DEFINITIONS)
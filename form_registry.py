@@ -0,0 +1,152 @@
+import hashlib
+import io
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+from field_definitions import FIELD_DEFINITIONS, FieldDefinition, FieldMatcher, definitions_version
+from layout_extractor import FormLayout
+
+PDFSource = Union[str, bytes, BinaryIO]
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    """Sjednotí bílé znaky, aby nezáleželo na zalomení řádků"""
+    return _WHITESPACE.sub(" ", text)
+
+
+@dataclass
+class FormSpec:
+    """Jedna verze formuláře: poznávací texty první stránky a její předkompilovaná pole"""
+    name: str
+    # Texty, které se musí objevit na první stránce (návěští, nadpisy oddílů)
+    anchors: Tuple[str, ...]
+    definitions: Dict[str, FieldDefinition]
+    # Podíl poznávacích textů, který musí být nalezen
+    min_score: float = 0.75
+    # Volitelné nápovědy stránek a naučené rozložení pro tuto verzi
+    page_hints: Optional[Dict[str, List[int]]] = None
+    layout: Optional[FormLayout] = None
+    matcher: FieldMatcher = field(init=False, repr=False)
+    version: str = field(init=False)
+
+    def __post_init__(self):
+        if not self.anchors:
+            raise ValueError(f"Formulář '{self.name}' nemá žádné poznávací texty")
+        self.anchors = tuple(_normalize(anchor) for anchor in self.anchors)
+        self.matcher = FieldMatcher(self.definitions)
+        self.version = definitions_version(self.definitions)
+
+    def score(self, present: frozenset) -> float:
+        """Podíl poznávacích textů nalezených na první stránce"""
+        return sum(1 for anchor in self.anchors if anchor in present) / len(self.anchors)
+
+
+class FormRegistry:
+    """Registr známých verzí formulářů.
+
+    Otisk dokumentu je množina poznávacích textů (ze všech registrovaných formulářů),
+    které jsou na první stránce. Stejný otisk vede vždy na stejný formulář, takže se
+    výsledek pro každý otisk počítá jen jednou.
+    """
+
+    def __init__(self, specs: Optional[List[FormSpec]] = None):
+        self._specs: Dict[str, FormSpec] = {}
+        self._anchors: Tuple[str, ...] = ()
+        self._by_fingerprint: Dict[str, Optional[FormSpec]] = {}
+        self._lock = threading.Lock()
+        for spec in specs or []:
+            self.register(spec)
+
+    @property
+    def specs(self) -> List[FormSpec]:
+        return list(self._specs.values())
+
+    def register(self, spec: FormSpec):
+        """Zaregistruje verzi formuláře (stejný název přepíše předchozí)"""
+        with self._lock:
+            self._specs[spec.name] = spec
+            self._anchors = tuple(sorted({anchor for s in self._specs.values() for anchor in s.anchors}))
+            self._by_fingerprint.clear()
+
+    def _present_anchors(self, first_page_text: str) -> frozenset:
+        text = _normalize(first_page_text)
+        return frozenset(anchor for anchor in self._anchors if anchor in text)
+
+    @staticmethod
+    def _fingerprint(present: frozenset) -> str:
+        return hashlib.sha256("\x1f".join(sorted(present)).encode("utf-8")).hexdigest()[:16]
+
+    def fingerprint(self, first_page_text: str) -> str:
+        """Otisk první stránky - zkrácený hash nalezených poznávacích textů"""
+        return self._fingerprint(self._present_anchors(first_page_text))
+
+    def identify(self, first_page_text: str) -> Optional[FormSpec]:
+        """Vrátí verzi formuláře podle textu první stránky, nebo None pro neznámý dokument"""
+        present = self._present_anchors(first_page_text)
+        key = self._fingerprint(present)
+        with self._lock:
+            if key in self._by_fingerprint:
+                return self._by_fingerprint[key]
+
+        best: Optional[FormSpec] = None
+        best_score = 0.0
+        for spec in self.specs:
+            score = spec.score(present)
+            if score >= spec.min_score and score > best_score:
+                best, best_score = spec, score
+
+        with self._lock:
+            self._by_fingerprint[key] = best
+        return best
+
+
+def first_page_text(source: PDFSource) -> str:
+    """Rychle přečte text první stránky (PDFium, případně pdfplumber)"""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        import pdfplumber
+
+        with pdfplumber.open(source) as pdf:
+            if not pdf.pages:
+                return ""
+            return pdf.pages[0].extract_text() or ""
+
+    document = pdfium.PdfDocument(source)
+    try:
+        if len(document) == 0:
+            return ""
+        page = document[0]
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_range()
+        finally:
+            textpage.close()
+            page.close()
+    finally:
+        document.close()
+
+
+# Současná verze žádosti - nadpis oddílu a návěští z první části formuláře
+APPLICATION_FORM = FormSpec(
+    name="zadost",
+    anchors=(
+        "Osobní údaje žadatele",
+        "Příjmení/Jméno",
+        "Rodné číslo/Datum narození",
+        "Pohlaví/Státní občanství",
+        "Telefon/E-mail",
+    ),
+    definitions=FIELD_DEFINITIONS,
+)
+
+DEFAULT_REGISTRY = FormRegistry([APPLICATION_FORM])
@@ -0,0 +1,267 @@
+import argparse
+import io
+import json
+import logging
+import sys
+from dataclasses import asdict, dataclass, field
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+from field_definitions import FIELD_DEFINITIONS, FIELD_DEFINITIONS_VERSION, FieldDefinition
+
+logger = logging.getLogger(__name__)
+
+# Okraj kolem oblasti hodnoty v bodech
+REGION_PADDING = 2.0
+# Povolený rozdíl velikosti stránky oproti referenčnímu PDF v bodech
+PAGE_SIZE_TOLERANCE = 1.0
+# Výška oblasti pod posledním návěštím stránky v násobcích výšky řádku
+LAST_REGION_LINES = 3
+
+# Souřadnice pdfplumber: (x0, top, x1, bottom), počátek v levém horním rohu stránky
+BBox = Tuple[float, float, float, float]
+PDFSource = Union[str, bytes, BinaryIO]
+
+
+class LayoutMismatch(ValueError):
+    """Dokument neodpovídá naučenému rozložení formuláře"""
+
+
+@dataclass
+class FieldRegion:
+    """Oblast jednoho pole na stránce - začíná návěštím a pokračuje hodnotou"""
+    page: int
+    bbox: BBox
+    label_bbox: BBox
+
+
+@dataclass
+class FormLayout:
+    """Rozložení formuláře naučené z referenčního PDF"""
+    regions: Dict[str, FieldRegion] = field(default_factory=dict)
+    # Velikost stránek (šířka, výška) podle čísla stránky od 1
+    page_sizes: Dict[int, Tuple[float, float]] = field(default_factory=dict)
+    definitions_version: str = FIELD_DEFINITIONS_VERSION
+
+    @property
+    def pages(self) -> List[int]:
+        """Stránky, na kterých leží některé pole"""
+        return sorted({region.page for region in self.regions.values()})
+
+    def to_dict(self) -> Dict:
+        """Převede rozložení na slovník vhodný pro JSON"""
+        data = asdict(self)
+        data["page_sizes"] = {str(page): list(size) for page, size in self.page_sizes.items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "FormLayout":
+        """Vytvoří rozložení ze slovníku (opak to_dict)"""
+        regions = {
+            name: FieldRegion(region["page"], tuple(region["bbox"]), tuple(region["label_bbox"]))
+            for name, region in data.get("regions", {}).items()
+        }
+        page_sizes = {int(page): tuple(size) for page, size in data.get("page_sizes", {}).items()}
+        return cls(regions, page_sizes, data.get("definitions_version", ""))
+
+    def save(self, path: str):
+        """Uloží rozložení do JSON souboru"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "FormLayout":
+        """Načte rozložení z JSON souboru"""
+        with open(path, "r", encoding="utf-8") as f:
+            layout = cls.from_dict(json.load(f))
+        if layout.definitions_version != FIELD_DEFINITIONS_VERSION:
+            logger.warning(f"⚠️ Rozložení {path} bylo naučeno pro jinou verzi definic polí")
+        return layout
+
+
+def find_label(words: List[Dict], label: str) -> Optional[BBox]:
+    """Najde návěští jako posloupnost slov na jednom řádku a vrátí jeho ohraničení"""
+    tokens = label.split()
+    for start in range(len(words) - len(tokens) + 1):
+        candidate = words[start:start + len(tokens)]
+        if abs(candidate[-1]["top"] - candidate[0]["top"]) > 2:
+            continue
+        if all(word["text"] == token for word, token in zip(candidate[:-1], tokens[:-1])) \
+                and candidate[-1]["text"].startswith(tokens[-1]):
+            return (
+                min(word["x0"] for word in candidate),
+                min(word["top"] for word in candidate),
+                max(word["x1"] for word in candidate),
+                max(word["bottom"] for word in candidate),
+            )
+    return None
+
+
+def _regions_for_page(page_no: int, width: float, height: float, labels: Dict[str, BBox]) -> Dict[str, FieldRegion]:
+    """Odvodí oblasti hodnot z pozic návěští na stránce.
+
+    Oblast sahá od návěští doprava k dalšímu návěští na stejném řádku (nebo k okraji stránky)
+    a dolů k nejbližšímu návěští pod ním, takže zachytí i hodnoty zalomené na další řádek.
+    """
+    regions = {}
+    for name, (x0, top, x1, bottom) in labels.items():
+        right = width
+        lower = None
+        for other_name, (ox0, otop, ox1, obottom) in labels.items():
+            if other_name == name:
+                continue
+            if abs(otop - top) < (bottom - top) / 2 and ox0 > x1:
+                right = min(right, ox0 - REGION_PADDING)
+            elif otop >= bottom - 1 and ox0 < right and ox1 > x0:
+                lower = otop if lower is None else min(lower, otop)
+        region_bottom = lower - 1 if lower is not None else bottom + (bottom - top) * LAST_REGION_LINES
+        regions[name] = FieldRegion(
+            page=page_no,
+            bbox=(
+                max(0.0, x0 - REGION_PADDING),
+                max(0.0, top - REGION_PADDING),
+                right,
+                min(height, max(bottom, region_bottom)),
+            ),
+            label_bbox=(x0, top, x1, bottom),
+        )
+    return regions
+
+
+def learn_layout(
+    source: PDFSource,
+    definitions: Optional[Dict[str, FieldDefinition]] = None,
+    max_pages: Optional[int] = None,
+) -> FormLayout:
+    """Naučí rozložení formuláře z referenčního PDF podle pozic návěští"""
+    definitions = definitions or FIELD_DEFINITIONS
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    import pdfplumber
+
+    layout = FormLayout()
+    remaining = dict(definitions)
+    with pdfplumber.open(source) as pdf:
+        for page_no, page in enumerate(pdf.pages, 1):
+            if not remaining or (max_pages and page_no > max_pages):
+                break
+            words = page.extract_words()
+            labels = {}
+            for name, definition in list(remaining.items()):
+                bbox = find_label(words, definition.label)
+                if bbox is not None:
+                    labels[name] = bbox
+                    del remaining[name]
+            if labels:
+                layout.page_sizes[page_no] = (float(page.width), float(page.height))
+                layout.regions.update(_regions_for_page(page_no, float(page.width), float(page.height), labels))
+
+    for name in remaining:
+        logger.warning(f"⚠️ Návěští '{name}' nebylo v referenčním PDF nalezeno")
+    return layout
+
+
+def _check_page_size(layout: FormLayout, page_no: int, width: float, height: float):
+    expected_width, expected_height = layout.page_sizes[page_no]
+    if abs(expected_width - width) > PAGE_SIZE_TOLERANCE or abs(expected_height - height) > PAGE_SIZE_TOLERANCE:
+        raise LayoutMismatch(f"Stránka {page_no} má jinou velikost než referenční formulář")
+
+
+def _region_texts_pdfium(source: PDFSource, layout: FormLayout) -> Dict[str, str]:
+    """Text oblastí přes PDFium - čte jen znaky uvnitř oblastí bez rozboru celé stránky"""
+    import pypdfium2 as pdfium
+
+    regions_by_page: Dict[int, List[Tuple[str, FieldRegion]]] = {}
+    for name, region in layout.regions.items():
+        regions_by_page.setdefault(region.page, []).append((name, region))
+
+    texts = {}
+    document = pdfium.PdfDocument(source)
+    try:
+        if len(document) < max(regions_by_page, default=0):
+            raise LayoutMismatch("Dokument má méně stránek než referenční formulář")
+        for page_no, regions in sorted(regions_by_page.items()):
+            page = document[page_no - 1]
+            textpage = page.get_textpage()
+            try:
+                width, height = page.get_size()
+                _check_page_size(layout, page_no, width, height)
+                for name, region in regions:
+                    x0, top, x1, bottom = region.bbox
+                    # PDFium má počátek souřadnic v levém dolním rohu
+                    text = textpage.get_text_bounded(left=x0, bottom=height - bottom, right=x1, top=height - top)
+                    texts[name] = text.replace("\r\n", "\n").replace("\r", "\n")
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        document.close()
+    return texts
+
+
+def _region_texts_pdfplumber(source: PDFSource, layout: FormLayout) -> Dict[str, str]:
+    """Text oblastí přes page.crop v pdfplumberu"""
+    import pdfplumber
+
+    texts = {}
+    with pdfplumber.open(source) as pdf:
+        if len(pdf.pages) < max(layout.pages, default=0):
+            raise LayoutMismatch("Dokument má méně stránek než referenční formulář")
+        for name, region in sorted(layout.regions.items(), key=lambda item: (item[1].page, item[1].bbox[1])):
+            page = pdf.pages[region.page - 1]
+            _check_page_size(layout, region.page, float(page.width), float(page.height))
+            texts[name] = page.crop(region.bbox).extract_text() or ""
+    return texts
+
+
+def extract_layout_text(source: PDFSource, layout: FormLayout, definitions: Optional[Dict[str, FieldDefinition]] = None) -> str:
+    """Vrátí text oblastí polí ve tvaru 'návěští hodnota' pro běžné vyhledávání polí.
+
+    Pokud v některé oblasti chybí návěští (jiná verze formuláře, posunutý obsah),
+    vyvolá LayoutMismatch a volající má použít běžnou extrakci celého textu.
+    """
+    definitions = definitions or FIELD_DEFINITIONS
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+    try:
+        texts = _region_texts_pdfium(source, layout)
+    except ImportError:
+        texts = _region_texts_pdfplumber(source, layout)
+
+    ordered = sorted(layout.regions.items(), key=lambda item: (item[1].page, item[1].bbox[1], item[1].bbox[0]))
+    parts = []
+    for name, _ in ordered:
+        text = texts.get(name, "")
+        label = definitions[name].label if name in definitions else name
+        if " ".join(label.split()) not in " ".join(text.split()):
+            raise LayoutMismatch(f"Návěští '{name}' není na naučené pozici")
+        parts.append(text.strip() + "\n")
+    return "".join(parts)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Naučí rozložení formuláře z referenčního PDF"""
+    parser = argparse.ArgumentParser(description="Naučí pozice polí formuláře z referenčního PDF")
+    parser.add_argument("reference", help="Referenční PDF formuláře")
+    parser.add_argument("-o", "--output", default="layout.json", help="Výstupní JSON s rozložením (výchozí: layout.json)")
+    parser.add_argument("--max-pages", type=int, default=None, help="Prohledat jen prvních N stránek")
+    args = parser.parse_args(argv)
+
+    layout = learn_layout(args.reference, max_pages=args.max_pages)
+    if not layout.regions:
+        print("❌ V referenčním PDF nebylo nalezeno žádné návěští")
+        return 1
+
+    for name, region in layout.regions.items():
+        x0, top, x1, bottom = region.bbox
+        print(f"   {name}: stránka {region.page}, oblast ({x0:.0f}, {top:.0f}) – ({x1:.0f}, {bottom:.0f})")
+    layout.save(args.output)
+    print(f"💾 Rozložení ({len(layout.regions)} polí) uloženo do {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
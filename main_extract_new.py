@@ -1,14 +1,27 @@
-import pdfplumber
+import io
+import logging
 import re
 import json
-import requests
-import pandas as pd
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
-from dotenv import load_dotenv
+import time
+from typing import TYPE_CHECKING, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from dataclasses import asdict, dataclass, fields, replace
 
-# Načti environment proměnné
-load_dotenv()
+from field_definitions import DEFAULT_MATCHER, FIELD_DEFINITIONS, IncrementalFieldScanner, normalize_number
+from ares_client import AresClient, empty_company_info, get_default_client
+from metrics import REGISTRY, DocumentMetrics, MetricsRegistry, configure_logging
+from layout_extractor import FormLayout, LayoutMismatch, extract_layout_text
+from form_registry import DEFAULT_REGISTRY, FormSpec, first_page_text
+from pdf_backends import TextBackend, backend_chain
+from acroform import AcroFormMapper, read_form_fields
+from text_spool import TextSpool
+from validation import INVALID, VALID, validate_ico, validate_personal_data
+from ocr import DEFAULT_LANG, DEFAULT_MIN_CHARS, PageOCR, available as ocr_available, with_ocr_fallback
+
+# pandas se načítá až v to_dataframe - extrakce ani pracovní procesy ho nepotřebují
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
 
 @dataclass
 class ExtractedData:
@@ -17,175 +30,481 @@ class ExtractedData:
     company_info: Optional[Dict[str, str]] = None
     raw_text: str = ""
     table_data: Optional[List[Dict[str, str]]] = None
+    page_count: int = 0
+    # Rozpoznaná verze formuláře (prázdné, pokud se nerozpoznávala)
+    form: str = ""
+    # Výsledek kontroly osobních údajů: {klíč: {status, confidence, message, value}}
+    validation: Optional[Dict[str, Dict]] = None
     
     def __post_init__(self):
         if self.personal_info is None:
             self.personal_info = {}
+        if self.validation is None:
+            self.validation = {}
         if self.company_info is None:
             self.company_info = {}
         if self.table_data is None:
             self.table_data = []
+    
+    def to_dict(self) -> Dict:
+        """Převede data na slovník vhodný pro JSON"""
+        return asdict(self)
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ExtractedData":
+        """Vytvoří instanci ze slovníku (opak to_dict)"""
+        known = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
+    
+    def to_dataframe(self) -> "pd.DataFrame":
+        """Vrátí data jako pandas DataFrame"""
+        import pandas as pd
+        
+        if self.table_data:
+            return pd.DataFrame(self.table_data)
+        
+        # Pokud není tabulková data, vytvoř DataFrame z osobních dat
+        if self.personal_info:
+            table_rows = []
+            for key, value in self.personal_info.items():
+                if value:  # Přidej pouze neprázdné hodnoty
+                    table_rows.append({'Pole': key, 'Hodnota': str(value)})
+            return pd.DataFrame(table_rows)
+        
+        return pd.DataFrame()
+
+@dataclass
+class ExtractionOptions:
+    """Nastavení extrakce"""
+    # Postupná extrakce po stránkách - skončí, jakmile jsou nalezena všechna pole
+    lazy: bool = False
+    # Maximální počet zpracovaných stránek (None = bez omezení)
+    max_pages: Optional[int] = None
+    # Stránky (číslované od 1), na kterých se má dané pole hledat - klíčem je název pole z field_definitions.
+    # Pole s nápovědou se po své poslední stránce dál nehledají, takže extrakce může skončit dřív.
+    page_hints: Optional[Dict[str, List[int]]] = None
+    # Cesta pro uložení extrahovaného textu pro debugování (None = neukládat)
+    debug_text_path: Optional[str] = None
+    # Naučené rozložení formuláře - čte se jen text v oblastech polí, při neshodě běžná extrakce
+    layout: Optional[FormLayout] = None
+    # Rozpoznat verzi formuláře podle první stránky a použít její definice polí;
+    # neznámé dokumenty se odmítnou bez extrakce celého textu
+    identify_form: bool = False
+    # Backend pro extrakci textu: "auto" (PDFium se zálohou na pdfplumber), "pdfium",
+    # "pypdf", "pdfplumber" nebo více názvů oddělených čárkou v pořadí zkoušení
+    backend: str = "auto"
+    # Interaktivní PDF: hodnoty se čtou přímo z polí AcroForm a text se vůbec neextrahuje
+    acroform: bool = True
+    # Mapování {název pole AcroForm: klíč osobních údajů nebo název pole z field_definitions}
+    acroform_mapping: Optional[Dict[str, str]] = None
+    # Volá se po každé přečtené stránce s jejím číslem (od 1); vyhozením ExtractionCancelled
+    # se extrakce přeruší
+    progress: Optional[Callable[[int], None]] = None
+    # Omezená paměť pro velmi velké dokumenty: text se po stránkách zapisuje do dočasného
+    # souboru a pole se hledají průběžně; v raw_text zůstane jen náhled ze začátku textu
+    bounded_memory: bool = False
+    # Maximální velikost extrahovaného textu v bajtech - po jejím dosažení se další stránky nečtou
+    max_text_bytes: Optional[int] = None
+    # Délka náhledu textu (znaky) uloženého do raw_text v režimu bounded_memory
+    text_preview_chars: int = 20000
+    # Kontrola osobních údajů (IČO, rodné číslo, data, částky) před dotazem do ARES
+    validate: bool = True
+    # OCR stránek bez textové vrstvy (naskenované žádosti) - vyžaduje pytesseract a Tesseract
+    ocr: bool = True
+    # Jazyk Tesseractu
+    ocr_lang: str = DEFAULT_LANG
+    # Stránka s méně znaky textu se rozpozná přes OCR
+    ocr_min_chars: int = DEFAULT_MIN_CHARS
+    # Počet procesů pro OCR (None = sdílený pool podle OCR_WORKERS, 0 = v aktuálním procesu)
+    ocr_workers: Optional[int] = None
+
+class ExtractionCancelled(Exception):
+    """Extrakce byla přerušena (vyhazuje ji callback progress)"""
+
+# Zdroj PDF: cesta k souboru, obsah v paměti nebo otevřený binární soubor
+PDFSource = Union[str, bytes, BinaryIO]
 
 class PDFExtractor:
     """Hlavní třída pro extrakci dat z PDF formulářů"""
     
-    def __init__(self, pdf_file: str):
+    # Definice polí pro extrakci - kompilují se jednou při importu modulu
+    field_definitions = FIELD_DEFINITIONS
+    field_matcher = DEFAULT_MATCHER
+    # Známé verze formulářů pro identify_form
+    form_registry = DEFAULT_REGISTRY
+    
+    def __init__(
+        self,
+        pdf_file: PDFSource,
+        ares_client: Optional[AresClient] = None,
+        options: Optional[ExtractionOptions] = None,
+        metrics: Optional[DocumentMetrics] = None,
+        metrics_registry: Optional[MetricsRegistry] = REGISTRY,
+    ):
         self.pdf_file = pdf_file
         self.text = ""
+        # Celý text v režimu bounded_memory (self.text je pak jen náhled)
+        self.text_spool: Optional[TextSpool] = None
+        # OCR naskenovaných stránek - vytvoří se při prvním průchodu stránkami
+        self.page_ocr: Optional[PageOCR] = None
         self.extracted_data = ExtractedData()
-        
-        # Definice polí pro extrakci
-        self.field_definitions = {
-            "Příjmení/Jméno": {
-                "keys": ["prijmeni", "jmeno"],
-                "pattern": r"Příjmení/Jméno\s+([A-Za-zÁ-Žá-ž\- ]+)",
-                "processor": self._split_name
-            },
-            "Rodné číslo/Datum narození": {
-                "keys": ["rodne_cislo", "datum_narozeni"],
-                "pattern": r"Rodné číslo/Datum narození\s+([0-9]{9,10})\s+([0-9]{1,2}\.[0-9]{1,2}\.[0-9]{4})",
-                "processor": self._split_rc_date
-            },
-            "Místo narození: město/stát": {
-                "keys": ["misto_narozeni_mesto", "misto_narozeni_stat"],
-                "pattern": r"Místo narození: město/stát\s+([A-Za-z0-9 .\-]+)\s+([A-Za-z ]+)",
-                "processor": self._split_city_state
-            },
-            "Pohlaví/Státní občanství": {
-                "keys": ["pohlavi", "statni_obcanstvi"],
-                "pattern": r"Pohlaví/Státní občanství\s+([a-zA-Zěščřžýáíéúůó ]+)\s+([a-zA-ZěščřžýáíéúůóĚŠČŘŽÝÁÍÉÚŮÓ ]+)",
-                "processor": self._split_gender_citizenship
-            },
-            "Telefon/E-mail": {
-                "keys": ["telefon", "email"],
-                "pattern": r"Telefon/E-mail\s+([0-9 ]+)\s+([a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)",
-                "processor": self._split_phone_email
-            },
-            "IČO zaměstnavatele nebo OSVČ": {
-                "keys": ["ico"],
-                "pattern": r"IČO zaměstnavatele nebo OSVČ\s+([0-9]{8})",
-                "processor": lambda x: x
-            },
-            "Čistý příjem": {
-                "keys": ["cisty_prijem"],
-                "pattern": r"Čistý příjem\s+([0-9\.,]+)",
-                "processor": self._normalize_number
-            },
-            "Měsíční životní náklady": {
-                "keys": ["mesicni_naklady"],
-                "pattern": r"Měsíční životní náklady.*?([0-9\.,]+)",
-                "processor": self._normalize_number
-            },
-            "Datum nástupu": {
-                "keys": ["datum_nastupu"],
-                "pattern": r"Datum nástupu do zaměstnání nebo zahájení podnikání\s+([0-9]{2}\.[0-9]{2}\.[0-9]{4})",
-                "processor": lambda x: x
-            },
-            "Nejvyšší dosažené vzdělání": {
-                "keys": ["nejvyssi_vzdelani"],
-                "pattern": r"Nejvyšší dosažené vzdělání\s+[0-9]+\s+([A-Za-zěščřžýáíéúůóĚŠČŘŽÝÁÍÉÚŮÓ ]+)",
-                "processor": lambda x: x.strip()
-            },
-            "Povolání/Ekonomický sektor": {
-                "keys": ["povolani"],
-                "pattern": r"Povolání/Ekonomický sektor\s+([A-Za-zěščřžýáíéúůóĚŠČŘŽÝÁÍÉÚŮÓ, ]+)",
-                "processor": lambda x: x.strip()
-            }
-        }
+        self.ares_client = ares_client
+        self.options = options or ExtractionOptions()
+        self.metrics = metrics or DocumentMetrics(source=pdf_file if isinstance(pdf_file, str) else "")
+        # Registr souhrnných metrik (None = nezapočítávat)
+        self.metrics_registry = metrics_registry
+    
+    @classmethod
+    def from_text(cls, text: str, options: Optional[ExtractionOptions] = None) -> "PDFExtractor":
+        """Extraktor nad už extrahovaným textem - pro opakované vyhledání polí bez čtení PDF.
+
+        Použitelné jsou jen metody pracující s textem (extract_personal_data, extract_table_data).
+        """
+        extractor = cls("", options=options, metrics_registry=None)
+        extractor.text = text
+        extractor.extracted_data.raw_text = text
+        return extractor
+    
+    def _pdf_source(self) -> Union[str, BinaryIO]:
+        """Vrátí zdroj PDF jako cestu nebo binární proud nastavený na začátek"""
+        source = self.pdf_file
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        elif hasattr(source, "seek"):
+            source.seek(0)
+        return source
+    
+    def _save_debug_text(self, text: str):
+        """Uloží extrahovaný text pro debugování, pokud je to zapnuté"""
+        if self.options.debug_text_path:
+            with open(self.options.debug_text_path, "w", encoding="utf-8") as f:
+                if self.text_spool is not None:
+                    self.text_spool.copy_to(f)
+                else:
+                    f.write(text)
+    
+    def iter_text_lines(self) -> Iterator[str]:
+        """Řádky extrahovaného textu - v režimu bounded_memory se čtou z dočasného souboru"""
+        if self.text_spool is not None:
+            return self.text_spool.lines()
+        return iter(self.text.split('\n'))
+    
+    def close(self):
+        """Uvolní dočasný soubor s textem (režim bounded_memory)"""
+        if self.text_spool is not None:
+            self.text_spool.close()
+            self.text_spool = None
+    
+    def _report_progress(self, page_no: int):
+        """Ohlásí zpracovanou stránku callbacku z options.progress"""
+        if self.options.progress is not None:
+            self.options.progress(page_no)
+    
+    def _iter_pages(self, backend: TextBackend, wanted: Optional[Callable[[int], bool]] = None) -> Iterator[str]:
+        """Text stránek daným backendem; stránky bez textové vrstvy se doplní přes OCR"""
+        pages = backend.iter_pages(self._pdf_source())
+        if not self.options.ocr:
+            return pages
+        return with_ocr_fallback(pages, self._get_page_ocr(), self.options.ocr_min_chars, wanted)
+    
+    def _get_page_ocr(self) -> PageOCR:
+        """OCR dokumentu - sdílené všemi průchody, aby se stránky nerozpoznávaly znovu"""
+        if self.page_ocr is None:
+            self.page_ocr = PageOCR(self._pdf_source(), self.options.ocr_lang, workers=self.options.ocr_workers)
+        return self.page_ocr
+    
+    def _read_text(self, backend: TextBackend) -> Tuple[str, int]:
+        """Přečte text všech stránek (nejvýše max_pages) daným backendem"""
+        parts = []
+        page_count = 0
+        for page_no, t in enumerate(self._iter_pages(backend), 1):
+            if self.options.max_pages and page_no > self.options.max_pages:
+                break
+            page_count = page_no
+            if t:
+                parts.append(t + "\n")
+            self._report_progress(page_no)
+        return "".join(parts), page_count
     
     def extract_text_from_pdf(self) -> str:
-        """Extrahuje text z PDF souboru"""
-        text = ""
+        """Extrahuje text z PDF souboru.
+
+        Backendy se zkoušejí v pořadí podle options.backend. Pokud v textu backendu chybí
+        některé pole, zkusí se další a použije se text, ve kterém se našlo nejvíce polí.
+        """
+        best_text, best_found = "", -1
+        error = None
+        chain = backend_chain(self.options.backend)
+        total = len(self.field_matcher.definitions)
+        for index, backend in enumerate(chain):
+            try:
+                text, page_count = self._read_text(backend)
+            except ExtractionCancelled:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Chyba při extrakci textu ({backend.name}): {e}")
+                error = e
+                continue
+            
+            found = len(self.field_matcher.find(text))
+            if found > best_found:
+                best_text, best_found = text, found
+                self.extracted_data.page_count = page_count
+                self.metrics.backend = backend.name
+            if found == total:
+                break
+            if index + 1 < len(chain):
+                logger.info(f"↩️ Backend {backend.name} našel {found}/{total} polí, zkouším {chain[index + 1].name}")
+        
+        if best_found < 0:
+            logger.error(f"❌ Chyba při extrakci textu: {error}")
+            self.metrics.error = f"{type(error).__name__}: {error}"
+            return ""
+        
+        self._save_debug_text(best_text)
+        logger.info(f"✅ Text úspěšně extrahován z PDF ({self.metrics.backend})")
+        return best_text
+    
+    def _scan_text(self, backend: TextBackend) -> Tuple[str, IncrementalFieldScanner, int]:
+        """Čte stránky daným backendem a průběžně hledá pole, dokud nejsou všechna nalezena"""
+        scanner = IncrementalFieldScanner(self.field_matcher, self.options.page_hints)
+        parts = []
+        page_count = 0
+        pages = self._iter_pages(backend, scanner.needs_page)
         try:
-            with pdfplumber.open(self.pdf_file) as pdf:
-                for page in pdf.pages:
-                    t = page.extract_text()
-                    if t:
-                        text += t + "\n"
+            for page_no, t in enumerate(pages, 1):
+                if self.options.max_pages and page_no > self.options.max_pages:
+                    break
+                if not scanner.needs_page(page_no):
+                    continue
+                page_count += 1
+                page_text = t + "\n" if t else ""
+                parts.append(page_text)
+                scanner.feed(page_no, page_text)
+                self._report_progress(page_no)
+                if scanner.done:
+                    break
+        finally:
+            pages.close()
+        scanner.finish()
+        return "".join(parts), scanner, page_count
+    
+    def extract_text_lazily(self) -> Tuple[str, Dict[str, str]]:
+        """Extrahuje text po stránkách a průběžně hledá pole.
+
+        Další stránky se neotevírají, jakmile jsou nalezena všechna pole z field_definitions
+        (s ohledem na page_hints) nebo je vyčerpán limit max_pages. Vrací text zpracovaných
+        stránek a nalezená osobní data. Při chybějících polích se zkusí další backend
+        stejně jako v extract_text_from_pdf.
+        """
+        best: Optional[Tuple[str, IncrementalFieldScanner]] = None
+        error = None
+        chain = backend_chain(self.options.backend)
+        total = len(self.field_matcher.definitions)
+        for index, backend in enumerate(chain):
+            try:
+                text, scanner, page_count = self._scan_text(backend)
+            except ExtractionCancelled:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Chyba při extrakci textu ({backend.name}): {e}")
+                error = e
+                continue
             
-            # Ulož extrahovaný text pro debugování
-            with open("extrahovany_text.txt", "w", encoding="utf-8") as f:
-                f.write(text)
+            found = len(scanner.found)
+            if best is None or found > len(best[1].found):
+                best = (text, scanner)
+                self.extracted_data.page_count = page_count
+                self.metrics.backend = backend.name
+            if found == total:
+                break
+            if index + 1 < len(chain):
+                logger.info(f"↩️ Backend {backend.name} našel {found}/{total} polí, zkouším {chain[index + 1].name}")
+        
+        if best is None:
+            logger.error(f"❌ Chyba při extrakci textu: {error}")
+            self.metrics.error = f"{type(error).__name__}: {error}"
+            return "", {}
+        
+        text, scanner = best
+        self._save_debug_text(text)
+        logger.info(f"✅ Text úspěšně extrahován z PDF ({self.extracted_data.page_count} stránek, {self.metrics.backend})")
+        return text, scanner.values()
+    
+    def _spool_text(self, backend: TextBackend) -> Tuple[TextSpool, IncrementalFieldScanner, int]:
+        """Zapisuje text stránek do dočasného souboru a průběžně v něm hledá pole.
+
+        V paměti je vždy jen text aktuální stránky a konec předchozí (okno scanneru).
+        Čtení skončí po max_pages stránkách, po překročení max_text_bytes, nebo u options.lazy
+        po nalezení všech polí.
+        """
+        scanner = IncrementalFieldScanner(self.field_matcher, self.options.page_hints)
+        spool = TextSpool()
+        page_count = 0
+        pages = self._iter_pages(backend, scanner.needs_page if self.options.lazy else None)
+        try:
+            for page_no, t in enumerate(pages, 1):
+                if self.options.max_pages and page_no > self.options.max_pages:
+                    break
+                if self.options.lazy and not scanner.needs_page(page_no):
+                    continue
+                page_count += 1
+                page_text = t + "\n" if t else ""
+                spool.write(page_text)
+                scanner.feed(page_no, page_text)
+                self._report_progress(page_no)
+                if self.options.max_text_bytes and spool.bytes_written >= self.options.max_text_bytes:
+                    logger.warning(f"⚠️ Dosažen limit textu {self.options.max_text_bytes} B po {page_no} stránkách, další stránky se nečtou")
+                    break
+                if self.options.lazy and scanner.done:
+                    break
+        except BaseException:
+            spool.close()
+            raise
+        finally:
+            pages.close()
+        scanner.finish()
+        return spool, scanner, page_count
+    
+    def extract_text_bounded(self) -> Tuple[str, Dict[str, str]]:
+        """Extrahuje text s omezenou pamětí nezávislou na počtu stránek.
+
+        Celý text je v self.text_spool (dočasný soubor), vrací se jen jeho náhled
+        a osobní data nalezená během čtení. Záloha na další backend funguje stejně
+        jako v extract_text_lazily.
+        """
+        best: Optional[Tuple[TextSpool, IncrementalFieldScanner]] = None
+        error = None
+        chain = backend_chain(self.options.backend)
+        total = len(self.field_matcher.definitions)
+        for index, backend in enumerate(chain):
+            try:
+                spool, scanner, page_count = self._spool_text(backend)
+            except ExtractionCancelled:
+                if best is not None:
+                    best[0].close()
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Chyba při extrakci textu ({backend.name}): {e}")
+                error = e
+                continue
             
-            print("✅ Text úspěšně extrahován z PDF")
-            return text
+            found = len(scanner.found)
+            if best is None or found > len(best[1].found):
+                if best is not None:
+                    best[0].close()
+                best = (spool, scanner)
+                self.extracted_data.page_count = page_count
+                self.metrics.backend = backend.name
+            else:
+                spool.close()
+            if found == total:
+                break
+            if index + 1 < len(chain):
+                logger.info(f"↩️ Backend {backend.name} našel {found}/{total} polí, zkouším {chain[index + 1].name}")
+        
+        if best is None:
+            logger.error(f"❌ Chyba při extrakci textu: {error}")
+            self.metrics.error = f"{type(error).__name__}: {error}"
+            return "", {}
+        
+        spool, scanner = best
+        self.text_spool = spool
+        if not spool.chars:
+            self.close()
+            return "", scanner.values()
+        self._save_debug_text("")
+        logger.info(
+            f"✅ Text úspěšně extrahován z PDF ({self.extracted_data.page_count} stránek, "
+            f"{spool.bytes_written / 1024:.0f} KB{', na disku' if spool.on_disk else ''}, {self.metrics.backend})"
+        )
+        return spool.preview(self.options.text_preview_chars), scanner.values()
+    
+    def identify_form(self) -> Optional[FormSpec]:
+        """Rozpozná verzi formuláře podle první stránky a přepne se na její definice polí"""
+        try:
+            text = first_page_text(self._pdf_source())
         except Exception as e:
-            print(f"❌ Chyba při extrakci textu: {e}")
-            return ""
+            logger.error(f"❌ Chyba při čtení první stránky: {e}")
+            return None
+        
+        # Naskenovaná první stránka se rozpozná hned - text z OCR pak použije i extrakce
+        if self.options.ocr and len(text.strip()) < self.options.ocr_min_chars and ocr_available():
+            try:
+                text = self._get_page_ocr().submit(0).result()
+            except Exception as e:
+                logger.warning(f"⚠️ Chyba OCR první stránky: {e}")
+        
+        spec = self.form_registry.identify(text)
+        if spec is None:
+            return None
+        
+        self.field_definitions = spec.definitions
+        self.field_matcher = spec.matcher
+        self.extracted_data.form = spec.name
+        self.metrics.form = spec.name
+        if spec.layout is not None and self.options.layout is None:
+            self.options = replace(self.options, layout=spec.layout)
+        if spec.page_hints is not None and self.options.page_hints is None:
+            self.options = replace(self.options, page_hints=spec.page_hints)
+        logger.info(f"🧾 Rozpoznán formulář: {spec.name}")
+        return spec
     
-    def _split_name(self, full_name: str) -> Tuple[str, str]:
-        """Rozdělí celé jméno na příjmení a jméno"""
-        parts = full_name.strip().split()
-        if len(parts) >= 2:
-            return parts[0], " ".join(parts[1:])
-        elif len(parts) == 1:
-            return parts[0], ""
-        return "", ""
-    
-    def _split_rc_date(self, match) -> Tuple[str, str]:
-        """Rozdělí rodné číslo a datum narození"""
-        return match.group(1), match.group(2)
-    
-    def _split_city_state(self, match) -> Tuple[str, str]:
-        """Rozdělí město a stát narození"""
-        return match.group(1).strip(), match.group(2).strip()
-    
-    def _split_gender_citizenship(self, match) -> Tuple[str, str]:
-        """Rozdělí pohlaví a státní občanství"""
-        return match.group(1).strip(), match.group(2).strip()
-    
-    def _split_phone_email(self, match) -> Tuple[str, str]:
-        """Rozdělí telefon a email"""
-        phone = match.group(1).replace(" ", "")
-        email = match.group(2)
-        return phone, email
+    def extract_form_fields(self) -> Dict[str, str]:
+        """Přečte osobní data z polí interaktivního formuláře (AcroForm).
+
+        U plochého PDF nebo formuláře bez namapovaných vyplněných polí vrací prázdný slovník.
+        Jako text dokumentu se uloží seznam vyplněných polí ve tvaru "název: hodnota".
+        """
+        try:
+            form_values = read_form_fields(self._pdf_source())
+        except Exception as e:
+            logger.warning(f"⚠️ Chyba při čtení polí formuláře: {e}")
+            return {}
+        if not form_values:
+            return {}
+        
+        personal_data = AcroFormMapper(self.options.acroform_mapping, self.field_definitions).map(form_values)
+        if personal_data:
+            self.text = "".join(f"{name}: {value}\n" for name, value in form_values.items() if value)
+            self.metrics.backend = "acroform"
+            logger.info(f"✅ Data přečtena z polí formuláře ({len(personal_data)} hodnot)")
+        return personal_data
+    
+    def extract_text_by_layout(self) -> str:
+        """Extrahuje jen text oblastí polí podle naučeného rozložení formuláře.
+
+        Vrací prázdný řetězec, pokud dokument rozložení neodpovídá.
+        """
+        layout = self.options.layout
+        try:
+            text = extract_layout_text(self._pdf_source(), layout, self.field_definitions)
+        except LayoutMismatch as e:
+            logger.info(f"↩️ Rozložení formuláře neodpovídá ({e}), použiji běžnou extrakci")
+            return ""
+        except Exception as e:
+            logger.warning(f"⚠️ Chyba při extrakci podle rozložení: {e}")
+            return ""
+        
+        self.extracted_data.page_count = len(layout.pages)
+        self._save_debug_text(text)
+        logger.info(f"✅ Text extrahován podle rozložení formuláře ({len(layout.regions)} polí)")
+        return text
     
     def _normalize_number(self, number_str: str) -> str:
         """Normalizuje číselné hodnoty (odstraní mezery, převede čárky na tečky)"""
-        return number_str.replace(".", "").replace(",", ".")
+        return normalize_number(number_str)
     
     def extract_personal_data(self) -> Dict[str, str]:
-        """Extrahuje osobní data pomocí regex patternů"""
-        personal_data = {}
-        
-        for field_name, field_def in self.field_definitions.items():
-            pattern = field_def["pattern"]
-            keys = field_def["keys"]
-            processor = field_def["processor"]
-            
-            match = re.search(pattern, self.text)
-            if match:
-                if len(keys) == 1:
-                    # Jedna hodnota
-                    value = processor(match.group(1))
-                    personal_data[keys[0]] = value
-                elif len(keys) == 2:
-                    # Dvě hodnoty
-                    if processor == self._split_name:
-                        value1, value2 = processor(match.group(1))
-                    elif processor == self._split_rc_date:
-                        value1, value2 = processor(match)
-                    elif processor == self._split_city_state:
-                        value1, value2 = processor(match)
-                    elif processor == self._split_gender_citizenship:
-                        value1, value2 = processor(match)
-                    elif processor == self._split_phone_email:
-                        value1, value2 = processor(match)
-                    else:
-                        value1, value2 = match.group(1), match.group(2)
-                    
-                    personal_data[keys[0]] = value1
-                    personal_data[keys[1]] = value2
-        
-        return personal_data
+        """Extrahuje osobní data pomocí předkompilovaných definic polí"""
+        return self.field_matcher.extract(self.text)
     
     def extract_table_data(self) -> List[Dict[str, str]]:
         """Extrahuje data z tabulky pomocí strukturovaného přístupu"""
         table_data = []
-        lines = self.text.split('\n')
         in_table = False
         
-        for line in lines:
+        for line in self.iter_text_lines():
             # Najdi začátek tabulky
             if 'I. Osobní údaje žadatele' in line:
                 in_table = True
@@ -213,156 +532,139 @@ class PDFExtractor:
         
         return table_data
     
+    def validate_personal_data(self, personal_data: Dict[str, str]) -> Dict[str, Dict]:
+        """Zkontroluje osobní data a výsledek uloží do extracted_data.validation"""
+        keys = [key for definition in self.field_definitions.values() for key in definition.keys]
+        results = validate_personal_data(personal_data, keys)
+        for key, result in results.items():
+            if result.status == INVALID:
+                logger.warning(f"⚠️ Neplatná hodnota pole {key}: {result.message}")
+        self.metrics.fields_invalid = [key for key, result in results.items() if result.status == INVALID]
+        self.extracted_data.validation = {key: result.to_dict() for key, result in results.items()}
+        return self.extracted_data.validation
+    
     def get_company_info_via_ares(self, ico: str) -> Dict[str, str]:
         """Dohledá informace o firmě podle IČO pomocí ARES API"""
-        if not ico or len(ico) != 8:
-            print(f"⚠️ Neplatné IČO: {ico}")
-            return {
-                "ico": ico,
-                "firma_nazev": "",
-                "firma_sidlo": "",
-                "status": "",
-                "typ_subjektu": "",
-                "obor_podnikani": ""
-            }
-        
-        try:
-            print(f"🔍 Dohledávám informace o firmě s IČO: {ico}")
-            
-            url = f"https://ares.gov.cz/ekonomicke-subjekty-v-be/rest/ekonomicke-subjekty/{ico}"
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': 'application/json'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                company_info = {
-                    "ico": ico,
-                    "firma_nazev": data.get('obchodniJmeno', ''),
-                    "firma_sidlo": self._format_address(data.get('sidlo', {})),
-                    "status": data.get('stav', ''),
-                    "typ_subjektu": data.get('pravniForma', ''),
-                    "obor_podnikani": self._get_business_field(data)
-                }
-                
-                print(f"✅ Informace o firmě dohledány: {company_info['firma_nazev']}")
-                return company_info
-                
-            elif response.status_code == 404:
-                print(f"❌ Firma s IČO {ico} nebyla nalezena v ARES")
-                return {
-                    "ico": ico,
-                    "firma_nazev": "",
-                    "firma_sidlo": "",
-                    "status": "Nenalezeno",
-                    "typ_subjektu": "",
-                    "obor_podnikani": ""
-                }
-            else:
-                print(f"❌ Chyba při dotazu na ARES: HTTP {response.status_code}")
-                return {
-                    "ico": ico,
-                    "firma_nazev": "",
-                    "firma_sidlo": "",
-                    "status": f"Chyba HTTP {response.status_code}",
-                    "typ_subjektu": "",
-                    "obor_podnikani": ""
-                }
-                
-        except Exception as e:
-            print(f"❌ Chyba při dohledávání firmy: {e}")
-            return {
-                "ico": ico,
-                "firma_nazev": "",
-                "firma_sidlo": "",
-                "status": "Chyba připojení",
-                "typ_subjektu": "",
-                "obor_podnikani": ""
-            }
-    
-    def _format_address(self, sidlo: Dict) -> str:
-        """Formátuje adresu sídla firmy"""
-        if not sidlo:
-            return ""
-        
-        ulice = str(sidlo.get('ulice', ''))
-        cislo = str(sidlo.get('cisloDomovni', ''))
-        cast_obce = str(sidlo.get('castObce', ''))
-        obec = str(sidlo.get('obec', ''))
-        psc = str(sidlo.get('psc', ''))
-        textova_adresa = str(sidlo.get('textovaAdresa', ''))
-        
-        if not ulice and textova_adresa:
-            # Použij textovou adresu a naformátuj PSČ
-            return re.sub(r"(\b\d{3})(\d{2}\b)", r"\1 \2", textova_adresa)
+        check = validate_ico(ico)
+        if check.status != VALID:
+            logger.warning(f"⚠️ Neplatné IČO: {ico} ({check.message or 'chybí'}), do ARES se neposílá")
+            self.metrics.ares_status = "invalid"
+            return empty_company_info(ico, "Neplatné IČO")
         
-        adresa_parts = []
-        if ulice:
-            adresa_parts.append(ulice)
-            if cislo:
-                adresa_parts.append(cislo)
-        elif cislo:
-            adresa_parts.append(cislo)
-        
-        if psc:
-            if len(psc) == 5:
-                psc_fmt = f"{psc[:3]} {psc[3:]}"
-            else:
-                psc_fmt = psc
-            adresa_parts.append(psc_fmt)
-        
-        if cast_obce:
-            adresa_parts.append(cast_obce)
-        
-        if obec:
-            adresa_parts.append(obec)
-        
-        return ", ".join(adresa_parts)
-    
-    def _get_business_field(self, data: Dict) -> str:
-        """Extrahuje obor podnikání z ARES dat"""
-        if 'predmetPodnikani' in data and data['predmetPodnikani']:
-            obor = data['predmetPodnikani'][0] if isinstance(data['predmetPodnikani'], list) else data['predmetPodnikani']
-            return obor
-        return ""
+        logger.info(f"🔍 Dohledávám informace o firmě s IČO: {ico}")
+        if self.ares_client is None:
+            self.ares_client = get_default_client()
+        started = time.perf_counter()
+        company_info, kind = self.ares_client.lookup(ico)
+        self.metrics.ares_latency_ms = round((time.perf_counter() - started) * 1000, 3)
+        self.metrics.ares_status = kind
+        if company_info["firma_nazev"]:
+            logger.info(f"✅ Informace o firmě dohledány: {company_info['firma_nazev']}")
+        return company_info
     
     def extract_all_data(self) -> ExtractedData:
         """Hlavní metoda pro extrakci všech dat"""
-        print("🔄 Začínám extrakci dat z PDF...")
+        with self.metrics.activate():
+            try:
+                with self.metrics.stage("total"):
+                    return self._extract_all_data()
+            except ExtractionCancelled:
+                logger.info("⏹️ Extrakce přerušena")
+                self.metrics.status = "cancelled"
+                raise
+            finally:
+                self._finish_metrics()
+                # Dočasný soubor s celým textem (bounded_memory) už není potřeba - v raw_text je náhled
+                self.close()
+    
+    def _extract_all_data(self) -> ExtractedData:
+        """Jednotlivé fáze extrakce s měřením doby trvání"""
+        logger.info("🔄 Začínám extrakci dat z PDF...")
+        
+        # 0. Rozpoznej verzi formuláře - neznámé dokumenty se dál nezpracovávají
+        if self.options.identify_form:
+            with self.metrics.stage("identify"):
+                spec = self.identify_form()
+            if spec is None:
+                logger.warning("⛔ Neznámý formulář, dokument se nezpracuje")
+                self.metrics.status = "rejected"
+                self.metrics.error = "Neznámý formulář"
+                return self.extracted_data
         
         # 1. Extrahuj text z PDF
-        self.text = self.extract_text_from_pdf()
+        personal_data = None
+        if self.options.acroform:
+            with self.metrics.stage("acroform"):
+                personal_data = self.extract_form_fields() or None
+        if personal_data is None and self.options.layout is not None:
+            with self.metrics.stage("layout"):
+                self.text = self.extract_text_by_layout()
+        if not self.text:
+            with self.metrics.stage("text"):
+                if self.options.bounded_memory:
+                    self.text, personal_data = self.extract_text_bounded()
+                elif self.options.lazy:
+                    self.text, personal_data = self.extract_text_lazily()
+                else:
+                    self.text = self.extract_text_from_pdf()
         if not self.text:
-            print("❌ Nepodařilo se extrahovat text z PDF")
+            logger.error("❌ Nepodařilo se extrahovat text z PDF")
             return self.extracted_data
         
         self.extracted_data.raw_text = self.text
         
         # 2. Extrahuj osobní data
-        print("📋 Extrahuji osobní data...")
-        personal_data = self.extract_personal_data()
+        logger.info("📋 Extrahuji osobní data...")
+        if personal_data is None:
+            with self.metrics.stage("fields"):
+                personal_data = self.extract_personal_data()
         self.extracted_data.personal_info = personal_data
+        self._count_fields(personal_data)
         
-        # 3. Extrahuj tabulková data
-        print("📊 Extrahuji tabulková data...")
-        table_data = self.extract_table_data()
+        # 3. Zkontroluj osobní data - neplatné IČO se do ARES neposílá
+        if self.options.validate:
+            with self.metrics.stage("validate"):
+                self.validate_personal_data(personal_data)
+        
+        # 4. Extrahuj tabulková data
+        logger.info("📊 Extrahuji tabulková data...")
+        with self.metrics.stage("table"):
+            table_data = self.extract_table_data()
         self.extracted_data.table_data = table_data
         
-        # 4. Dohledej informace o firmě
+        # 5. Dohledej informace o firmě
         if personal_data.get("ico"):
-            print("🏢 Dohledávám informace o firmě...")
-            company_info = self.get_company_info_via_ares(personal_data["ico"])
+            logger.info("🏢 Dohledávám informace o firmě...")
+            with self.metrics.stage("ares"):
+                company_info = self.get_company_info_via_ares(personal_data["ico"])
             self.extracted_data.company_info = company_info
             # Přidej informace o firmě do osobních dat
             self.extracted_data.personal_info.update(company_info)
         
-        print("✅ Extrakce dokončena")
+        logger.info("✅ Extrakce dokončena")
         return self.extracted_data
     
+    def _count_fields(self, personal_data: Dict[str, str]):
+        """Zaznamená do metrik nalezená a chybějící pole"""
+        keys = [key for definition in self.field_definitions.values() for key in definition.keys]
+        self.metrics.fields_found = [key for key in keys if personal_data.get(key)]
+        self.metrics.fields_missed = [key for key in keys if not personal_data.get(key)]
+    
+    def _finish_metrics(self):
+        """Doplní souhrnné údaje, zapíše strukturovaný log a započítá dokument do registru"""
+        self.metrics.page_count = self.extracted_data.page_count
+        self.metrics.text_chars = self.text_spool.chars if self.text_spool is not None else len(self.text)
+        if self.page_ocr is not None:
+            self.metrics.ocr_pages = self.page_ocr.pages_recognized
+            self.metrics.ocr_cached_pages = self.page_ocr.pages_cached
+        self.metrics.status = self.metrics.status or ("ok" if self.text else "error")
+        logger.info(
+            f"📈 Dokument zpracován za {self.metrics.stages.get('total', 0):.0f} ms",
+            extra={"metrics": self.metrics.to_dict()},
+        )
+        if self.metrics_registry is not None:
+            self.metrics_registry.record_document(self.metrics)
+    
     def save_to_json(self, output_file: str = "data.json"):
         """Uloží extrahovaná data do JSON souboru"""
         data_to_save = {
@@ -374,29 +676,23 @@ class PDFExtractor:
         with open(output_file, "w", encoding="utf-8") as f:
             json.dump(data_to_save, f, ensure_ascii=False, indent=2)
         
-        print(f"💾 Data uložena do {output_file}")
+        logger.info(f"💾 Data uložena do {output_file}")
     
-    def get_dataframe(self) -> pd.DataFrame:
+    def get_dataframe(self) -> "pd.DataFrame":
         """Vrátí data jako pandas DataFrame"""
-        if self.extracted_data.table_data:
-            return pd.DataFrame(self.extracted_data.table_data)
-        
-        # Pokud není tabulková data, vytvoř DataFrame z osobních dat
-        if self.extracted_data.personal_info:
-            table_rows = []
-            for key, value in self.extracted_data.personal_info.items():
-                if value:  # Přidej pouze neprázdné hodnoty
-                    table_rows.append({'Pole': key, 'Hodnota': str(value)})
-            return pd.DataFrame(table_rows)
-        
-        return pd.DataFrame()
+        return self.extracted_data.to_dataframe()
 
 def main():
     """Hlavní funkce pro spuštění extrakce"""
+    from dotenv import load_dotenv
+    
+    # Načti environment proměnné
+    load_dotenv()
+    configure_logging()
     pdf_file = "zadost.pdf"
     
     # Vytvoř instanci extraktoru
-    extractor = PDFExtractor(pdf_file)
+    extractor = PDFExtractor(pdf_file, options=ExtractionOptions(debug_text_path="extrahovany_text.txt"))
     
     # Extrahuj všechna data
     extracted_data = extractor.extract_all_data()
@@ -1,5 +1,6 @@
 import json
-from docx import Document
+
+from docx_template import load_template
 
 def normalize_title_from_education(edu_str):
     if not edu_str:
@@ -17,72 +18,69 @@ def normalize_title_from_education(edu_str):
         return "MUDr."
     return ""
 
-def replace_in_paragraph(paragraph, mapping):
-    for key, value in mapping.items():
-        placeholder = f"(({key}))"
-        if placeholder in paragraph.text:
-            inline = paragraph.runs
-            for i in range(len(inline)):
-                if placeholder in inline[i].text:
-                    inline[i].text = inline[i].text.replace(placeholder, str(value))
-
-def replace_in_table(table, mapping):
-    for row in table.rows:
-        for cell in row.cells:
-            for paragraph in cell.paragraphs:
-                replace_in_paragraph(paragraph, mapping)
+def build_mapping(data):
+    """Sestaví mapování zástupných textů šablony na extrahovaná data"""
+    # Získej normalizovaný titul z nejvyssi_vzdelani
+    nejvyssi_vzdelani = data.get("nejvyssi_vzdelani", "")
+    titul_pred = normalize_title_from_education(nejvyssi_vzdelani)
+    
+    return {
+        "nazev_firmy": data.get("firma_nazev", ""),
+        "sidlo_firmy": data.get("firma_sidlo", ""),
+        "titul_pred": titul_pred,
+        "jmeno": data.get("jmeno", ""),
+        "prijmeni": data.get("prijmeni", ""),
+        "ico": data.get("ico", ""),
+        "datum_narozeni": data.get("datum_narozeni", ""),
+        "nejvyssi_vzdelani": nejvyssi_vzdelani,
+        "datum_nastupu": data.get("datum_nastupu", ""),
+        "povolani": data.get("povolani", ""),
+        # Přidej další pole dle potřeby
+    }
 
 # === Funkce pro Streamlit ===
-def fill_document(template_name, output_filename=None):
+def render_document(template_name, data):
+    """
+    Vyplní šablonu daty z paměti a vrátí obsah dokumentu.
+    Nečte ani nezapisuje žádné soubory kromě šablony, je tedy bezpečná pro souběžné uživatele.
+    
+    Args:
+        template_name (str): Název šablony
+        data (dict): Extrahovaná data (personal_info)
+    
+    Returns:
+        bytes: Obsah vyplněného DOCX
+    """
+    # Načti zkompilovanou šablonu (kompiluje se jen při prvním použití nebo změně souboru)
+    template = load_template(template_name)
+    return template.render(build_mapping(data))
+
+def fill_document(template_name, output_filename=None, data=None):
     """
-    Vyplní dokument podle šablony a dat z data.json.
-    Pro použití ve Streamlit aplikaci.
+    Vyplní dokument podle šablony a dat a uloží ho do souboru.
     
     Args:
         template_name (str): Název šablony
         output_filename (str): Název výstupního souboru (volitelné)
+        data (dict): Extrahovaná data (volitelné, jinak se načtou z data.json)
     """
     try:
         # Načti data
-        with open("data.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        # Získej normalizovaný titul z nejvyssi_vzdelani
-        nejvyssi_vzdelani = data.get("nejvyssi_vzdelani", "")
-        titul_pred = normalize_title_from_education(nejvyssi_vzdelani)
+        if data is None:
+            with open("data.json", "r", encoding="utf-8") as f:
+                data = json.load(f)
         
         # Mapování zástupců na data
-        mapping = {
-            "nazev_firmy": data.get("firma_nazev", ""),
-            "sidlo_firmy": data.get("firma_sidlo", ""),
-            "titul_pred": titul_pred,
-            "jmeno": data.get("jmeno", ""),
-            "prijmeni": data.get("prijmeni", ""),
-            "ico": data.get("ico", ""),
-            "datum_narozeni": data.get("datum_narozeni", ""),
-            "nejvyssi_vzdelani": nejvyssi_vzdelani,
-            "datum_nastupu": data.get("datum_nastupu", ""),
-            "povolani": data.get("povolani", ""),
-            # Přidej další pole dle potřeby
-        }
-        
-        # Načti šablonu
-        doc = Document(template_name)
+        mapping = build_mapping(data)
         
-        # Nahraď ve všech odstavcích
-        for paragraph in doc.paragraphs:
-            replace_in_paragraph(paragraph, mapping)
-        
-        # Nahraď ve všech tabulkách
-        for table in doc.tables:
-            replace_in_table(table, mapping)
+        # Načti zkompilovanou šablonu (kompiluje se jen při prvním použití nebo změně souboru)
+        template = load_template(template_name)
         
         # Ulož výstup
         if output_filename is None:
             output_filename = "vyplnena.docx"
         
-        doc.save(output_filename)
-        return output_filename
+        return template.save(output_filename, mapping)
         
     except FileNotFoundError:
         print("❌ Soubor data.json nebyl nalezen")
@@ -98,24 +96,8 @@ if __name__ == "__main__":
         with open("data.json", "r", encoding="utf-8") as f:
             data = json.load(f)
         
-        # Získej normalizovaný titul z nejvyssi_vzdelani
-        nejvyssi_vzdelani = data.get("nejvyssi_vzdelani", "")
-        titul_pred = normalize_title_from_education(nejvyssi_vzdelani)
-        
         # Mapování zástupců na data
-        mapping = {
-            "nazev_firmy": data.get("firma_nazev", ""),
-            "sidlo_firmy": data.get("firma_sidlo", ""),
-            "titul_pred": titul_pred,
-            "jmeno": data.get("jmeno", ""),
-            "prijmeni": data.get("prijmeni", ""),
-            "ico": data.get("ico", ""),
-            "datum_narozeni": data.get("datum_narozeni", ""),
-            "nejvyssi_vzdelani": nejvyssi_vzdelani,
-            "datum_nastupu": data.get("datum_nastupu", ""),
-            "povolani": data.get("povolani", ""),
-            # Přidej další pole dle potřeby
-        }
+        mapping = build_mapping(data)
         
         print("=== DEBUG: MAPOVÁNÍ KLÍČŮ ===")
         for k, v in mapping.items():
@@ -126,19 +108,11 @@ if __name__ == "__main__":
         TEMPLATE = "pop_jmeno.docx"  # uprav dle skutečného názvu šablony
         OUTPUT = "vyplnena.docx"
         
-        doc = Document(TEMPLATE)
-        
-        # Nahraď ve všech odstavcích
-        for paragraph in doc.paragraphs:
-            replace_in_paragraph(paragraph, mapping)
-        
-        # Nahraď ve všech tabulkách
-        for table in doc.tables:
-            replace_in_table(table, mapping)
+        template = load_template(TEMPLATE)
         
         # Ulož výstup
         print(f"✅ Ukládám vyplněný dokument do {OUTPUT}")
-        doc.save(OUTPUT)
+        template.save(OUTPUT, mapping)
         
     except FileNotFoundError:
         print("❌ Soubor data.json nebyl nalezen")
@@ -0,0 +1,300 @@
+import contextlib
+import contextvars
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field, fields
+from typing import Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Korelační ID právě zpracovávaného dokumentu - přidává se ke všem logům
+correlation_id: contextvars.ContextVar[str] = contextvars.ContextVar("correlation_id", default="")
+
+# Hranice histogramů doby trvání v sekundách
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Hranice histogramu počtu stránek
+PAGE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+# Atributy LogRecord, které se do JSON logu nepřidávají jako extra pole
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+# Háčky volané kolem každé fáze: hook(fáze, metriky) vrací context manager nebo None
+StageHook = Callable[[str, "DocumentMetrics"], Optional[ContextManager]]
+_stage_hooks: List[StageHook] = []
+
+
+@dataclass
+class DocumentMetrics:
+    """Metriky zpracování jednoho dokumentu"""
+    correlation_id: str = ""
+    source: str = ""
+    form: str = ""
+    backend: str = ""
+    # Doba trvání jednotlivých fází v milisekundách
+    stages: Dict[str, float] = field(default_factory=dict)
+    page_count: int = 0
+    text_chars: int = 0
+    # Stránky rozpoznané přes OCR a stránky, jejichž text z OCR byl v cache
+    ocr_pages: int = 0
+    ocr_cached_pages: int = 0
+    fields_found: List[str] = field(default_factory=list)
+    fields_missed: List[str] = field(default_factory=list)
+    # Nalezená pole, která neprošla kontrolou (validation.py)
+    fields_invalid: List[str] = field(default_factory=list)
+    ares_status: str = ""
+    ares_latency_ms: Optional[float] = None
+    status: str = ""
+    error: str = ""
+
+    def __post_init__(self):
+        if not self.correlation_id:
+            self.correlation_id = uuid.uuid4().hex[:12]
+
+    @contextlib.contextmanager
+    def activate(self) -> Iterator["DocumentMetrics"]:
+        """Nastaví korelační ID dokumentu pro logy v rámci bloku"""
+        token = correlation_id.set(self.correlation_id)
+        try:
+            yield self
+        finally:
+            correlation_id.reset(token)
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Změří dobu trvání fáze a spustí zaregistrované háčky (např. profiler)"""
+        with contextlib.ExitStack() as stack:
+            for hook in list(_stage_hooks):
+                context = hook(name, self)
+                if context is not None:
+                    stack.enter_context(context)
+            started = time.perf_counter()
+            try:
+                yield
+            finally:
+                elapsed = (time.perf_counter() - started) * 1000
+                self.stages[name] = round(self.stages.get(name, 0.0) + elapsed, 3)
+
+    def to_dict(self) -> Dict:
+        """Převede metriky na slovník vhodný pro JSON"""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DocumentMetrics":
+        """Vytvoří instanci ze slovníku (opak to_dict)"""
+        known = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
+
+
+def add_stage_hook(hook: StageHook):
+    """Zaregistruje háček volaný kolem každé fáze zpracování"""
+    _stage_hooks.append(hook)
+
+
+def remove_stage_hook(hook: StageHook):
+    """Odebere dříve zaregistrovaný háček"""
+    if hook in _stage_hooks:
+        _stage_hooks.remove(hook)
+
+
+def cprofile_hook(output_dir: str, stages: Optional[Iterable[str]] = None) -> StageHook:
+    """Háček, který profiluje vybrané fáze pomocí cProfile.
+
+    Výsledek se uloží do output_dir/<korelační ID>_<fáze>.prof (čitelné např. přes snakeviz).
+    """
+    selected = set(stages) if stages is not None else None
+    os.makedirs(output_dir, exist_ok=True)
+
+    @contextlib.contextmanager
+    def profile(name: str, metrics: DocumentMetrics) -> Iterator[None]:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(os.path.join(output_dir, f"{metrics.correlation_id}_{name}.prof"))
+
+    def hook(name: str, metrics: DocumentMetrics) -> Optional[ContextManager]:
+        if selected is not None and name not in selected:
+            return None
+        return profile(name, metrics)
+
+    return hook
+
+
+class Histogram:
+    """Histogram s pevnými hranicemi košů (kumulativní jako v Prometheu)"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    """Naformátuje štítky metriky pro textový formát Prometheu"""
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = []
+    for key, value in pairs:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    """Souhrnné čítače a histogramy za všechny zpracované dokumenty"""
+
+    # Metrika: (typ, popis, hranice histogramu)
+    METRICS = {
+        "pdf_documents_total": ("counter", "Zpracované dokumenty podle výsledku", None),
+        "pdf_stage_duration_seconds": ("histogram", "Doba trvání fází zpracování", DURATION_BUCKETS),
+        "pdf_pages": ("histogram", "Počet zpracovaných stránek dokumentu", PAGE_BUCKETS),
+        "pdf_text_chars_total": ("counter", "Celkový počet extrahovaných znaků", None),
+        "pdf_ocr_pages_total": ("counter", "Stránky bez textové vrstvy zpracované přes OCR", None),
+        "pdf_fields_total": ("counter", "Pole nalezená a nenalezená ve formuláři", None),
+        "ares_requests_total": ("counter", "Dotazy na ARES podle výsledku", None),
+        "ares_request_duration_seconds": ("histogram", "Doba dotazu na ARES", DURATION_BUCKETS),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Tuple[Tuple[str, str], ...], float]] = {}
+        self._histograms: Dict[str, Dict[Tuple[Tuple[str, str], ...], Histogram]] = {}
+
+    @staticmethod
+    def _key(labels: Optional[Dict[str, str]]) -> Tuple[Tuple[str, str], ...]:
+        return tuple(sorted((labels or {}).items()))
+
+    def inc(self, name: str, value: float = 1, labels: Optional[Dict[str, str]] = None):
+        """Zvýší čítač"""
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = self._key(labels)
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None):
+        """Zaznamená hodnotu do histogramu"""
+        buckets = self.METRICS.get(name, ("histogram", "", DURATION_BUCKETS))[2] or DURATION_BUCKETS
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            key = self._key(labels)
+            if key not in series:
+                series[key] = Histogram(buckets)
+            series[key].observe(value)
+
+    def record_document(self, metrics: DocumentMetrics):
+        """Započítá metriky jednoho dokumentu"""
+        self.inc("pdf_documents_total", labels={"status": metrics.status or "ok"})
+        for stage, duration_ms in metrics.stages.items():
+            self.observe("pdf_stage_duration_seconds", duration_ms / 1000, {"stage": stage})
+        if metrics.page_count:
+            self.observe("pdf_pages", metrics.page_count)
+        self.inc("pdf_text_chars_total", metrics.text_chars)
+        if metrics.ocr_pages:
+            self.inc("pdf_ocr_pages_total", metrics.ocr_pages, {"result": "recognized"})
+        if metrics.ocr_cached_pages:
+            self.inc("pdf_ocr_pages_total", metrics.ocr_cached_pages, {"result": "cached"})
+        for key in metrics.fields_found:
+            self.inc("pdf_fields_total", labels={"field": key, "result": "found"})
+        for key in metrics.fields_missed:
+            self.inc("pdf_fields_total", labels={"field": key, "result": "missed"})
+        for key in metrics.fields_invalid:
+            self.inc("pdf_fields_total", labels={"field": key, "result": "invalid"})
+        if metrics.ares_status:
+            self.inc("ares_requests_total", labels={"status": metrics.ares_status})
+            if metrics.ares_latency_ms is not None:
+                self.observe("ares_request_duration_seconds", metrics.ares_latency_ms / 1000)
+
+    def render_prometheus(self) -> str:
+        """Vrátí metriky v textovém formátu Prometheu"""
+        lines = []
+        with self._lock:
+            names = sorted(set(self._counters) | set(self._histograms))
+            for name in names:
+                kind, description, _ = self.METRICS.get(name, ("counter" if name in self._counters else "histogram", "", None))
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(self._counters.get(name, {}).items()):
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                for labels, histogram in sorted(self._histograms.get(name, {}).items()):
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f"{name}_bucket{_format_labels(labels, (('le', _format_value(bound)),))} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(round(histogram.sum, 6))}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Uloží metriky v textovém formátu Prometheu (např. pro node_exporter textfile collector)"""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+
+
+# Výchozí registr metrik pro aktuální proces
+REGISTRY = MetricsRegistry()
+
+
+class CorrelationIdFilter(logging.Filter):
+    """Doplní do záznamu logu korelační ID právě zpracovávaného dokumentu"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "correlation_id", ""):
+            record.correlation_id = correlation_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Strukturovaný log - jeden JSON objekt na řádek"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(json_format: Optional[bool] = None, level: Optional[str] = None, stream=None):
+    """Nastaví logování pro spouštěcí skripty.
+
+    Výchozí formát jsou prosté zprávy (jako dřívější výpisy); s json_format=True nebo
+    LOG_FORMAT=json se loguje strukturovaně včetně korelačního ID. Úroveň určuje LOG_LEVEL.
+    """
+    if json_format is None:
+        json_format = os.getenv("LOG_FORMAT", "").lower() == "json"
+    level = level or os.getenv("LOG_LEVEL", "INFO")
+
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.addFilter(CorrelationIdFilter())
+    handler.setFormatter(JsonFormatter() if json_format else logging.Formatter("%(message)s"))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
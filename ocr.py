@@ -0,0 +1,272 @@
+import functools
+import hashlib
+import importlib.util
+import logging
+import os
+import shutil
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Deque, Dict, Iterator, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# OCR stránek bez textové vrstvy (naskenované žádosti).
+#
+# Stránka, jejíž text má méně než min_chars znaků, se vykreslí přes PDFium a rozpozná
+# Tesseractem (pytesseract) v poolu procesů. Stránky s textovou vrstvou se nevykreslují.
+# V rámci dokumentu se rozpoznané stránky drží podle hashe obrázku (další backend je znovu
+# nerozpoznává); s OCR_CACHE_DIR se text ukládá i do diskové cache mezi běhy.
+#
+# Vyžaduje balíček pytesseract a program tesseract s jazykem ces
+# (apt install tesseract-ocr tesseract-ocr-ces); bez nich se stránky vrací beze změny.
+
+DEFAULT_LANG = "ces"
+# Tesseract je nejpřesnější při rozlišení kolem 300 DPI
+DEFAULT_DPI = 300
+# Stránka s méně znaky textu se považuje za naskenovanou
+DEFAULT_MIN_CHARS = 10
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Verze záznamů v cache - zvýšit při změně vykreslení nebo nastavení Tesseractu
+OCR_CACHE_VERSION = 1
+
+PDFSource = Union[str, bytes, BinaryIO]
+
+
+@functools.lru_cache(maxsize=None)
+def available() -> bool:
+    """Je nainstalovaný pytesseract, program tesseract a PDFium pro vykreslení stránek?"""
+    if importlib.util.find_spec("pytesseract") is None or importlib.util.find_spec("pypdfium2") is None:
+        return False
+    return shutil.which(os.getenv("TESSERACT_CMD", "tesseract")) is not None
+
+
+def limit_tesseract_threads():
+    """Jeden Tesseract na jádro - jinak každý spouští vlákna OpenMP na všech jádrech
+    a souběžné procesy si navzájem berou CPU"""
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def recognize_image(mode: str, size: Tuple[int, int], pixels: bytes, lang: str = DEFAULT_LANG) -> str:
+    """Rozpozná text obrázku stránky (běží v procesu poolu, případně v aktuálním procesu)"""
+    import pytesseract
+    from PIL import Image
+
+    if os.getenv("TESSERACT_CMD"):
+        pytesseract.pytesseract.tesseract_cmd = os.environ["TESSERACT_CMD"]
+    return pytesseract.image_to_string(Image.frombytes(mode, size, pixels), lang=lang)
+
+
+def page_image_key(mode: str, size: Tuple[int, int], pixels: bytes, lang: str) -> str:
+    """Klíč v cache: SHA-256 obrázku stránky, jazyk a verze záznamů"""
+    digest = hashlib.sha256(f"{mode}:{size[0]}x{size[1]}:".encode("ascii"))
+    digest.update(pixels)
+    return f"{digest.hexdigest()}-{lang}-{OCR_CACHE_VERSION}"
+
+
+def default_workers() -> int:
+    """Počet procesů pro OCR (OCR_WORKERS, výchozí počet CPU)"""
+    return int(os.getenv("OCR_WORKERS", "0")) or os.cpu_count() or 1
+
+
+# Sdílené pooly procesů podle počtu procesů
+_executors: Dict[int, "ProcessPoolExecutor"] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(workers: Optional[int] = None) -> "ProcessPoolExecutor":
+    """Vrátí sdílený pool procesů pro OCR"""
+    # multiprocessing se načítá až s první naskenovanou stránkou
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or default_workers()
+    if workers not in _executors:
+        with _executors_lock:
+            if workers not in _executors:
+                _executors[workers] = ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=limit_tesseract_threads,
+                )
+    return _executors[workers]
+
+
+_default_cache: Any = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Sdílená disková cache OCR (OCR_CACHE_DIR, OCR_CACHE_MAX_MB); None = vypnuto.
+
+    Cache je volitelná - bez OCR_CACHE_DIR se nic nezapisuje na disk.
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                directory = os.getenv("OCR_CACHE_DIR", "")
+                if not directory or directory.lower() in ("0", "off", "none"):
+                    _default_cache = False
+                else:
+                    # result_cache importuje main_extract_new, proto až tady
+                    from result_cache import DiskLRUCache
+
+                    max_mb = float(os.getenv("OCR_CACHE_MAX_MB", DEFAULT_CACHE_MAX_BYTES / (1024 * 1024)))
+                    _default_cache = DiskLRUCache(directory, int(max_mb * 1024 * 1024))
+    return _default_cache or None
+
+
+def _completed(value: Optional[str] = None, error: Optional[BaseException] = None) -> Future:
+    future: Future = Future()
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(value)
+    return future
+
+
+class PageOCR:
+    """OCR vybraných stránek jednoho dokumentu.
+
+    Rozpracované a hotové stránky se drží podle hashe obrázku, takže druhý průchod
+    dokumentem (např. záložní backend) použije už rozpoznaný text. Stránky se vykreslují
+    v aktuálním procesu, do poolu se posílají jen pixely.
+    """
+
+    def __init__(
+        self,
+        source: PDFSource,
+        lang: str = DEFAULT_LANG,
+        dpi: int = DEFAULT_DPI,
+        workers: Optional[int] = None,
+        cache: Any = "default",
+    ):
+        self.source = source
+        self.lang = lang
+        self.dpi = dpi
+        # 0 = rozpoznávat v aktuálním procesu (např. v procesech hromadné extrakce)
+        self.workers = workers
+        # "default" = sdílená cache podle proměnných prostředí, None = bez cache
+        self._cache = cache
+        self.pages_recognized = 0
+        self.pages_cached = 0
+        self._document = None
+        self._futures: Dict[str, Future] = {}
+
+    @property
+    def cache(self):
+        # Vytváří se až u první naskenované stránky - dokumenty s textem cache nepotřebují
+        if self._cache == "default":
+            self._cache = get_default_cache()
+        return self._cache
+
+    def _render(self, index: int):
+        """Vykreslí stránku (číslovanou od 0) jako obrázek ve stupních šedi"""
+        if self._document is None:
+            import pypdfium2 as pdfium
+
+            if hasattr(self.source, "read"):
+                # Proud zároveň čte backend pro extrakci textu - zkopíruje se a pozice se vrátí
+                stream = self.source
+                position = stream.tell()
+                stream.seek(0)
+                self.source = stream.read()
+                stream.seek(position)
+            self._document = pdfium.PdfDocument(self.source)
+        page = self._document[index]
+        try:
+            return page.render(scale=self.dpi / 72, grayscale=True).to_pil()
+        finally:
+            page.close()
+
+    def submit(self, index: int) -> Future:
+        """Zařadí stránku (číslovanou od 0) k rozpoznání; výsledek z cache je hotový hned"""
+        image = self._render(index)
+        mode, size, pixels = image.mode, image.size, image.tobytes()
+        key = page_image_key(mode, size, pixels, self.lang)
+        if key in self._futures and not self._futures[key].cancelled():
+            return self._futures[key]
+
+        cached = self.cache.get(key) if self.cache is not None else None
+        if cached is not None:
+            self.pages_cached += 1
+            future = _completed(cached["text"])
+        elif self.workers == 0:
+            try:
+                future = _completed(recognize_image(mode, size, pixels, self.lang))
+            except Exception as e:
+                future = _completed(error=e)
+            self._store(key, future)
+        else:
+            future = get_executor(self.workers).submit(recognize_image, mode, size, pixels, self.lang)
+            future.add_done_callback(functools.partial(self._store, key))
+        self._futures[key] = future
+        return future
+
+    def _store(self, key: str, future: Future):
+        """Započítá rozpoznanou stránku a uloží její text do cache"""
+        if future.cancelled() or future.exception() is not None:
+            return
+        self.pages_recognized += 1
+        if self.cache is not None:
+            self.cache.put(key, {"text": future.result()})
+
+    def close(self):
+        """Zavře vykreslovaný dokument; rozpoznané stránky zůstávají pro další průchod"""
+        if self._document is not None:
+            self._document.close()
+            self._document = None
+
+
+def _page_text(item: Union[str, Tuple[int, str, Future]]) -> str:
+    if isinstance(item, str):
+        return item
+    index, text, future = item
+    try:
+        return future.result()
+    except Exception as e:
+        logger.warning(f"⚠️ Chyba OCR stránky {index + 1}: {e}")
+        return text
+
+
+def with_ocr_fallback(
+    pages: Iterator[str],
+    ocr: PageOCR,
+    min_chars: int = DEFAULT_MIN_CHARS,
+    wanted: Optional[Callable[[int], bool]] = None,
+    lookahead: Optional[int] = None,
+) -> Iterator[str]:
+    """Vrací text stránek z backendu; stránky bez textové vrstvy nahradí textem z OCR.
+
+    Pořadí stránek se zachová. Zatímco se čeká na OCR, čte backend dopředu nejvýše
+    lookahead stránek (výchozí počet procesů OCR), aby pool rozpoznával více stránek
+    souběžně. wanted(číslo stránky od 1) může stránky z OCR vyloučit (např. page_hints).
+    Bez nainstalovaného Tesseractu se stránky vrací beze změny.
+    """
+    lookahead = lookahead or max(ocr.workers or default_workers(), 1)
+    queue: Deque[Union[str, Tuple[int, str, Future]]] = deque()
+    warned = False
+    try:
+        for index, text in enumerate(pages):
+            if len(text.strip()) >= min_chars or (wanted is not None and not wanted(index + 1)):
+                queue.append(text)
+            elif not available():
+                if not warned:
+                    logger.warning("⚠️ Stránka bez textové vrstvy, ale OCR není dostupné (pytesseract, tesseract)")
+                    warned = True
+                queue.append(text)
+            else:
+                queue.append((index, text, ocr.submit(index)))
+            # Hotové stránky se vydají hned, na rozpracované se čeká až při plné frontě
+            while queue and (isinstance(queue[0], str) or queue[0][2].done() or len(queue) > lookahead):
+                yield _page_text(queue.popleft())
+        while queue:
+            yield _page_text(queue.popleft())
+    finally:
+        for item in queue:
+            if not isinstance(item, str):
+                item[2].cancel()
+        pages.close()
+        ocr.close()
@@ -0,0 +1,144 @@
+import abc
+import importlib.util
+import io
+from typing import BinaryIO, Dict, Iterator, List, Optional, Type, Union
+
+PDFSource = Union[str, bytes, BinaryIO]
+
+# Výchozí pořadí backendů pro "auto": nejrychlejší první, pdfplumber jako záloha
+AUTO_ORDER = ("pdfium", "pdfplumber")
+
+
+def prepare_source(source: PDFSource) -> Union[str, BinaryIO]:
+    """Převede bajty na proud a proud nastaví na začátek"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+
+class TextBackend(abc.ABC):
+    """Rozhraní backendu pro extrakci textu z PDF po stránkách"""
+
+    name = ""
+
+    @staticmethod
+    def available() -> bool:
+        """Je backend nainstalovaný?"""
+        return True
+
+    @abc.abstractmethod
+    def iter_pages(self, source: PDFSource) -> Iterator[str]:
+        """Postupně vrací text jednotlivých stránek (stránky se čtou až na vyžádání)"""
+
+
+class PdfplumberBackend(TextBackend):
+    """pdfplumber (pdfminer) - nejpomalejší, ale referenční výstup, na který byly laděny vzory"""
+
+    name = "pdfplumber"
+
+    def iter_pages(self, source: PDFSource) -> Iterator[str]:
+        import pdfplumber
+
+        with pdfplumber.open(prepare_source(source)) as pdf:
+            for page in pdf.pages:
+                try:
+                    text = page.extract_text() or ""
+                finally:
+                    # Uvolní objekty a rozložení stránky hned - jinak je pdfplumber drží do konce dokumentu
+                    page.close()
+                yield text
+
+
+class PdfiumBackend(TextBackend):
+    """PDFium přes pypdfium2 (závislost pdfplumberu) - řádově rychlejší než pdfminer"""
+
+    name = "pdfium"
+
+    @staticmethod
+    def available() -> bool:
+        return importlib.util.find_spec("pypdfium2") is not None
+
+    def iter_pages(self, source: PDFSource) -> Iterator[str]:
+        import pypdfium2 as pdfium
+
+        document = pdfium.PdfDocument(prepare_source(source))
+        try:
+            for index in range(len(document)):
+                page = document[index]
+                textpage = page.get_textpage()
+                try:
+                    text = textpage.get_text_range()
+                finally:
+                    textpage.close()
+                    page.close()
+                yield text.replace("\r\n", "\n").replace("\r", "\n")
+        finally:
+            document.close()
+
+
+def pdf_reader_class():
+    """Třída PdfReader z pypdf, případně ze staršího PyPDF2"""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        from PyPDF2 import PdfReader
+    return PdfReader
+
+
+class PypdfBackend(TextBackend):
+    """pypdf, případně starší PyPDF2 - čistý Python"""
+
+    name = "pypdf"
+
+    @staticmethod
+    def available() -> bool:
+        return any(importlib.util.find_spec(module) is not None for module in ("pypdf", "PyPDF2"))
+
+    def iter_pages(self, source: PDFSource) -> Iterator[str]:
+        reader = pdf_reader_class()(prepare_source(source))
+        for page in reader.pages:
+            yield page.extract_text() or ""
+
+
+def count_pages(source: PDFSource) -> int:
+    """Počet stránek dokumentu bez extrakce textu (PDFium, případně pypdf/PyPDF2)"""
+    if PdfiumBackend.available():
+        import pypdfium2 as pdfium
+
+        document = pdfium.PdfDocument(prepare_source(source))
+        try:
+            return len(document)
+        finally:
+            document.close()
+    return len(pdf_reader_class()(prepare_source(source)).pages)
+
+
+BACKENDS: Dict[str, Type[TextBackend]] = {
+    backend.name: backend for backend in (PdfiumBackend, PypdfBackend, PdfplumberBackend)
+}
+
+
+def available_backends() -> List[str]:
+    """Názvy nainstalovaných backendů"""
+    return [name for name, backend in BACKENDS.items() if backend.available()]
+
+
+def backend_chain(name: Optional[str] = "auto") -> List[TextBackend]:
+    """Backendy v pořadí, ve kterém se mají zkoušet.
+
+    "auto" znamená nejrychlejší dostupný backend se zálohou na pdfplumber, konkrétní název
+    použije jen daný backend. Lze zadat i více názvů oddělených čárkou, např. "pypdf,pdfplumber".
+    """
+    names = AUTO_ORDER if not name or name == "auto" else tuple(part.strip() for part in name.split(","))
+    chain = []
+    for backend_name in names:
+        if backend_name not in BACKENDS:
+            raise ValueError(f"Neznámý backend PDF: {backend_name} (dostupné: {', '.join(BACKENDS)})")
+        backend = BACKENDS[backend_name]
+        if backend.available():
+            chain.append(backend())
+    if not chain:
+        raise ValueError(f"Žádný z backendů {', '.join(names)} není nainstalovaný")
+    return chain
@@ -0,0 +1,235 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import fields
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, MutableMapping, Optional
+
+from ares_client import is_error_info
+from field_definitions import FIELD_DEFINITIONS_VERSION
+from main_extract_new import ExtractedData, ExtractionOptions, PDFExtractor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "data/result_cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MEMORY_ENTRIES = 32
+
+
+class DiskLRUCache:
+    """Souborová cache JSON záznamů s LRU vyřazováním podle celkové velikosti.
+
+    Každý záznam je jeden soubor; čas posledního použití se drží v mtime souboru,
+    takže cache mohou sdílet i souběžně běžící procesy.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = self._scan_size()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _scan_size(self) -> int:
+        """Spočítá aktuální velikost cache na disku"""
+        total = 0
+        for path in self.directory.glob("*.json"):
+            try:
+                total += path.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def get(self, key: str) -> Optional[Any]:
+        """Vrátí záznam z cache nebo None"""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+            return value
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, value: Any):
+        """Uloží záznam a případně vyřadí nejdéle nepoužité záznamy"""
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+
+        path = self._path(key)
+        try:
+            # Přepsaný záznam se odečte, jinak by velikost cache při každém přepsání rostla
+            previous_size = path.stat().st_size
+        except OSError:
+            previous_size = 0
+
+        # Atomický zápis - souběžní čtenáři nikdy neuvidí rozepsaný soubor
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"⚠️ Chyba při zápisu do cache výsledků: {e}")
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+
+        with self._lock:
+            self._size += len(data) - previous_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Smaže nejdéle nepoužité záznamy, dokud cache nezmenší na 90 % limitu"""
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
+        self._size = total
+
+    def clear(self):
+        """Smaže všechny záznamy"""
+        with self._lock:
+            for path in self.directory.glob("*.json"):
+                path.unlink(missing_ok=True)
+            self._size = 0
+
+
+class MemoryLRUCache(MutableMapping[str, Dict]):
+    """Cache záznamů v paměti s omezeným počtem položek (LRU), např. pro Streamlit session.
+
+    Zapisují do ní i pracovní vlákna extrakce, proto je chráněná zámkem.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MEMORY_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: str) -> Dict:
+        with self._lock:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def __setitem__(self, key: str, value: Dict):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            del self._entries[key]
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def disk_cache_from_env() -> Optional[DiskLRUCache]:
+    """Vytvoří diskovou cache podle proměnných prostředí (RESULT_CACHE_DIR, RESULT_CACHE_MAX_MB)"""
+    directory = os.getenv("RESULT_CACHE_DIR", DEFAULT_CACHE_DIR)
+    if not directory or directory.lower() in ("0", "off", "none"):
+        return None
+    max_mb = float(os.getenv("RESULT_CACHE_MAX_MB", DEFAULT_MAX_BYTES / (1024 * 1024)))
+    return DiskLRUCache(directory, int(max_mb * 1024 * 1024))
+
+
+# Nastavení, která výsledek extrakce neovlivňují
+_IGNORED_OPTIONS = ("progress", "debug_text_path", "ocr_workers")
+
+
+def options_fingerprint(options: Optional[ExtractionOptions] = None) -> str:
+    """Otisk nastavení extrakce - výsledky s jiným backendem, rozložením, omezenou pamětí
+    apod. se navzájem nesdílejí"""
+    options = options or ExtractionOptions()
+    data = {f.name: getattr(options, f.name) for f in fields(options) if f.name not in _IGNORED_OPTIONS}
+    if options.layout is not None:
+        data["layout"] = options.layout.to_dict()
+    if options.identify_form:
+        data["forms"] = sorted(
+            (spec.name, spec.version, spec.page_hints, spec.layout.to_dict() if spec.layout else None)
+            for spec in PDFExtractor.form_registry.specs
+        )
+    encoded = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def result_cache_key(pdf_bytes: bytes, options: Optional[ExtractionOptions] = None) -> str:
+    """Klíč výsledku: SHA-256 obsahu PDF, verze definic polí a otisk nastavení extrakce"""
+    return f"{hashlib.sha256(pdf_bytes).hexdigest()}-{FIELD_DEFINITIONS_VERSION}-{options_fingerprint(options)}"
+
+
+class ExtractionResultCache:
+    """Cache výsledků extrakce podle obsahu PDF - v paměti (např. Streamlit session) a na disku"""
+
+    def __init__(self, disk: Optional[DiskLRUCache] = None, memory: Optional[MutableMapping[str, Dict]] = None):
+        self.disk = disk
+        self.memory = memory
+
+    def get(self, pdf_bytes: bytes, options: Optional[ExtractionOptions] = None) -> Optional[ExtractedData]:
+        """Vrátí uložený výsledek pro dané PDF a nastavení extrakce nebo None"""
+        key = result_cache_key(pdf_bytes, options)
+        data = self.memory.get(key) if self.memory is not None else None
+        if data is None and self.disk is not None:
+            data = self.disk.get(key)
+            if data is not None and self.memory is not None:
+                self.memory[key] = data
+        return ExtractedData.from_dict(data) if data is not None else None
+
+    def put(self, pdf_bytes: bytes, extracted_data: ExtractedData, options: Optional[ExtractionOptions] = None):
+        """Uloží výsledek extrakce"""
+        key = result_cache_key(pdf_bytes, options)
+        data = extracted_data.to_dict()
+        if self.memory is not None:
+            self.memory[key] = data
+        if self.disk is not None:
+            self.disk.put(key, data)
+
+    def get_or_extract(
+        self,
+        pdf_bytes: bytes,
+        extract: Callable[[bytes], ExtractedData],
+        options: Optional[ExtractionOptions] = None,
+    ) -> ExtractedData:
+        """Vrátí výsledek z cache, nebo extrahuje a uloží.
+
+        options musí odpovídat nastavení, se kterým extract extrahuje. Neukládají se
+        neúspěšné extrakce ani výsledky s chybou dotazu do ARES - ta je jen dočasná.
+        """
+        extracted_data = self.get(pdf_bytes, options)
+        if extracted_data is not None:
+            logger.info("✅ Výsledek extrakce nalezen v cache")
+            return extracted_data
+
+        extracted_data = extract(pdf_bytes)
+        if extracted_data.raw_text and not is_error_info(extracted_data.company_info):
+            self.put(pdf_bytes, extracted_data, options)
+        return extracted_data
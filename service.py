@@ -0,0 +1,425 @@
+import argparse
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from ares_client import AresClient, RateLimiter
+from main_extract_new import ExtractedData, ExtractionOptions, PDFExtractor
+from main_fill import render_document
+from metrics import REGISTRY, DocumentMetrics, configure_logging
+from ocr import limit_tesseract_threads
+from pdf_backends import backend_chain
+from result_cache import DiskLRUCache, ExtractionResultCache
+
+# Samostatná HTTP služba pro extrakci a vyplňování šablon.
+#
+#   POST /jobs/extract              tělo = PDF, volitelně ?lazy=1&backend=pdfium&max_pages=5&identify_form=1
+#                                   &bounded_memory=1&max_text_mb=5
+#   POST /jobs/fill                 JSON {"template": "pop_jmeno.docx", "data": {...}} nebo {"template": ..., "job_id": ...}
+#   GET  /jobs/<id>                 stav úlohy
+#   GET  /jobs/<id>/result          výsledek (JSON extrakce nebo DOCX), ?raw_text=1 včetně textu
+#   GET  /metrics, GET /healthz
+#
+# Úlohy běží v omezeném poolu procesů; při plné frontě služba odpovídá 429.
+
+logger = logging.getLogger(__name__)
+
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+PRELOAD_MODULES = ("pypdfium2", "pypdf", "PyPDF2", "pdfplumber", "requests")
+
+# Stav pracovního procesu
+_ares_client: Optional[AresClient] = None
+_result_cache: Optional[ExtractionResultCache] = None
+
+
+def _init_worker(result_cache_dir: Optional[str] = None, rate_limiter: Optional[RateLimiter] = None):
+    """Inicializace pracovního procesu - sdílený klient ARES a případně cache výsledků"""
+    global _ares_client, _result_cache
+    _ares_client = AresClient.from_env()
+    if rate_limiter is not None:
+        _ares_client.rate_limiter = rate_limiter
+    _result_cache = ExtractionResultCache(DiskLRUCache(result_cache_dir)) if result_cache_dir else None
+    limit_tesseract_threads()
+    # Knihovny načítané až při použití se načtou hned, aby je nezaplatila první úloha
+    for module in PRELOAD_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+
+def _warmup() -> int:
+    """Úloha pro předehřátí - spustí pracovní proces i jeho inicializaci"""
+    time.sleep(0.1)
+    return os.getpid()
+
+
+def _run_extract(pdf_bytes: bytes, options: ExtractionOptions) -> Dict[str, Any]:
+    """Extrakce v pracovním procesu; metriky se započítají až v hlavním procesu"""
+    metrics = DocumentMetrics()
+
+    def extract(data: bytes) -> ExtractedData:
+        extractor = PDFExtractor(data, ares_client=_ares_client, options=options, metrics=metrics, metrics_registry=None)
+        return extractor.extract_all_data()
+
+    if _result_cache is not None:
+        extracted_data = _result_cache.get_or_extract(pdf_bytes, extract, options)
+        metrics.status = metrics.status or "cached"
+    else:
+        extracted_data = extract(pdf_bytes)
+    return {"data": extracted_data.to_dict(), "metrics": metrics.to_dict()}
+
+
+def _run_fill(template_path: str, data: Dict[str, Any]) -> bytes:
+    """Vyplnění šablony v pracovním procesu"""
+    return render_document(template_path, data)
+
+
+@dataclass
+class Job:
+    """Úloha ve frontě služby"""
+    id: str
+    kind: str
+    future: Future
+    created: float
+    finished: Optional[float] = None
+
+    @property
+    def status(self) -> str:
+        if self.future.done():
+            if self.future.cancelled() or self.future.exception() is not None:
+                return "error"
+            return "done"
+        return "running" if self.future.running() else "queued"
+
+    def to_dict(self) -> Dict[str, Any]:
+        info = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created": self.created,
+            "finished": self.finished,
+        }
+        if info["status"] == "error":
+            if self.future.cancelled():
+                info["error"] = "Úloha byla zrušena"
+            else:
+                error = self.future.exception()
+                info["error"] = f"{type(error).__name__}: {error}"
+        return info
+
+
+class ExtractionService(ThreadingHTTPServer):
+    """HTTP služba s omezeným poolem pracovních procesů a frontou úloh"""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        templates_dir: str = "templates",
+        max_upload_bytes: int = 50 * 1024 * 1024,
+        result_ttl: float = 3600,
+        result_cache_dir: Optional[str] = None,
+    ):
+        super().__init__(address, ServiceHandler)
+        self.workers = workers or os.cpu_count() or 1
+        # Nejvyšší počet čekajících a běžících úloh, nad ním se vrací 429
+        self.queue_size = queue_size or self.workers * 4
+        self.templates_dir = os.path.abspath(templates_dir)
+        self.max_upload_bytes = max_upload_bytes
+        self.result_ttl = result_ttl
+        self.jobs: Dict[str, Job] = {}
+        self.in_flight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        # ARES_RATE_LIMIT platí pro celou službu, ne pro každý pracovní proces zvlášť
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(result_cache_dir, RateLimiter.from_env(shared=True)),
+        )
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def warm_up(self):
+        """Spustí všechny pracovní procesy předem, aby první úlohy nečekaly na start"""
+        wait([self.executor.submit(_warmup) for _ in range(self.workers)])
+
+    def submit(self, kind: str, func, *args) -> Optional[Job]:
+        """Zařadí úlohu do poolu; při plné frontě vrátí None"""
+        self._prune()
+        with self._lock:
+            if self.in_flight >= self.queue_size:
+                self.rejected += 1
+                return None
+            self.in_flight += 1
+
+        job_id = uuid.uuid4().hex
+        try:
+            future = self.executor.submit(func, *args)
+        except Exception:
+            with self._lock:
+                self.in_flight -= 1
+            raise
+        job = Job(job_id, kind, future, time.time())
+        with self._lock:
+            self.jobs[job_id] = job
+        future.add_done_callback(lambda f: self._finished(job))
+        return job
+
+    def _finished(self, job: Job):
+        """Dokončení úlohy - uvolní místo ve frontě a započítá metriky"""
+        job.finished = time.time()
+        with self._lock:
+            self.in_flight -= 1
+        if job.kind == "extract" and job.status == "done":
+            REGISTRY.record_document(DocumentMetrics.from_dict(job.future.result()["metrics"]))
+
+    def _prune(self):
+        """Zapomene dokončené úlohy starší než result_ttl"""
+        limit = time.time() - self.result_ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self.jobs.items() if job.finished and job.finished < limit]
+            for job_id in expired:
+                del self.jobs[job_id]
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def resolve_template(self, name: str) -> str:
+        """Cesta k šabloně - jen soubory přímo ve složce šablon"""
+        if not name or os.path.basename(name) != name:
+            raise ValueError("Neplatný název šablony")
+        path = os.path.join(self.templates_dir, name)
+        if not os.path.isfile(path):
+            raise ValueError(f"Šablona {name} neexistuje")
+        return path
+
+    def render_metrics(self) -> str:
+        """Metriky extrakce a stav fronty v textovém formátu Prometheu"""
+        with self._lock:
+            in_flight, rejected, stored = self.in_flight, self.rejected, len(self.jobs)
+        lines = [
+            "# HELP service_jobs_in_flight Čekající a běžící úlohy",
+            "# TYPE service_jobs_in_flight gauge",
+            f"service_jobs_in_flight {in_flight}",
+            "# HELP service_queue_size Maximální počet čekajících a běžících úloh",
+            "# TYPE service_queue_size gauge",
+            f"service_queue_size {self.queue_size}",
+            "# HELP service_jobs_stored Úlohy s uloženým výsledkem",
+            "# TYPE service_jobs_stored gauge",
+            f"service_jobs_stored {stored}",
+            "# HELP service_jobs_rejected_total Úlohy odmítnuté kvůli plné frontě",
+            "# TYPE service_jobs_rejected_total counter",
+            f"service_jobs_rejected_total {rejected}",
+        ]
+        return REGISTRY.render_prometheus() + "\n".join(lines) + "\n"
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _flag(query: Dict[str, list], name: str) -> bool:
+    return query.get(name, [""])[0].lower() in ("1", "true", "yes", "ano")
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """Obsluha HTTP požadavků služby"""
+
+    server: ExtractionService
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+
+        if parts == ["healthz"]:
+            self._send_json(200, {"status": "ok", "workers": self.server.workers})
+        elif parts == ["metrics"]:
+            self._send(200, self.server.render_metrics().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+        elif len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.server.get_job(parts[1])
+            if job is None:
+                self._send_json(404, {"error": "Úloha neexistuje"})
+            elif len(parts) == 2:
+                self._send_json(200, job.to_dict())
+            elif parts[2] == "result":
+                self._send_result(job, parse_qs(url.query))
+            else:
+                self._send_json(404, {"error": "Neznámá adresa"})
+        else:
+            self._send_json(404, {"error": "Neznámá adresa"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_json(400, {"error": "Neplatná hlavička Content-Length"})
+            return
+        if length > self.server.max_upload_bytes:
+            self._send_json(413, {"error": "Příliš velký požadavek"})
+            return
+        body = self.rfile.read(length)
+
+        try:
+            if url.path == "/jobs/extract":
+                job = self._submit_extract(body, query)
+            elif url.path == "/jobs/fill":
+                job = self._submit_fill(body)
+            else:
+                self._send_json(404, {"error": "Neznámá adresa"})
+                return
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        if job is None:
+            self._send_json(429, {"error": "Fronta je plná, zkuste to později"}, {"Retry-After": "1"})
+            return
+        info = job.to_dict()
+        info["status_url"] = f"/jobs/{job.id}"
+        info["result_url"] = f"/jobs/{job.id}/result"
+        self._send_json(202, info, {"Location": info["status_url"]})
+
+    def _submit_extract(self, body: bytes, query: Dict[str, list]) -> Optional[Job]:
+        if not body.startswith(b"%PDF"):
+            raise ValueError("Tělo požadavku musí být PDF")
+        max_pages = query.get("max_pages", [""])[0]
+        max_text_mb = query.get("max_text_mb", [""])[0]
+        backend = query.get("backend", ["auto"])[0]
+        # Neznámý nebo nenainstalovaný backend se odmítne hned (400), ne až chybou úlohy
+        backend_chain(backend)
+        options = ExtractionOptions(
+            lazy=_flag(query, "lazy"),
+            max_pages=int(max_pages) if max_pages else None,
+            bounded_memory=_flag(query, "bounded_memory"),
+            max_text_bytes=int(float(max_text_mb) * 1024 * 1024) if max_text_mb else None,
+            identify_form=_flag(query, "identify_form"),
+            backend=backend,
+            ocr=not _flag(query, "no_ocr"),
+            # Úlohy už běží v poolu procesů služby - OCR přímo v nich
+            ocr_workers=0,
+        )
+        return self.server.submit("extract", _run_extract, body, options)
+
+    def _submit_fill(self, body: bytes) -> Optional[Job]:
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            raise ValueError("Tělo požadavku musí být JSON")
+        template_path = self.server.resolve_template(request.get("template", ""))
+
+        data = request.get("data")
+        if data is None and request.get("job_id"):
+            # Vyplnění z výsledku dřívější extrakce
+            source = self.server.get_job(request["job_id"])
+            if source is None or source.kind != "extract" or source.status != "done":
+                raise ValueError("Úloha extrakce neexistuje nebo ještě není dokončená")
+            data = source.future.result()["data"]["personal_info"]
+        if not isinstance(data, dict):
+            raise ValueError("Chybí data pro vyplnění (data nebo job_id)")
+        return self.server.submit("fill", _run_fill, template_path, data)
+
+    def _send_result(self, job: Job, query: Dict[str, list]):
+        status = job.status
+        if status in ("queued", "running"):
+            self._send_json(202, job.to_dict())
+            return
+        if status == "error":
+            self._send_json(500, job.to_dict())
+            return
+
+        result = job.future.result()
+        if job.kind == "fill":
+            self._send(200, result, DOCX_CONTENT_TYPE, {"Content-Disposition": f'attachment; filename="{job.id}.docx"'})
+            return
+
+        data = dict(result["data"])
+        data["ok"] = bool(data.get("raw_text"))
+        if not _flag(query, "raw_text"):
+            data.pop("raw_text", None)
+        self._send_json(200, {"job_id": job.id, **data, "metrics": result["metrics"]})
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self._send(status, body, "application/json; charset=utf-8", headers)
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def start_service(port: int = 0, warm_up: bool = True, **kwargs) -> Tuple[ExtractionService, threading.Thread]:
+    """Spustí službu na pozadí (port 0 = libovolný volný port)"""
+    service = ExtractionService(("127.0.0.1", port), **kwargs)
+    if warm_up:
+        service.warm_up()
+    thread = threading.Thread(target=service.serve_forever, daemon=True)
+    thread.start()
+    return service, thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP služba pro extrakci dat z PDF a vyplňování šablon")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Počet pracovních procesů (výchozí: počet CPU)")
+    parser.add_argument("--queue-size", type=int, default=None, help="Maximální počet čekajících a běžících úloh (výchozí: 4 na proces)")
+    parser.add_argument("--templates", default="templates", help="Složka se šablonami DOCX")
+    parser.add_argument("--max-upload-mb", type=float, default=50, help="Maximální velikost požadavku v MB")
+    parser.add_argument("--result-ttl", type=float, default=3600, help="Jak dlouho držet výsledky dokončených úloh (s)")
+    parser.add_argument("--result-cache", default=None, help="Složka cache výsledků podle obsahu PDF (výchozí: vypnuto)")
+    parser.add_argument("--log-json", action="store_true", help="Strukturované JSON logy")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+
+    # Proměnné z .env se načtou před spuštěním pracovních procesů, které je zdědí
+    load_dotenv()
+    configure_logging(json_format=args.log_json or None)
+    service = ExtractionService(
+        (args.host, args.port),
+        workers=args.workers,
+        queue_size=args.queue_size,
+        templates_dir=args.templates,
+        max_upload_bytes=int(args.max_upload_mb * 1024 * 1024),
+        result_ttl=args.result_ttl,
+        result_cache_dir=args.result_cache,
+    )
+    service.warm_up()
+    print(f"🚀 Služba běží na {service.base_url} ({service.workers} procesů, fronta {service.queue_size})")
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.server_close()
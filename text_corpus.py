@@ -0,0 +1,347 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+import zlib
+from dataclasses import replace
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from batch_extract import collect_pdf_files
+from field_definitions import FIELD_DEFINITIONS_VERSION
+from main_extract_new import ExtractionOptions, PDFExtractor
+from metrics import configure_logging
+from ocr import limit_tesseract_threads
+
+# Korpus extrahovaných textů pro ladění vzorů polí.
+#
+#   python text_corpus.py build slozka_s_pdf/      jednorázově uloží text každého PDF (komprimovaně)
+#   python text_corpus.py rerun                    znovu vyhledá pole ve všech textech a vypíše změny
+#   python text_corpus.py diff --run 3 --against 1 porovná dva uložené běhy
+#
+# Po úpravě vzorů ve field_definitions stačí rerun - PDF se znovu nečtou.
+
+DEFAULT_CORPUS_PATH = "data/text_corpus.sqlite"
+
+# Korpus otevřený v pracovním procesu
+_corpus: Optional["TextCorpus"] = None
+_options: Optional[ExtractionOptions] = None
+
+
+class TextCorpus:
+    """SQLite úložiště textů dokumentů (komprimovaných zlibem) a výsledků jednotlivých běhů"""
+
+    def __init__(self, path: str = DEFAULT_CORPUS_PATH):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS documents (
+                    source TEXT PRIMARY KEY,
+                    sha256 TEXT NOT NULL,
+                    backend TEXT NOT NULL,
+                    page_count INTEGER NOT NULL,
+                    text BLOB NOT NULL,
+                    stored_at REAL NOT NULL
+                )"""
+            )
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    definitions_version TEXT NOT NULL,
+                    started_at REAL NOT NULL
+                )"""
+            )
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS results (
+                    run_id INTEGER NOT NULL,
+                    source TEXT NOT NULL,
+                    personal_info TEXT NOT NULL,
+                    table_data TEXT NOT NULL,
+                    PRIMARY KEY (run_id, source)
+                )"""
+            )
+
+    def close(self):
+        self.conn.close()
+
+    # Dokumenty
+
+    def document_hashes(self) -> Dict[str, str]:
+        """{zdroj: SHA-256 PDF} všech uložených dokumentů"""
+        return dict(self.conn.execute("SELECT source, sha256 FROM documents"))
+
+    def put_text(self, source: str, sha256: str, text: str, backend: str = "", page_count: int = 0):
+        """Uloží (nebo přepíše) text dokumentu"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO documents (source, sha256, backend, page_count, text, stored_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (source, sha256, backend, page_count, zlib.compress(text.encode("utf-8"), 9), time.time()),
+            )
+
+    def get_text(self, source: str) -> Optional[str]:
+        """Text uloženého dokumentu nebo None"""
+        row = self.conn.execute("SELECT text FROM documents WHERE source = ?", (source,)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+    def sources(self) -> List[str]:
+        return [row[0] for row in self.conn.execute("SELECT source FROM documents ORDER BY source")]
+
+    def size_stats(self) -> Tuple[int, int]:
+        """Počet dokumentů a celková velikost komprimovaných textů v bajtech"""
+        count, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(text)), 0) FROM documents").fetchone()
+        return count, size
+
+    # Běhy
+
+    def add_run(self, results: Iterator[Tuple[str, Dict[str, str], List[Dict[str, str]]]]) -> int:
+        """Uloží výsledky nového běhu a vrátí jeho číslo"""
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (definitions_version, started_at) VALUES (?, ?)",
+                (FIELD_DEFINITIONS_VERSION, time.time()),
+            )
+            run_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO results (run_id, source, personal_info, table_data) VALUES (?, ?, ?, ?)",
+                (
+                    (run_id, source, json.dumps(personal_info, ensure_ascii=False), json.dumps(table_data, ensure_ascii=False))
+                    for source, personal_info, table_data in results
+                ),
+            )
+        return run_id
+
+    def runs(self) -> List[Tuple[int, str, float]]:
+        """Uložené běhy (číslo, verze definic polí, čas spuštění) od nejstaršího"""
+        return list(self.conn.execute("SELECT id, definitions_version, started_at FROM runs ORDER BY id"))
+
+    def previous_run(self, run_id: int) -> Optional[int]:
+        row = self.conn.execute("SELECT MAX(id) FROM runs WHERE id < ?", (run_id,)).fetchone()
+        return row[0]
+
+    def run_results(self, run_id: int) -> Dict[str, Tuple[Dict[str, str], List[Dict[str, str]]]]:
+        """{zdroj: (osobní údaje, tabulková data)} daného běhu"""
+        return {
+            source: (json.loads(personal_info), json.loads(table_data))
+            for source, personal_info, table_data in self.conn.execute(
+                "SELECT source, personal_info, table_data FROM results WHERE run_id = ?", (run_id,)
+            )
+        }
+
+    def diff(self, run_id: int, against: int) -> List[Dict[str, Any]]:
+        """Změněné hodnoty polí mezi dvěma běhy - jeden záznam na dokument a pole"""
+        before = self.run_results(against)
+        after = self.run_results(run_id)
+        changes = []
+        for source in sorted(set(before) | set(after)):
+            old_info, old_table = before.get(source, ({}, []))
+            new_info, new_table = after.get(source, ({}, []))
+            for key in sorted(set(old_info) | set(new_info)):
+                if old_info.get(key) != new_info.get(key):
+                    changes.append({"file": source, "field": key, "before": old_info.get(key), "after": new_info.get(key)})
+            if old_table != new_table:
+                changes.append({"file": source, "field": "table_data", "before": old_table, "after": new_table})
+        return changes
+
+
+def _init_worker(corpus_path: str, options: Optional[ExtractionOptions], quiet: bool):
+    """Inicializace pracovního procesu - vlastní připojení ke korpusu"""
+    global _corpus, _options
+    _corpus = TextCorpus(corpus_path)
+    _options = options
+    if quiet:
+        # Průběžné zprávy extrakce potlačíme, varování a chyby zůstanou
+        logging.getLogger().setLevel(logging.WARNING)
+
+
+def _read_document(pdf_file: str) -> Dict[str, Any]:
+    """Přečte text jednoho PDF (bez vyhledávání polí a ARES)"""
+    try:
+        with open(pdf_file, "rb") as f:
+            pdf_bytes = f.read()
+        extractor = PDFExtractor(pdf_bytes, options=_options, metrics_registry=None)
+        text = extractor.extract_text_from_pdf()
+        if not text:
+            raise ValueError(extractor.metrics.error or "Nepodařilo se extrahovat text z PDF")
+        return {
+            "file": pdf_file,
+            "ok": True,
+            "sha256": hashlib.sha256(pdf_bytes).hexdigest(),
+            "text": text,
+            "backend": extractor.metrics.backend,
+            "page_count": extractor.extracted_data.page_count,
+        }
+    except Exception as e:
+        return {"file": pdf_file, "ok": False, "error": f"{type(e).__name__}: {e}"}
+
+
+def _rerun_document(source: str) -> Tuple[str, Dict[str, str], List[Dict[str, str]]]:
+    """Znovu vyhledá pole a tabulku v uloženém textu dokumentu"""
+    extractor = PDFExtractor.from_text(_corpus.get_text(source) or "", options=_options)
+    return source, extractor.extract_personal_data(), extractor.extract_table_data()
+
+
+def _map(function, items: List[str], workers: int, initargs: tuple) -> Iterator[Any]:
+    """Zpracuje položky v poolu procesů (nebo přímo při jednom procesu)"""
+    if workers <= 1:
+        _init_worker(*initargs)
+        for item in items:
+            yield function(item)
+        return
+    # Procesy poolu nesmí spouštět další procesy - OCR běží přímo v nich, po jednom vlákně Tesseractu
+    corpus_path, options, quiet = initargs
+    initargs = (corpus_path, replace(options or ExtractionOptions(), ocr_workers=0), quiet)
+    limit_tesseract_threads()
+    with Pool(processes=workers, initializer=_init_worker, initargs=initargs) as pool:
+        yield from pool.imap_unordered(function, items, chunksize=8)
+
+
+def build(
+    corpus: TextCorpus,
+    pdf_files: List[str],
+    workers: int,
+    options: Optional[ExtractionOptions] = None,
+    force: bool = False,
+    quiet: bool = True,
+) -> Tuple[int, int, int]:
+    """Uloží texty PDF do korpusu; nezměněné dokumenty (podle obsahu) přeskočí.
+
+    Vrací počty (uložené, přeskočené, chyby).
+    """
+    known = {} if force else corpus.document_hashes()
+    todo = []
+    skipped = 0
+    for pdf_file in pdf_files:
+        if pdf_file in known:
+            with open(pdf_file, "rb") as f:
+                if hashlib.sha256(f.read()).hexdigest() == known[pdf_file]:
+                    skipped += 1
+                    continue
+        todo.append(pdf_file)
+
+    stored = errors = 0
+    for record in _map(_read_document, todo, workers, (corpus.path, options, quiet)):
+        if record["ok"]:
+            corpus.put_text(record["file"], record["sha256"], record["text"], record["backend"], record["page_count"])
+            stored += 1
+        else:
+            errors += 1
+            print(f"❌ {record['file']}: {record['error']}")
+    return stored, skipped, errors
+
+
+def rerun(corpus: TextCorpus, workers: int, options: Optional[ExtractionOptions] = None, quiet: bool = True) -> int:
+    """Vyhledá pole ve všech uložených textech aktuálními definicemi a uloží nový běh"""
+    sources = corpus.sources()
+    return corpus.add_run(_map(_rerun_document, sources, workers, (corpus.path, options, quiet)))
+
+
+def print_diff(changes: List[Dict[str, Any]], limit: int = 50):
+    """Vypíše změny polí (nejvýše limit řádků) a souhrn podle polí"""
+    per_field: Dict[str, int] = {}
+    for change in changes:
+        per_field[change["field"]] = per_field.get(change["field"], 0) + 1
+    for change in changes[:limit]:
+        if change["field"] == "table_data":
+            print(f"   {change['file']}: table_data {len(change['before'])} → {len(change['after'])} řádků")
+        else:
+            print(f"   {change['file']}: {change['field']} {change['before']!r} → {change['after']!r}")
+    if len(changes) > limit:
+        print(f"   ... a dalších {len(changes) - limit} změn")
+    if per_field:
+        print("📊 Změny podle polí: " + ", ".join(f"{name} {count}" for name, count in sorted(per_field.items())))
+
+
+def _write_diff(changes: List[Dict[str, Any]], path: str):
+    with open(path, "w", encoding="utf-8") as out:
+        for change in changes:
+            out.write(json.dumps(change, ensure_ascii=False) + "\n")
+    print(f"💾 Změny uloženy do {path}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Korpus extrahovaných textů pro opakované vyhledání polí bez čtení PDF")
+    parser.add_argument("--corpus", default=os.getenv("TEXT_CORPUS_PATH", DEFAULT_CORPUS_PATH), help="SQLite soubor korpusu")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Počet pracovních procesů (výchozí: počet CPU)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Nepotlačovat výpisy extrakce")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="Uložit texty PDF do korpusu")
+    build_parser.add_argument("inputs", nargs="+", help="PDF soubory, složky nebo .txt seznamy souborů")
+    build_parser.add_argument("--pattern", default="*.pdf", help="Maska souborů při procházení složek")
+    build_parser.add_argument("-r", "--recursive", action="store_true", help="Procházet složky rekurzivně")
+    build_parser.add_argument("--backend", default="auto", help="Backend pro extrakci textu")
+    build_parser.add_argument("--force", action="store_true", help="Znovu přečíst i nezměněné dokumenty")
+
+    rerun_parser = commands.add_parser("rerun", help="Znovu vyhledat pole ve všech textech a porovnat s předchozím během")
+    rerun_parser.add_argument("-o", "--output", default=None, help="JSONL soubor se změnami oproti předchozímu běhu")
+    rerun_parser.add_argument("--limit", type=int, default=50, help="Kolik změn vypsat")
+
+    diff_parser = commands.add_parser("diff", help="Porovnat dva uložené běhy")
+    diff_parser.add_argument("--run", type=int, default=None, help="Běh (výchozí: poslední)")
+    diff_parser.add_argument("--against", type=int, default=None, help="Porovnat s během (výchozí: předchozí)")
+    diff_parser.add_argument("-o", "--output", default=None, help="JSONL soubor se změnami")
+    diff_parser.add_argument("--limit", type=int, default=50, help="Kolik změn vypsat")
+
+    args = parser.parse_args(argv)
+    configure_logging(level=None if args.verbose else "WARNING")
+    workers = args.workers or os.cpu_count() or 1
+    corpus = TextCorpus(args.corpus)
+    started = time.perf_counter()
+
+    try:
+        if args.command == "build":
+            pdf_files = collect_pdf_files(args.inputs, args.pattern, args.recursive)
+            if not pdf_files:
+                print("❌ Nebyly nalezeny žádné PDF soubory")
+                return 1
+            print(f"🔄 Ukládám texty {len(pdf_files)} souborů...")
+            stored, skipped, errors = build(
+                corpus, pdf_files, workers, ExtractionOptions(backend=args.backend), args.force, quiet=not args.verbose
+            )
+            count, size = corpus.size_stats()
+            print(f"✅ Hotovo za {time.perf_counter() - started:.1f} s: {stored} uloženo, {skipped} beze změny, {errors} chyb")
+            print(f"💾 Korpus {args.corpus}: {count} dokumentů, {size / 1024:.0f} KB")
+            return 0 if errors == 0 else 2
+
+        if args.command == "rerun":
+            run_id = rerun(corpus, workers, quiet=not args.verbose)
+            print(f"✅ Běh {run_id} ({FIELD_DEFINITIONS_VERSION}) hotov za {time.perf_counter() - started:.1f} s")
+            against = corpus.previous_run(run_id)
+            if against is None:
+                print("ℹ️ První běh - není s čím porovnat")
+                return 0
+        else:
+            runs = corpus.runs()
+            run_id = args.run or (runs[-1][0] if runs else None)
+            if run_id is None:
+                print("❌ Korpus nemá žádné uložené běhy")
+                return 1
+            against = args.against or corpus.previous_run(run_id)
+            if against is None:
+                print(f"❌ Běh {run_id} nemá s čím porovnat")
+                return 1
+
+        changes = corpus.diff(run_id, against)
+        print(f"🔍 Běh {run_id} oproti běhu {against}: {len(changes)} změn")
+        print_diff(changes, args.limit)
+        if args.output:
+            _write_diff(changes, args.output)
+        return 0
+    finally:
+        corpus.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
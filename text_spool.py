@@ -0,0 +1,62 @@
+import shutil
+import tempfile
+from typing import Iterator, TextIO
+
+# Do této velikosti drží spool text v paměti, větší text se přelije do dočasného souboru
+DEFAULT_MEMORY_BYTES = 1024 * 1024
+
+
+class TextSpool:
+    """Text dokumentu zapisovaný po stránkách do SpooledTemporaryFile.
+
+    Malé dokumenty zůstanou v paměti, u velkých se text průběžně přelévá na disk,
+    takže paměť nezávisí na počtu stránek. Text se čte zpět po řádcích nebo jako
+    krátký náhled ze začátku.
+    """
+
+    def __init__(self, memory_bytes: int = DEFAULT_MEMORY_BYTES):
+        self._file = tempfile.SpooledTemporaryFile(max_size=memory_bytes, mode="w+", encoding="utf-8", newline="")
+        self.chars = 0
+        self.bytes_written = 0
+
+    def write(self, text: str):
+        """Připíše text na konec"""
+        self._file.seek(0, 2)
+        self._file.write(text)
+        self.chars += len(text)
+        self.bytes_written += len(text.encode("utf-8"))
+
+    @property
+    def on_disk(self) -> bool:
+        """Přelil se už text do dočasného souboru?"""
+        return bool(getattr(self._file, "_rolled", False))
+
+    def lines(self) -> Iterator[str]:
+        """Postupně vrací řádky textu (bez znaku konce řádku)"""
+        self._file.seek(0)
+        for line in self._file:
+            yield line.rstrip("\n")
+
+    def preview(self, chars: int) -> str:
+        """Prvních chars znaků textu"""
+        self._file.seek(0)
+        return self._file.read(chars)
+
+    def read(self) -> str:
+        """Celý text jako jeden řetězec - jen pro malé dokumenty"""
+        self._file.seek(0)
+        return self._file.read()
+
+    def copy_to(self, output: TextIO):
+        """Zapíše celý text do otevřeného textového souboru po blocích"""
+        self._file.seek(0)
+        shutil.copyfileobj(self._file, output)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> "TextSpool":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
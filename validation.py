@@ -0,0 +1,199 @@
+import re
+from dataclasses import asdict, dataclass
+from datetime import date
+from typing import Any, Dict, Iterable, Optional
+
+# Kontrola extrahovaných osobních údajů před dalším zpracováním (ARES, export, šablony).
+# Každé pole dostane stav a míru důvěry; neplatné IČO se vůbec neposílá do ARES.
+
+VALID = "valid"
+INVALID = "invalid"
+MISSING = "missing"
+# Hodnota nalezena, ale pro pole neexistuje kontrola
+UNCHECKED = "unchecked"
+
+# Míra důvěry podle výsledku kontroly
+CONFIDENCE = {
+    VALID: 1.0,
+    UNCHECKED: 0.7,
+    INVALID: 0.0,
+    MISSING: 0.0,
+}
+
+# Devítimístná rodná čísla (narození před rokem 1954) kontrolní číslici nemají
+CONFIDENCE_RC_WITHOUT_CHECKSUM = 0.8
+
+_DATE = re.compile(r"^\s*(\d{1,2})\s*\.\s*(\d{1,2})\s*\.\s*(\d{4})\s*$")
+_AMOUNT = re.compile(r"^-?\d+(\.\d+)?$")
+
+
+@dataclass
+class FieldValidation:
+    """Výsledek kontroly jednoho pole"""
+    status: str
+    confidence: float
+    # Popis chyby nebo upozornění
+    message: str = ""
+    # Hodnota převedená na typ pole (datum ve tvaru ISO, částka jako číslo)
+    value: Any = None
+
+    @classmethod
+    def of(cls, status: str, message: str = "", value: Any = None, confidence: Optional[float] = None) -> "FieldValidation":
+        return cls(status, CONFIDENCE[status] if confidence is None else confidence, message, value)
+
+    @property
+    def ok(self) -> bool:
+        return self.status in (VALID, UNCHECKED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FieldValidation":
+        return cls(**data)
+
+
+def ico_checksum_ok(ico: str) -> bool:
+    """Kontrolní číslice IČO (vážený součet mod 11)"""
+    total = sum(int(digit) * weight for digit, weight in zip(ico[:7], range(8, 1, -1)))
+    return (11 - total % 11) % 10 == int(ico[7])
+
+
+def validate_ico(ico: Optional[str]) -> FieldValidation:
+    """IČO: přesně 8 číslic s platnou kontrolní číslicí"""
+    if not ico:
+        return FieldValidation.of(MISSING)
+    if not re.fullmatch(r"\d{8}", ico):
+        return FieldValidation.of(INVALID, "IČO musí mít 8 číslic")
+    if not ico_checksum_ok(ico):
+        return FieldValidation.of(INVALID, "Neplatná kontrolní číslice IČO")
+    return FieldValidation.of(VALID, value=ico)
+
+
+def parse_date(value: Optional[str]) -> Optional[date]:
+    """Datum ve tvaru D.M.RRRR, nebo None, pokud neplatí"""
+    match = _DATE.match(value or "")
+    if not match:
+        return None
+    day, month, year = (int(part) for part in match.groups())
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def parse_amount(value: Optional[str]) -> Optional[float]:
+    """Částka normalizovaná extrakcí (tečka jako desetinná čárka), nebo None"""
+    value = (value or "").replace(" ", "")
+    if not _AMOUNT.match(value):
+        return None
+    return float(value)
+
+
+def rodne_cislo_birth_date(rodne_cislo: str) -> Optional[date]:
+    """Datum narození zakódované v rodném čísle (ženy mají k měsíci +50, doplňkové řady +20)"""
+    year, month, day = int(rodne_cislo[0:2]), int(rodne_cislo[2:4]), int(rodne_cislo[4:6])
+    if len(rodne_cislo) == 9:
+        year += 1900
+    else:
+        year += 2000 if year < 54 else 1900
+    if month > 70:
+        month -= 70
+    elif month > 50:
+        month -= 50
+    elif month > 20:
+        month -= 20
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def validate_rodne_cislo(rodne_cislo: Optional[str], datum_narozeni: Optional[str] = None, pohlavi: Optional[str] = None) -> FieldValidation:
+    """Rodné číslo: délka, dělitelnost 11 a shoda s datem narození a pohlavím"""
+    if not rodne_cislo:
+        return FieldValidation.of(MISSING)
+    rodne_cislo = rodne_cislo.replace("/", "")
+    if not re.fullmatch(r"\d{9,10}", rodne_cislo):
+        return FieldValidation.of(INVALID, "Rodné číslo musí mít 9 nebo 10 číslic")
+
+    birth_date = rodne_cislo_birth_date(rodne_cislo)
+    if birth_date is None:
+        return FieldValidation.of(INVALID, "Rodné číslo neobsahuje platné datum")
+    if len(rodne_cislo) == 9 and birth_date.year >= 1954:
+        return FieldValidation.of(INVALID, "Devítimístné rodné číslo je jen pro narozené před rokem 1954")
+    if len(rodne_cislo) == 10:
+        number = int(rodne_cislo)
+        # Výjimka do roku 1985: zbytek 10 po dělení 11 a kontrolní číslice 0
+        legacy = birth_date.year < 1986 and int(rodne_cislo[:9]) % 11 == 10 and rodne_cislo[9] == "0"
+        if number % 11 != 0 and not legacy:
+            return FieldValidation.of(INVALID, "Rodné číslo není dělitelné 11")
+
+    stated = parse_date(datum_narozeni)
+    if stated is not None and stated != birth_date:
+        return FieldValidation.of(INVALID, f"Rodné číslo neodpovídá datu narození {datum_narozeni}")
+    if pohlavi:
+        female = int(rodne_cislo[2:4]) > 50
+        stated_female = pohlavi.strip().lower().startswith("ž")
+        if female != stated_female:
+            return FieldValidation.of(INVALID, f"Rodné číslo neodpovídá pohlaví {pohlavi}")
+
+    if len(rodne_cislo) == 9:
+        return FieldValidation.of(VALID, "Bez kontrolní číslice", rodne_cislo, CONFIDENCE_RC_WITHOUT_CHECKSUM)
+    return FieldValidation.of(VALID, value=rodne_cislo)
+
+
+def validate_date(value: Optional[str], not_before: Optional[date] = None, today: Optional[date] = None) -> FieldValidation:
+    """Datum: platné kalendářní datum, ne v budoucnosti a ne před not_before"""
+    if not value:
+        return FieldValidation.of(MISSING)
+    parsed = parse_date(value)
+    if parsed is None:
+        return FieldValidation.of(INVALID, f"Neplatné datum: {value}")
+    if parsed > (today or date.today()):
+        return FieldValidation.of(INVALID, f"Datum {value} je v budoucnosti")
+    if not_before is not None and parsed < not_before:
+        return FieldValidation.of(INVALID, f"Datum {value} je před {not_before.day}.{not_before.month}.{not_before.year}")
+    return FieldValidation.of(VALID, value=parsed.isoformat())
+
+
+def validate_amount(value: Optional[str]) -> FieldValidation:
+    """Částka: nezáporné číslo"""
+    if not value:
+        return FieldValidation.of(MISSING)
+    parsed = parse_amount(value)
+    if parsed is None:
+        return FieldValidation.of(INVALID, f"Neplatná částka: {value}")
+    if parsed < 0:
+        return FieldValidation.of(INVALID, "Částka nesmí být záporná")
+    return FieldValidation.of(VALID, value=parsed)
+
+
+def validate_personal_data(personal_data: Dict[str, str], keys: Optional[Iterable[str]] = None) -> Dict[str, FieldValidation]:
+    """Zkontroluje osobní údaje a vrátí výsledek pro každý klíč.
+
+    keys jsou všechny očekávané klíče (typicky z definic polí) - chybějícím se přiřadí
+    stav missing. Pole bez kontroly mají stav unchecked.
+    """
+    results: Dict[str, FieldValidation] = {}
+    for key in keys or personal_data.keys():
+        value = personal_data.get(key)
+        results[key] = FieldValidation.of(UNCHECKED, value=value) if value else FieldValidation.of(MISSING)
+
+    birth = validate_date(personal_data.get("datum_narozeni"))
+    checks = {
+        "ico": lambda: validate_ico(personal_data.get("ico")),
+        "rodne_cislo": lambda: validate_rodne_cislo(
+            personal_data.get("rodne_cislo"), personal_data.get("datum_narozeni"), personal_data.get("pohlavi")
+        ),
+        "datum_narozeni": lambda: birth,
+        "datum_nastupu": lambda: validate_date(
+            personal_data.get("datum_nastupu"), date.fromisoformat(birth.value) if birth.status == VALID else None
+        ),
+        "cisty_prijem": lambda: validate_amount(personal_data.get("cisty_prijem")),
+        "mesicni_naklady": lambda: validate_amount(personal_data.get("mesicni_naklady")),
+    }
+    for key, check in checks.items():
+        if key in results:
+            results[key] = check()
+    return results